@@ -0,0 +1,253 @@
+"""
+Admission control for /ask.
+At most ADMISSION_MAX_CONCURRENT requests run the pipeline at once; a few
+more may wait for a slot, and everything past that is rejected straight
+away with 429 + Retry-After instead of queueing behind slow generations.
+Load is the larger of queue depth (running + waiting, per slot) and recent
+p95 latency against ADMISSION_LATENCY_TARGET_MS. As it rises, requests are
+admitted into cumulative DEGRADATION_TIERS that make them cheaper.
+
+/ask/batch groups take slots from the same controller at lower priority:
+they wait while any interactive request is waiting, hold at most
+ADMISSION_BATCH_SLOTS slots, and their (long) run times are left out of
+the latency estimate.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+from config import (
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT,
+    ADMISSION_LATENCY_TARGET_MS,
+    ADMISSION_BATCH_SLOTS,
+    DEGRADATION_TIERS,
+)
+
+WINDOW = 200   # recent service times used for p95 / retry estimates
+HORIZON = 60.0  # seconds; older service times no longer count as load
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """One admitted request: its tier settings, released when done"""
+
+    def __init__(self, controller: "AdmissionController", tier: int, load: float, waited_ms: float, batch: bool = False):
+        self.controller = controller
+        self.batch = batch
+        self.tier = tier
+        self.load = load
+        self.waited_ms = waited_ms
+        self.degrade = controller.tier_settings(tier)
+        self.started = time.perf_counter()
+        self._released = False
+
+    def report(self) -> dict:
+        return {
+            "tier": self.tier,
+            "load": round(self.load, 2),
+            "queued_ms": round(self.waited_ms, 1),
+            "degraded": self.degrade,
+        }
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.controller._release((time.perf_counter() - self.started) * 1000, self.batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        latency_target_ms: float = ADMISSION_LATENCY_TARGET_MS,
+        tiers: list[dict] = DEGRADATION_TIERS,
+        batch_slots: int = ADMISSION_BATCH_SLOTS,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.latency_target_ms = latency_target_ms
+        self.tiers = sorted(tiers, key=lambda t: t["load"])
+        self.batch_slots = batch_slots
+
+        self.running = 0        # interactive + batch
+        self.waiting = 0        # interactive only
+        self.running_batch = 0
+        self.waiting_batch = 0
+        self.admitted = 0
+        self.admitted_batch = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0, "batch_queue_timeout": 0}
+        self.tier_counts = [0] * (len(self.tiers) + 1)
+        self._service_ms = deque(maxlen=WINDOW)
+        self._cond = threading.Condition()
+
+    def fit_threads(self, threads: int):
+        """
+        Cap the queue so every running and queued request has a request
+        thread; past that, requests would wait for a thread instead of
+        being turned away.
+        """
+        with self._cond:
+            if self.max_concurrent + self.max_queue > threads:
+                self.max_queue = max(0, threads - self.max_concurrent)
+                print(f"⚠️ ADMISSION QUEUE CAPPED AT {self.max_queue} ({threads} request threads)")
+
+    # -------------------------
+    # load
+    # -------------------------
+    def _recent_ms(self) -> list[float]:
+        cutoff = time.monotonic() - HORIZON
+        return [ms for t, ms in self._service_ms if t >= cutoff]
+
+    def _p95_ms(self) -> float:
+        values = sorted(self._recent_ms())
+        if not values:
+            return 0.0
+        return values[min(int(len(values) * 0.95), len(values) - 1)]
+
+    def _load(self) -> float:
+        depth = (self.running + self.waiting) / self.max_concurrent
+        latency = self._p95_ms() / self.latency_target_ms if self.latency_target_ms else 0.0
+        return max(depth, latency)
+
+    def _tier(self, load: float) -> int:
+        return sum(1 for t in self.tiers if load >= t["load"])
+
+    def tier_settings(self, tier: int) -> dict:
+        """Tiers are cumulative: tier n applies every setting of tiers 1..n"""
+        merged = {}
+        for t in self.tiers[:tier]:
+            merged.update({k: v for k, v in t.items() if k != "load"})
+        return merged
+
+    def _retry_after(self) -> int:
+        """Seconds until the queue ahead should have drained"""
+        recent = self._recent_ms()
+        mean_ms = sum(recent) / len(recent) if recent else 1000.0
+        ahead = self.running + self.waiting
+        return max(1, math.ceil(ahead / self.max_concurrent * mean_ms / 1000))
+
+    # -------------------------
+    # admit / release
+    # -------------------------
+    def admit(self) -> Ticket:
+        """Wait for a slot (bounded); raises Overloaded instead of queueing forever"""
+        start = time.perf_counter()
+        with self._cond:
+            if self.running >= self.max_concurrent and self.waiting >= self.max_queue:
+                self.rejected["queue_full"] += 1
+                raise Overloaded("queue_full", self._retry_after())
+
+            # load as seen on arrival, including this request
+            self.waiting += 1
+            load = self._load()
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: self.running < self.max_concurrent, timeout=self.queue_timeout
+                )
+            finally:
+                self.waiting -= 1
+                self._cond.notify_all()  # batch groups wait for an empty interactive queue
+            if not admitted:
+                self.rejected["queue_timeout"] += 1
+                raise Overloaded("queue_timeout", self._retry_after())
+
+            self.running += 1
+            self.admitted += 1
+            tier = self._tier(load)
+            self.tier_counts[tier] += 1
+
+        return Ticket(self, tier, load, (time.perf_counter() - start) * 1000)
+
+    def admit_batch(self, timeout: float = None) -> Ticket:
+        """
+        Slot for one /ask/batch group. Waits behind interactive requests;
+        raises Overloaded after `timeout` seconds (None waits indefinitely).
+        """
+        start = time.perf_counter()
+        with self._cond:
+            self.waiting_batch += 1
+            try:
+                admitted = self._cond.wait_for(
+                    lambda: (
+                        self.running < self.max_concurrent
+                        and self.waiting == 0
+                        and self.running_batch < self.batch_slots
+                    ),
+                    timeout=timeout,
+                )
+            finally:
+                self.waiting_batch -= 1
+            if not admitted:
+                self.rejected["batch_queue_timeout"] += 1
+                raise Overloaded("batch_queue_timeout", self._retry_after())
+
+            self.running += 1
+            self.running_batch += 1
+            self.admitted_batch += 1
+            load = self._load()
+            tier = self._tier(load)
+
+        return Ticket(self, tier, load, (time.perf_counter() - start) * 1000, batch=True)
+
+    def batch_retry_after(self):
+        """
+        Seconds a new batch should wait before starting, or None. Batches
+        are turned away while interactive requests queue or load is at
+        the top tier.
+        """
+        with self._cond:
+            at_top_tier = self.tiers and self._tier(self._load()) == len(self.tiers)
+            if self.waiting or at_top_tier:
+                return self._retry_after()
+            return None
+
+    def _release(self, service_ms: float, batch: bool = False):
+        with self._cond:
+            self.running -= 1
+            if batch:
+                self.running_batch -= 1
+            else:
+                self._service_ms.append((time.monotonic(), service_ms))
+            # interactive and batch waiters wait on different conditions
+            self._cond.notify_all()
+
+    def state(self) -> dict:
+        with self._cond:
+            load = self._load()
+            return {
+                "running": self.running,
+                "waiting": self.waiting,
+                "running_batch": self.running_batch,
+                "waiting_batch": self.waiting_batch,
+                "batch_slots": self.batch_slots,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "p95_ms": round(self._p95_ms(), 1),
+                "load": round(load, 2),
+                "tier": self._tier(load),
+                "admitted": self.admitted,
+                "admitted_batch": self.admitted_batch,
+                "rejected": dict(self.rejected),
+                "admitted_per_tier": list(self.tier_counts),
+            }
+
+
+admission = AdmissionController()
@@ -0,0 +1,67 @@
+"""
+Send a JSONL file of questions to /ask/batch and write the streamed results.
+Each input line is {"question": str} plus optional "id" and
+"previous_question"; each output line is one result, in completion order.
+Only talks HTTP, so it doesn't load any models itself.
+
+Run from backend/ (with the server up):
+    python -m assistant.ask_batch questions.jsonl -o results.jsonl --vault default
+"""
+import argparse
+import json
+import sys
+import time
+
+import httpx
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk /ask over a JSONL file")
+    parser.add_argument("questions")
+    parser.add_argument("-o", "--out", help="results JSONL (default: stdout)")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--vault", default="default")
+    parser.add_argument("--no-generate", action="store_true", help="stop after the sufficiency gate")
+    args = parser.parse_args()
+
+    with open(args.questions, "rb") as f:
+        body = f.read()
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    counts = {}
+    start = time.perf_counter()
+    try:
+        with httpx.stream(
+            "POST",
+            f"{args.url}/ask/batch",
+            params={"vault": args.vault, "generate": not args.no_generate},
+            content=body,
+            headers={"Content-Type": "application/x-ndjson"},
+            timeout=None,
+        ) as res:
+            if res.status_code != 200:
+                res.read()
+                sys.exit(f"❌ {res.status_code}: {res.text}")
+
+            for line in res.iter_lines():
+                if not line:
+                    continue
+                out.write(line + "\n")
+                item = json.loads(line)
+                metadata = item.get("metadata", {})
+                outcome = "error" if "error" in item else metadata.get("refusal_stage") or metadata.get("intent")
+                counts[outcome] = counts.get(outcome, 0) + 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    total = sum(counts.values())
+    elapsed = time.perf_counter() - start
+    print(
+        f"✅ {total} results in {elapsed:.1f}s ({total / elapsed:.1f}/s): {counts}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Batch question answering for evaluation runs and bulk workloads.
+POST /ask/batch takes JSONL ({"question": ..., "id"?, "previous_question"?}
+per line) and streams one JSON result per line as groups finish. Questions
+are processed in groups of BATCH_ASK_SIZE: intent classification, query
+embedding, FAISS search, grounding and sufficiency each run once per group
+instead of once per question. Generation calls run concurrently on their
+own small pool, so a batch never takes the pipeline workers /ask needs.
+
+Items are independent: a continuation only has context if it carries its
+own `previous_question`, and batch runs never touch the live chat session.
+
+Each group holds a low-priority admission slot (assistant/admission.py)
+while it runs, and applies the degradation tier it was admitted at. The
+slot is released before the group's results are sent, so a slow client
+never holds one. A batch arriving while /ask is already queueing gets 429.
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+import ollama_client
+from config import (
+    DEFAULT_VAULT,
+    GENERATION_MODEL,
+    BATCH_ASK_SIZE,
+    BATCH_GROUNDING_PAIRS,
+    BATCH_GENERATION_WORKERS,
+)
+from assistant.prompts import build_answer_prompt, build_casual_prompt, generation_report
+from assistant.admission import admission
+from assistant.router import (
+    chunk_ids,
+    classify_intents,
+    rank_candidates,
+    split_into_sentences,
+    continuation_instruction,
+    grounding_scorer,
+    sufficiency_scorer,
+    cascade_thresholds,
+    get_namespace,
+    wait_for_first_sync,
+    SUFFICIENCY_THRESHOLD,
+)
+from vault.ingest import retrieve_relevant_chunks_batch
+
+router = APIRouter()
+
+NO_INFO = "I don't have that information in my vault yet."
+NOT_ENOUGH = "I don't have enough information in my vault to answer that confidently."
+MIN_GROUNDING_SCORE = 0.52
+TOP_K_SENTENCES = 6
+
+# separate from the /ask pipeline executor: a 32-question batch with slow
+# generations must not leave /ask waiting for a worker
+generation_executor = ThreadPoolExecutor(
+    max_workers=BATCH_GENERATION_WORKERS,
+    thread_name_prefix="batch-generate",
+)
+
+
+def parse_items(body: bytes) -> list[dict]:
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Body is not UTF-8: {e.reason} at byte {e.start}")
+
+    items = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Line {line_no}: {e.msg}")
+        if not isinstance(item, dict) or not str(item.get("question", "")).strip():
+            raise HTTPException(status_code=400, detail=f"Line {line_no}: missing question")
+        items.append(item)
+    return items
+
+
+class StageClock:
+    """Wall time of each batched stage, shared by every item in the group"""
+
+    def __init__(self):
+        self.ms = {}
+
+    def run(self, name: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.ms[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+# =========================
+# One group of questions
+# =========================
+def process_group(group: list[dict], snap, generate: bool, ticket=None):
+    """Yields finished results for one group, refusals first"""
+    clock = StageClock()
+    degrade = ticket.degrade if ticket is not None else {}
+    states = []
+    for item in group:
+        states.append({
+            "index": item["_index"],
+            "id": item.get("id"),
+            "question": str(item["question"]).strip(),
+            "previous_question": item.get("previous_question"),
+            "metadata": {},
+        })
+
+    def result(state, answer, outcome, generation=None):
+        metadata = state["metadata"]
+        if outcome.startswith("refusal:"):
+            metadata["refusal_stage"] = outcome.split(":", 1)[1]
+        metadata["index_version"] = snap.version
+        metadata["batch_size"] = len(group)
+        metadata["stages_ms"] = dict(clock.ms)
+        if ticket is not None:
+            metadata["admission"] = ticket.report()
+        if generation is not None:
+            metadata["generation"] = generation
+        return {
+            "index": state["index"],
+            "id": state["id"],
+            "question": state["question"],
+            "answer": answer,
+            "metadata": metadata,
+        }
+
+    # 1. Intent, one forward pass
+    intents = clock.run("intent", classify_intents, [s["question"] for s in states])
+    for state, intent in zip(states, intents):
+        state["intent"] = intent
+        state["metadata"]["intent"] = intent
+
+    pending = []      # answered without generation
+    to_generate = []  # (state, built prompt)
+
+    for state in states:
+        if state["intent"] == "continuation" and not state["previous_question"]:
+            pending.append(result(state, NO_INFO, "refusal:no_context"))
+        elif state["intent"] == "casual":
+            to_generate.append((state, build_casual_prompt(state["question"])))
+    retrieving = [
+        s for s in states
+        if s["intent"] == "factual" or (s["intent"] == "continuation" and s["previous_question"])
+    ]
+
+    # 2. Query embedding + FAISS search, one call each
+    candidates = clock.run(
+        "retrieval", retrieve_relevant_chunks_batch,
+        [s["question"] for s in retrieving], snap.store, 10,
+    )
+
+    def rank_all():
+        grounding = []
+        for state, results in zip(retrieving, candidates):
+            chunks, top_similarity = rank_candidates(
+                state["question"], state["intent"], results, snap.tokens,
+                rerank=not degrade.get("skip_rerank", False),
+            )
+            state["metadata"]["top_similarity"] = top_similarity
+            if not chunks:
+                pending.append(result(state, NO_INFO, "refusal:retrieval"))
+            elif top_similarity < cascade_thresholds["similarity_floor"]:
+                pending.append(result(state, NO_INFO, "refusal:similarity_floor"))
+            else:
+                chunks = chunks[:degrade.get("grounding_chunks", len(chunks))]
+                state["metadata"]["sources"] = snap.sources(chunk_ids(results, chunks))
+                state["sentences"] = split_into_sentences(chunks)
+                grounding.append(state)
+        return grounding
+
+    grounding = clock.run("rank", rank_all)
+
+    # 3. Grounding: every (question, sentence) pair of the group, batched
+    def ground_all():
+        pairs = [(s, sentence) for s in grounding for sentence in s["sentences"]]
+        scores = []
+        for i in range(0, len(pairs), BATCH_GROUNDING_PAIRS):
+            window = pairs[i:i + BATCH_GROUNDING_PAIRS]
+            scores.extend(grounding_scorer.score_pairs(
+                [s["question"] for s, _ in window],
+                [sentence for _, sentence in window],
+                snap.tokens,
+            ))
+
+        kept = {id(s): [] for s in grounding}
+        for (state, sentence), score in zip(pairs, scores):
+            if score >= MIN_GROUNDING_SCORE:
+                kept[id(state)].append((score, sentence))
+
+        sufficient = []
+        for state in grounding:
+            scored = sorted(kept[id(state)], key=lambda x: x[0], reverse=True)
+            state["allowed"] = [sentence for _, sentence in scored[:TOP_K_SENTENCES]]
+            state["metadata"]["sentences_scored"] = len(state["sentences"])
+            state["metadata"]["sentences_grounded"] = len(state["allowed"])
+            if state["allowed"]:
+                sufficient.append(state)
+            else:
+                pending.append(result(state, NO_INFO, "refusal:grounding"))
+        return sufficient
+
+    grounded = clock.run("grounding", ground_all)
+
+    # 4. Sufficiency, one forward pass
+    suff_scores = clock.run(
+        "sufficiency", sufficiency_scorer.score_batch,
+        [(s["question"], s["allowed"], s["intent"]) for s in grounded],
+        snap.tokens,
+    )
+    for state, suff_score in zip(grounded, suff_scores):
+        state["metadata"]["sufficiency_score"] = suff_score
+        if suff_score < SUFFICIENCY_THRESHOLD:
+            pending.append(result(state, NOT_ENOUGH, "refusal:sufficiency"))
+        else:
+            instruction = ""
+            if state["intent"] == "continuation":
+                instruction = continuation_instruction(state["previous_question"])
+            to_generate.append((state, build_answer_prompt(state["question"], state["allowed"], instruction)))
+
+    yield from pending
+
+    # 5. Generation, concurrently; results stream back as they complete
+    if not generate:
+        for state, _ in to_generate:
+            outcome = "casual" if state["intent"] == "casual" else "answer"
+            yield result(state, None, outcome)
+        return
+
+    def generate_one(state, built):
+        casual = state["intent"] == "casual"
+        options = (
+            {"temperature": 0.7, "num_predict": min(80, degrade.get("num_predict", 80))} if casual
+            else {"temperature": 0.0, "top_p": 0.1, "num_predict": min(150, degrade.get("num_predict", 150))}
+        )
+        start = time.perf_counter()
+        res = ollama_client.generate(model=GENERATION_MODEL, prompt=built["prompt"], options=options)
+        report = generation_report(built, ollama_client.response_stats(res, time.perf_counter() - start))
+        return result(state, res["response"].strip(), "casual" if casual else "answer", report)
+
+    futures = {
+        generation_executor.submit(generate_one, state, built): state
+        for state, built in to_generate
+    }
+    for future in as_completed(futures):
+        try:
+            yield future.result()
+        except Exception as e:
+            state = futures[future]
+            yield {"index": state["index"], "id": state["id"], "error": str(e)}
+
+
+def run_batch(items: list[dict], ns, generate: bool = True):
+    """Yields one result dict per item, group by group; `ns` must have a snapshot"""
+    # every group reads the same snapshot, even if a sync lands mid-run
+    snap = ns.snapshot
+
+    for i, item in enumerate(items):
+        item["_index"] = i
+
+    for start in range(0, len(items), BATCH_ASK_SIZE):
+        group = items[start:start + BATCH_ASK_SIZE]
+        ticket = admission.admit_batch()  # waits behind interactive /ask
+        try:
+            results = list(process_group(group, snap, generate, ticket))
+        except Exception as e:
+            print("BATCH ERROR:", e)
+            results = [{"index": item["_index"], "id": item.get("id"), "error": str(e)} for item in group]
+        finally:
+            ticket.release()
+        # sent after the slot is free: a slow reader doesn't hold admission
+        yield from results
+
+
+# =========================
+# Endpoint
+# =========================
+@router.post("/ask/batch")
+async def ask_batch(request: Request, vault: str = DEFAULT_VAULT, generate: bool = True):
+    """JSONL in, JSONL out (one line per item, in completion order; use `index` to re-order)"""
+    items = parse_items(await request.body())
+    # first use loads the index from disk; keep that off the event loop
+    ns = await run_in_threadpool(get_namespace, vault)
+
+    retry_after = admission.batch_retry_after()
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail={"error": "overloaded", "reason": "interactive_load", "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    if ns.snapshot is None:
+        ns, _ = await run_in_threadpool(wait_for_first_sync, ns)
+
+    def lines():
+        for res in run_batch(items, ns, generate):
+            yield json.dumps(res) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,138 @@
+"""
+Sweep CPU thread settings per /ask stage.
+For every (concurrent workers, threads per op) pair that fits the core
+budget, runs each stage from `workers` threads at once and measures
+throughput and p95 latency, then prints the best pair per stage. Use the
+results to set PIPELINE_WORKERS / TORCH_INTRA_OP_THREADS / FAISS_OMP_THREADS.
+
+Run from backend/:
+    python -m assistant.bench_runtime --calls 64
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import faiss
+import numpy as np
+
+import runtime
+from assistant.router import (
+    classify_intent,
+    reference_ranker,
+    grounding_scorer,
+    sufficiency_scorer,
+)
+
+QUESTION = "Why does the cache need to be invalidated when the data changes?"
+SENTENCES = [
+    f"Cache entry {i} is invalidated whenever the underlying record is updated by a write."
+    for i in range(16)
+]
+CHUNK = " ".join(SENTENCES[:6])
+FAISS_DIM = 1024
+FAISS_VECTORS = 20000
+
+
+def build_faiss_index():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((FAISS_VECTORS, FAISS_DIM)).astype("float32")
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexFlatL2(FAISS_DIM)
+    index.add(vectors)
+    query = vectors[:1].copy()
+    return lambda: index.search(query, 30)
+
+
+def stages() -> dict:
+    """name -> (zero-arg callable, which thread setting it depends on)"""
+    # model stages include their tokenization
+    return {
+        "intent": (lambda: classify_intent(QUESTION), "torch"),
+        "reference": (lambda: reference_ranker.score(QUESTION, CHUNK), "torch"),
+        "grounding": (lambda: grounding_scorer.score_batch(QUESTION, SENTENCES), "torch"),
+        "sufficiency": (lambda: sufficiency_scorer.score(QUESTION, SENTENCES[:6], "factual", use_cache=False), "torch"),
+        "faiss": (build_faiss_index(), "faiss"),
+    }
+
+
+def candidate_configs(cores: int) -> list[tuple[int, int]]:
+    """(workers, threads per op) pairs with workers * threads <= cores"""
+    sizes = [n for n in (1, 2, 4, 8, 16, 32, 64) if n <= cores]
+    return [(w, t) for w in sizes for t in sizes if w * t <= cores]
+
+
+def measure(fn, workers: int, calls: int) -> dict:
+    """
+    Throughput and p95 latency of `calls` calls from `workers` threads.
+    Failed calls are counted, not timed; raises if every call failed.
+    """
+    latencies = []
+
+    def timed():
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    fn()  # warm-up outside the clock
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(timed) for _ in range(calls)]
+    wall = time.perf_counter() - start
+
+    errors = [f.exception() for f in futures if f.exception() is not None]
+    if not latencies:
+        raise RuntimeError(f"all {calls} calls failed") from errors[0]
+
+    latencies.sort()
+    return {
+        "throughput": round(len(latencies) / wall, 2),
+        "p95_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000, 2),
+        "failed": len(errors),
+        "error": repr(errors[0]) if errors else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage CPU thread sweep")
+    parser.add_argument("--cores", type=int, default=None, help="defaults to the cores available")
+    parser.add_argument("--calls", type=int, default=64, help="calls per stage per config")
+    parser.add_argument("--stages", nargs="+", default=None)
+    args = parser.parse_args()
+
+    cores = args.cores or runtime.available_cores()
+    all_stages = stages()
+    names = args.stages or list(all_stages)
+    configs = candidate_configs(cores)
+
+    print(f"{'stage':>12} {'workers':>8} {'threads':>8} {'calls/s':>9} {'p95 ms':>9}")
+    best = {}
+    for name in names:
+        fn, setting = all_stages[name]
+        for workers, threads in configs:
+            if setting == "faiss":
+                runtime.set_faiss_threads(threads)
+            else:
+                runtime.set_torch_threads(threads)
+
+            result = measure(fn, workers, args.calls)
+            print(f"{name:>12} {workers:>8} {threads:>8} {result['throughput']:>9} {result['p95_ms']:>9}")
+            if result["failed"]:
+                print(f"{'':>12} ⚠️ {result['failed']}/{args.calls} calls failed: {result['error']}")
+            if name not in best or result["throughput"] > best[name]["throughput"]:
+                best[name] = {"workers": workers, "threads": threads, **result}
+
+    # leave the process as runtime.py configured it
+    runtime.set_torch_threads(runtime.settings["torch_intra_op_threads"])
+    runtime.set_faiss_threads(runtime.settings["faiss_omp_threads"])
+
+    print(f"\n🏁 Best per stage ({cores} cores):")
+    for name, b in best.items():
+        print(
+            f"  {name:>12}: {b['workers']} workers x {b['threads']} threads "
+            f"-> {b['throughput']} calls/s, p95 {b['p95_ms']} ms"
+        )
+    print(f"  current: {runtime.settings}")
+
+
+if __name__ == "__main__":
+    main()
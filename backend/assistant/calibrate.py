@@ -0,0 +1,152 @@
+"""
+Calibrate the /ask early-exit cascade against a labeled question set.
+
+Input is JSONL, one {"question": str, "answerable": bool} per line.
+- similarity_floor: highest floor that still keeps `--recall` of the
+  answerable questions (anything below it is refused before grounding)
+- grounding_margin: smallest margin whose early-exit grounding picks the
+  same sentences as exhaustive grounding for `--agreement` of questions
+
+Run from backend/:
+    python -m assistant.calibrate questions.jsonl --vault default --write
+"""
+import argparse
+import json
+
+from config import CASCADE_THRESHOLDS_PATH, GROUNDING_BATCH_SIZE
+from assistant.router import (
+    retrieve_for_question,
+    split_into_sentences,
+    grounding_scorer,
+)
+from vault.namespaces import vault_registry
+
+MIN_SCORE = 0.52
+TOP_K = 6
+MARGIN_GRID = [0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.35, 0.40, 0.45]
+
+
+def load_questions(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def early_exit_selection(scores: list[float], sentences: list[str], margin: float):
+    """Replays score_grounding's early exit over precomputed scores"""
+    kept = []
+    confident = 0
+    scored = 0
+    for i in range(0, len(sentences), GROUNDING_BATCH_SIZE):
+        batch = range(i, min(i + GROUNDING_BATCH_SIZE, len(sentences)))
+        scored += len(batch)
+        for j in batch:
+            if scores[j] >= MIN_SCORE:
+                kept.append((scores[j], sentences[j]))
+            if margin is not None and scores[j] >= MIN_SCORE + margin:
+                confident += 1
+        if margin is not None and confident >= TOP_K:
+            break
+
+    kept.sort(key=lambda x: x[0], reverse=True)
+    return {s for _, s in kept[:TOP_K]}, scored
+
+
+def profile(snap, question: str) -> dict:
+    chunks, top_similarity = retrieve_for_question(question, "factual", snap)
+    sentences = split_into_sentences(chunks)
+
+    scores = []
+    for i in range(0, len(sentences), GROUNDING_BATCH_SIZE):
+        scores.extend(
+            grounding_scorer.score_batch(question, sentences[i:i + GROUNDING_BATCH_SIZE])
+        )
+
+    return {"top_similarity": top_similarity, "sentences": sentences, "scores": scores}
+
+
+def pick_floor(profiles: list[dict], recall: float) -> float:
+    sims = sorted(p["top_similarity"] for p in profiles if p["answerable"])
+    if not sims:
+        return 0.0
+    # dropping the lowest (1 - recall) share of answerable questions is allowed
+    allowed_misses = int(len(sims) * (1 - recall))
+    return round(max(sims[allowed_misses] - 1e-3, 0.0), 4)
+
+
+def pick_margin(profiles: list[dict], agreement: float):
+    answerable = [p for p in profiles if p["answerable"] and p["sentences"]]
+    report = []
+    chosen = None
+
+    for margin in MARGIN_GRID:
+        agree = 0
+        scored = 0
+        total = 0
+        for p in answerable:
+            full, n_full = early_exit_selection(p["scores"], p["sentences"], None)
+            early, n_early = early_exit_selection(p["scores"], p["sentences"], margin)
+            agree += int(full == early)
+            scored += n_early
+            total += n_full
+
+        rate = agree / len(answerable) if answerable else 1.0
+        saved = 1 - scored / total if total else 0.0
+        report.append({
+            "margin": margin,
+            "agreement": round(rate, 4),
+            "sentences_saved": round(saved, 4),
+        })
+        if chosen is None and rate >= agreement:
+            chosen = margin
+
+    return (chosen if chosen is not None else MARGIN_GRID[-1]), report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("questions")
+    parser.add_argument("--vault", default="default")
+    parser.add_argument("--recall", type=float, default=0.99)
+    parser.add_argument("--agreement", type=float, default=0.95)
+    parser.add_argument("--write", action="store_true", help=f"write {CASCADE_THRESHOLDS_PATH.name}")
+    args = parser.parse_args()
+
+    ns = vault_registry.get(args.vault)
+    if ns.snapshot is None:
+        ns.sync()
+    snap = ns.snapshot
+
+    profiles = []
+    for item in load_questions(args.questions):
+        p = profile(snap, item["question"])
+        p["answerable"] = bool(item["answerable"])
+        profiles.append(p)
+
+    floor = pick_floor(profiles, args.recall)
+    margin, margin_report = pick_margin(profiles, args.agreement)
+
+    unanswerable = [p for p in profiles if not p["answerable"]]
+    answerable = [p for p in profiles if p["answerable"]]
+    result = {
+        "similarity_floor": floor,
+        "grounding_margin": margin,
+        "questions": len(profiles),
+        "early_refusal_rate": round(
+            sum(p["top_similarity"] < floor for p in unanswerable) / len(unanswerable), 4
+        ) if unanswerable else None,
+        "answerable_lost": round(
+            sum(p["top_similarity"] < floor for p in answerable) / len(answerable), 4
+        ) if answerable else None,
+        "margin_sweep": margin_report,
+    }
+
+    print(json.dumps(result, indent=2))
+
+    if args.write:
+        with open(CASCADE_THRESHOLDS_PATH, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"✅ Wrote {CASCADE_THRESHOLDS_PATH} (restart the server to apply)")
+
+
+if __name__ == "__main__":
+    main()
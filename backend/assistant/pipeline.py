@@ -0,0 +1,65 @@
+"""
+Pipeline execution for /ask.
+Independent stages (vault change check, query embedding + retrieval) are
+started on a shared executor while intent classification runs, and their
+results are dropped if the intent turns out not to need them. Every stage
+is timed so the response can show the critical path vs. serial cost.
+A profiled request sets `profile`, and every stage then runs through it.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from runtime import settings as runtime_settings
+
+inference_executor = ThreadPoolExecutor(
+    max_workers=runtime_settings["pipeline_workers"],
+    thread_name_prefix="pipeline",
+)
+
+
+class PipelineTrace:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages = {}
+        self.speculation = {}
+        self.profile = None  # ProfileSession, only for profiled requests
+        self._lock = threading.Lock()
+
+    def run(self, name: str, fn, *args, **kwargs):
+        """Run `fn` in the calling thread, timed as stage `name`"""
+        start = time.perf_counter()
+        try:
+            if self.profile is not None:
+                return self.profile.stage(name, fn, *args, **kwargs)
+            return fn(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.stages[name] = (start - self.t0, end - self.t0)
+
+    def submit(self, name: str, fn, *args, **kwargs):
+        """Start stage `name` on the executor; returns a Future"""
+        return inference_executor.submit(self.run, name, fn, *args, **kwargs)
+
+    def discard(self, name: str, future):
+        """Speculative work that turned out to be unnecessary"""
+        future.cancel()
+        self.speculation[name] = "discarded"
+
+    def report(self) -> dict:
+        with self._lock:
+            stages = dict(self.stages)
+
+        serial = sum(end - start for start, end in stages.values())
+        critical = max((end for _, end in stages.values()), default=0.0)
+        return {
+            "stages": {
+                name: {"start_ms": round(start * 1000, 1), "ms": round((end - start) * 1000, 1)}
+                for name, (start, end) in sorted(stages.items(), key=lambda x: x[1][0])
+            },
+            "critical_path_ms": round(critical * 1000, 1),
+            "serial_ms": round(serial * 1000, 1),
+            "overlap_saved_ms": round(max(serial - critical, 0.0) * 1000, 1),
+            "speculation": dict(self.speculation),
+        }
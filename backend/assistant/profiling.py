@@ -0,0 +1,248 @@
+"""
+On-demand profiling for a single /ask request.
+Sending `X-Profile: 1` (with PROFILING_ENABLED on) wraps that request in a
+ProfileSession: a sampling CPU profiler over every thread, plus a
+torch.profiler capture around each model stage. Results are written to
+PROFILE_DIR as a folded-stack flamegraph and a Chrome trace.
+When no session is active nothing here runs; PipelineTrace only checks
+whether its `profile` attribute is set.
+"""
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+
+from config import PROFILE_DIR, PROFILE_SAMPLE_INTERVAL, PROFILE_KEEP
+
+# Stages whose work is torch forward passes
+TORCH_STAGES = {"intent", "rank", "grounding", "sufficiency", "sufficiency_speculative"}
+
+# One profiled request at a time: torch.profiler is process-global and
+# the sampler sees every thread, so overlapping sessions would mix
+_session_lock = threading.Lock()
+# Stages of one request can overlap (speculative sufficiency during
+# grounding); only one of them can hold the torch profiler
+_torch_lock = threading.Lock()
+
+ARTIFACTS = {
+    "flamegraph": ".folded",
+    "trace": ".trace.json",
+}
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+# =========================
+# Sampling CPU profiler
+# =========================
+class StackSampler:
+    """Samples every thread's Python stack at a fixed interval"""
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                self.stacks[self._fold(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _fold(thread_name: str, frame) -> str:
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        frames.append(thread_name)
+        return ";".join(reversed(frames))
+
+    def folded(self) -> str:
+        """Brendan Gregg's collapsed format (flamegraph.pl, speedscope)"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+
+# =========================
+# Session
+# =========================
+class ProfileSession:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.sampler = StackSampler()
+        self.events = []      # Chrome trace events
+        self.torch_stages = []
+        self.skipped = []     # torch stages that overlapped another capture
+        self.finished = False  # set by finish(); later stages run unrecorded
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def start(self):
+        if not _session_lock.acquire(blocking=False):
+            raise ProfilerBusy("another request is being profiled")
+        try:
+            self.started = time.time()
+            self.sampler.start()
+        except BaseException:
+            _session_lock.release()
+            raise
+        return self
+
+    def stage(self, name: str, fn, *args, **kwargs):
+        """Run one pipeline stage, recording a span (and torch ops for model stages)"""
+        if self.finished:
+            # e.g. speculative sufficiency still running after the response
+            return fn(*args, **kwargs)
+
+        start_us = time.time() * 1e6
+        try:
+            if name in TORCH_STAGES:
+                return self._torch_stage(name, fn, *args, **kwargs)
+            return fn(*args, **kwargs)
+        finally:
+            self._add_events([{
+                "name": name,
+                "cat": "stage",
+                "ph": "X",
+                "ts": start_us,
+                "dur": time.time() * 1e6 - start_us,
+                "pid": self._pid,
+                "tid": threading.current_thread().name,
+            }])
+
+    def _torch_stage(self, name: str, fn, *args, **kwargs):
+        if not _torch_lock.acquire(blocking=False):
+            with self._lock:
+                self.skipped.append(name)
+            return fn(*args, **kwargs)
+
+        try:
+            try:
+                import torch
+                from torch.profiler import profile, record_function, ProfilerActivity
+
+                activities = [ProfilerActivity.CPU]
+                if torch.cuda.is_available():
+                    activities.append(ProfilerActivity.CUDA)
+                prof = profile(activities=activities, record_shapes=True)
+                prof.start()
+            except Exception as e:
+                # profiler unavailable: run the stage unrecorded rather than fail the request
+                with self._lock:
+                    self.skipped.append(name)
+                print(f"⚠️ TORCH PROFILER SETUP FAILED ({name}): {e}")
+                return fn(*args, **kwargs)
+
+            try:
+                with record_function(f"stage:{name}"):
+                    result = fn(*args, **kwargs)
+            finally:
+                prof.stop()
+
+            # export_chrome_trace only writes to a path
+            fd, path = tempfile.mkstemp(suffix=".json")
+            os.close(fd)
+            try:
+                prof.export_chrome_trace(path)
+                with open(path, "r", encoding="utf-8") as f:
+                    events = json.load(f).get("traceEvents", [])
+            finally:
+                os.unlink(path)
+
+            with self._lock:
+                if not self.finished:
+                    self.events.extend(events)
+                    self.torch_stages.append(name)
+            return result
+        finally:
+            _torch_lock.release()
+
+    def _add_events(self, events: list):
+        with self._lock:
+            if not self.finished:
+                self.events.extend(events)
+
+    def finish(self) -> dict:
+        """
+        Stop sampling, write both artifacts and release the profiler.
+        Events from stages that end after this are dropped.
+        """
+        with self._lock:
+            if self.finished:
+                raise RuntimeError(f"profile {self.id} already finished")
+            self.finished = True
+            events = list(self.events)
+
+        try:
+            self.sampler.stop()
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+
+            with open(artifact_path(self.id, "flamegraph"), "w", encoding="utf-8") as f:
+                f.write(self.sampler.folded())
+            with open(artifact_path(self.id, "trace"), "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+            _prune()
+        finally:
+            _session_lock.release()
+
+        return {
+            "id": self.id,
+            "duration_ms": round((time.time() - self.started) * 1000, 1),
+            "cpu_samples": self.sampler.samples,
+            "torch_stages": list(self.torch_stages),
+            "torch_stages_skipped": list(self.skipped),
+            "flamegraph": f"/profiles/{self.id}/flamegraph",
+            "trace": f"/profiles/{self.id}/trace",
+        }
+
+
+# =========================
+# Stored profiles
+# =========================
+def artifact_path(profile_id: str, kind: str):
+    return PROFILE_DIR / f"{profile_id}{ARTIFACTS[kind]}"
+
+
+def list_profiles() -> list[dict]:
+    if not PROFILE_DIR.exists():
+        return []
+    traces = sorted(
+        PROFILE_DIR.glob("*" + ARTIFACTS["trace"]),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    return [
+        {
+            "id": p.name[:-len(ARTIFACTS["trace"])],
+            "created": p.stat().st_mtime,
+        }
+        for p in traces
+    ]
+
+
+def _prune():
+    """Keep only the newest PROFILE_KEEP profiles"""
+    for old in list_profiles()[PROFILE_KEEP:]:
+        for kind in ARTIFACTS:
+            artifact_path(old["id"], kind).unlink(missing_ok=True)
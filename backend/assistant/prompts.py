@@ -0,0 +1,102 @@
+"""
+Prompt assembly for generation.
+Static instructions always come first and are byte-identical across calls,
+so Ollama can reuse the KV cache for that prefix and only prefill the
+per-request tail. Grounded sentences are fitted into PROMPT_TOKEN_BUDGET.
+"""
+from config import PROMPT_TOKEN_BUDGET, CHARS_PER_TOKEN
+
+# =========================
+# Static prefixes (never interpolate into these)
+# =========================
+ANSWER_PREFIX = """You are answering a question using ONLY the provided sentences.
+
+RULES:
+- Use ONLY the allowed sentences below
+- You MAY rephrase and COMBINE them
+- If the question asks "why", "why is that an issue", or "what happens if":
+  → EXPLAIN CONSEQUENCES or IMPACTS implied by the sentences
+  → Do NOT simply restate the sentences
+- Do NOT add external facts
+- Keep the answer concise and explanatory
+
+"""
+
+CASUAL_PREFIX = """You are a friendly conversational assistant.
+Keep it casual and short.
+
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count; the generation model's tokenizer isn't available locally"""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+# =========================
+# Builders
+# =========================
+def fit_sentences(sentences: list[str], budget: int = PROMPT_TOKEN_BUDGET):
+    """Keep sentences in order (best first) until the token budget runs out"""
+    kept = []
+    used = 0
+    for sentence in sentences:
+        cost = estimate_tokens(f"- {sentence}\n")
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+    return kept, used
+
+
+def build_answer_prompt(question: str, sentences: list[str], context_instruction: str = "") -> dict:
+    kept, sentence_tokens = fit_sentences(sentences)
+    allowed_text = "\n".join(f"- {s}" for s in kept)
+
+    tail = f"""{context_instruction}
+
+ALLOWED SENTENCES:
+{allowed_text}
+
+QUESTION:
+{question}
+
+ANSWER:"""
+
+    return {
+        "prompt": ANSWER_PREFIX + tail,
+        "sentences": kept,
+        "sentences_dropped": len(sentences) - len(kept),
+        "prefix_tokens_est": estimate_tokens(ANSWER_PREFIX),
+        "prompt_tokens_est": estimate_tokens(ANSWER_PREFIX + tail),
+        "sentence_tokens_est": sentence_tokens,
+    }
+
+
+def build_casual_prompt(question: str) -> dict:
+    tail = f"""User:
+{question}
+
+Response:
+"""
+    return {
+        "prompt": CASUAL_PREFIX + tail,
+        "prefix_tokens_est": estimate_tokens(CASUAL_PREFIX),
+        "prompt_tokens_est": estimate_tokens(CASUAL_PREFIX + tail),
+    }
+
+
+def generation_report(built: dict, stats: dict) -> dict:
+    """
+    Prompt vs. eval tokens for one call. Ollama's prompt_eval_count covers
+    only the part it had to prefill; the cached share isn't reported, and
+    prompt_tokens_est is a character estimate, so the two aren't subtracted.
+    """
+    return {
+        "prompt_tokens_est": built["prompt_tokens_est"],
+        "prompt_tokens_evaluated": stats.get("prompt_eval_count", 0),
+        "eval_tokens": stats.get("eval_count", 0),
+        "prompt_eval_ms": stats.get("prompt_eval_ms", 0.0),
+        "eval_ms": stats.get("eval_ms", 0.0),
+        "load_ms": stats.get("load_ms", 0.0),
+    }
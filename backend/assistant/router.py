@@ -1,28 +1,46 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from typing import Optional
-import ollama
+import ollama_client
 import re
 import time
 import os
+import json
+import runtime  # thread settings, before any model loads
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
 import torch
 from models.reference_models.reference_ranker.loader import ReferenceRanker
 
-from vault.ingest import scan_vault, retrieve_relevant_chunks
-from config import VAULT_PATH
+from vault.ingest import retrieve_relevant_chunks
+from vault.scanner import split_sentences
+from vault.namespaces import vault_registry, VaultNamespace, UnknownVaultError
+from vault.sync_jobs import sync_jobs
+from vault.snapshot import IndexSnapshot, live_snapshots
+from config import (
+    DEFAULT_VAULT,
+    GENERATION_MODEL,
+    CASCADE_THRESHOLDS_PATH,
+    CASCADE_SIMILARITY_FLOOR,
+    GROUNDING_MARGIN,
+    GROUNDING_BATCH_SIZE,
+    SUFFICIENCY_CACHE_SIZE,
+    SUFFICIENCY_MAX_WINDOWS,
+    MEMORY_EXTRACTION_ENABLED,
+    PROFILING_ENABLED,
+)
 from context_manager import context_manager
+import metrics
+from assistant.prompts import build_answer_prompt, build_casual_prompt, generation_report
+from assistant.pipeline import PipelineTrace
+from assistant import profiling
+from assistant.admission import admission, Overloaded
+from memory import worker as memory_worker
 
 from models.grounding_models.loader import GroundingScorer
 
 from models.sufficiency_models.scorer import SufficiencyScorer
 
-# =========================
-# Global vault state
-# =========================
-current_vault_data = None
-last_vault_mtime = None
-
 router = APIRouter()
 
 # =========================
@@ -68,16 +86,44 @@ grounding_scorer = GroundingScorer(
 # =========================
 sufficiency_scorer = SufficiencyScorer(
     model_path="models/sufficiency_models",
-    base_model="sentence-transformers/all-MiniLM-L6-v2"
+    base_model="sentence-transformers/all-MiniLM-L6-v2",
+    cache_size=SUFFICIENCY_CACHE_SIZE,
+    max_windows=SUFFICIENCY_MAX_WINDOWS,
 )
 
 SUFFICIENCY_THRESHOLD = 0.95
 
+# =========================
+# Cascade thresholds
+# =========================
+def load_cascade_thresholds() -> dict:
+    """Config defaults, overridden by assistant/calibrate.py output if present"""
+    thresholds = {
+        "similarity_floor": CASCADE_SIMILARITY_FLOOR,
+        "grounding_margin": GROUNDING_MARGIN,
+    }
+    if CASCADE_THRESHOLDS_PATH.exists():
+        with open(CASCADE_THRESHOLDS_PATH, "r", encoding="utf-8") as f:
+            calibrated = json.load(f)
+        for key in thresholds:
+            if key in calibrated:
+                thresholds[key] = calibrated[key]
+    return thresholds
+
+
+cascade_thresholds = load_cascade_thresholds()
+
 # =========================
 # Models
 # =========================
 class AskRequest(BaseModel):
     question: str
+    vault: str = DEFAULT_VAULT
+    session: str = "default"
+
+
+class SyncRequest(BaseModel):
+    vault: str = DEFAULT_VAULT
 
 
 # =========================
@@ -93,13 +139,19 @@ def normalize_chunks(results) -> list[str]:
     return chunks
 
 
-def rerank_chunks(question: str, chunks: list[str], top_k: int = 5) -> list[str]:
+def chunk_ids(results, chunks: list[str]) -> list[int]:
+    """Index IDs of `chunks`, looked up in the retrieval results they came from"""
+    ids = {r["chunk"]: r["id"] for r in results if isinstance(r, dict) and "id" in r}
+    return [ids[c] for c in chunks if c in ids]
+
+
+def rerank_chunks(question: str, chunks: list[str], top_k: int = 5, tokens=None) -> list[str]:
     if not chunks:
         return []
 
     scored = []
     for chunk in chunks:
-        score = reference_ranker.score(question, chunk)
+        score = reference_ranker.score(question, chunk, tokens)
         scored.append((score, chunk))
 
     scored.sort(key=lambda x: x[0], reverse=True)
@@ -109,8 +161,7 @@ def rerank_chunks(question: str, chunks: list[str], top_k: int = 5) -> list[str]
 def split_into_sentences(chunks: list[str]) -> list[str]:
     sentences = []
     for chunk in chunks:
-        parts = re.split(r'(?<=[.!?])\s+', chunk)
-        sentences.extend([p.strip() for p in parts if len(p.strip()) >= 10])
+        sentences.extend(split_sentences(chunk))
     return sentences
 
 
@@ -118,8 +169,13 @@ def split_into_sentences(chunks: list[str]) -> list[str]:
 # Intent Classification
 # =========================
 def classify_intent(question: str) -> str:
+    return classify_intents([question])[0]
+
+
+def classify_intents(questions: list[str]) -> list[str]:
+    """One padded forward pass for many questions"""
     inputs = intent_tokenizer(
-        question,
+        questions,
         return_tensors="pt",
         truncation=True,
         padding=True,
@@ -130,142 +186,321 @@ def classify_intent(question: str) -> str:
 
     with torch.inference_mode():
         logits = intent_model(**inputs).logits
-        pred_id = torch.argmax(logits, dim=-1).item()
+        pred_ids = torch.argmax(logits, dim=-1).tolist()
 
-    return INTENT_LABEL_MAP.get(f"LABEL_{pred_id}", "factual")
+    return [INTENT_LABEL_MAP.get(f"LABEL_{pred_id}", "factual") for pred_id in pred_ids]
 
 
 # =========================
 # ML BASED RETRIEVAL
 # =========================
-def retrieve_for_question(question: str, intent: str, vault_data: dict) -> list[str]:
-    results = retrieve_relevant_chunks(question, vault_data, limit=10)
+def retrieve_candidates(question: str, snap: IndexSnapshot) -> list[dict]:
+    """Intent-independent part of retrieval, safe to run speculatively"""
+    return retrieve_relevant_chunks(question, snap.store, limit=10)
+
+
+def rank_candidates(question: str, intent: str, results: list[dict], tokens=None, rerank: bool = True):
+    """
+    Returns (chunks, top semantic similarity) for the cascade's first gate.
+    Below the similarity floor the caller refuses anyway, so the
+    continuation rerank is skipped.
+    """
     chunks = normalize_chunks(results)
+    top_similarity = max((r.get("semantic", 0.0) for r in results), default=0.0)
+    if top_similarity < cascade_thresholds["similarity_floor"]:
+        return chunks[:5], top_similarity
+
+    # 🔹 ONLY for continuation (skipped when shedding load)
+    if intent == "continuation" and rerank:
+        chunks = rerank_chunks(question, chunks, top_k=5, tokens=tokens)
 
-    # 🔹 ONLY for continuation
-    if intent == "continuation":
-        chunks = rerank_chunks(question, chunks, top_k=5)
+    return chunks[:5], top_similarity
 
-    return chunks[:5]
+
+def retrieve_for_question(question: str, intent: str, snap: IndexSnapshot):
+    return rank_candidates(question, intent, retrieve_candidates(question, snap), snap.tokens)
 
 
 # =========================
 # ML-BASED GROUNDING
 # =========================
+def score_grounding(
+    question: str,
+    chunks: list[str],
+    top_k: int = 6,
+    min_score: float = 0.52,
+    margin: float = None,
+    batch_size: int = GROUNDING_BATCH_SIZE,
+    on_batch=None,
+    tokens=None,
+):
+    """
+    Score sentences in retrieval order, one batch at a time. With `margin`
+    set, stop as soon as top_k sentences clear min_score + margin.
+    `on_batch(top_sentences)` is called after every batch except the last,
+    with the current best top_k, so callers can start work on it early.
+    `tokens` is the vault's TokenStore, so sentences aren't re-tokenized.
+    Returns ([(score, sentence)] above min_score, best first; sentences scored).
+    """
+    sentences = split_into_sentences(chunks)
+
+    scored = []
+    confident = 0
+    sentences_scored = 0
+    for i in range(0, len(sentences), batch_size):
+        batch = sentences[i:i + batch_size]
+        scores = grounding_scorer.score_batch(question, batch, tokens)
+        sentences_scored += len(batch)
+
+        for score, sentence in zip(scores, batch):
+            if score >= min_score:  # 🚫 filter weak sentences
+                scored.append((score, sentence))
+            if margin is not None and score >= min_score + margin:
+                confident += 1
+
+        if margin is not None and confident >= top_k:
+            break
+
+        if on_batch is not None and i + batch_size < len(sentences):
+            scored.sort(key=lambda x: x[0], reverse=True)
+            on_batch([sentence for _, sentence in scored[:top_k]])
+
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return scored, sentences_scored
+
+
 def ml_ground_sentences(
     question: str,
     chunks: list[str],
     top_k: int = 6,
-    min_score: float = 0.52  # 🔥 threshold
+    min_score: float = 0.52,  # 🔥 threshold
+    margin: float = None,
 ) -> list[str]:
     if not chunks:
         return []
 
-    sentences = split_into_sentences(chunks)
-    if not sentences:
-        return []
+    scored, _ = score_grounding(question, chunks, top_k, min_score, margin)
+    return [sentence for _, sentence in scored[:top_k]]
 
-    scored = []
-    for sentence in sentences:
-        score = grounding_scorer.score(question, sentence)
-        if score >= min_score:  # 🚫 filter weak sentences
-            scored.append((score, sentence))
 
-    if not scored:
-        return []
+def continuation_instruction(previous_q: str) -> str:
+    """Extra prompt guidance for a follow-up, based on the question it follows"""
+    if not previous_q:
+        return ""
+    prev_lower = previous_q.lower()
+    if prev_lower.startswith(("why", "what happens", "why is")):
+        return (
+            "CONTEXT: This is a WHY follow-up.\n"
+            "Explain CONSEQUENCES, IMPACTS, or RISKS.\n"
+            "Do NOT restate the original fact.\n"
+        )
+    if prev_lower.startswith("how"):
+        return (
+            "CONTEXT: This is a HOW follow-up.\n"
+            "Explain the MECHANISM or PROCESS.\n"
+        )
+    return ""
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [sentence for _, sentence in scored[:top_k]]
 
+# =========================
+# Vault namespaces
+# =========================
+def get_namespace(name: str) -> VaultNamespace:
+    try:
+        return vault_registry.get(name)
+    except UnknownVaultError:
+        raise HTTPException(status_code=404, detail=f"Unknown vault: {name}")
+
+
+def wait_for_first_sync(ns: VaultNamespace):
+    """
+    Sync a vault that has nothing to serve yet and wait for it. Returns
+    (namespace, job); the namespace is fetched again, since the registry
+    may have reloaded the vault while the job ran. 503 if the sync left
+    no index to serve.
+    """
+    job = sync_jobs.submit(ns)
+    job.wait()
+    ns = get_namespace(ns.name)
+    if ns.snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "vault_unavailable", "vault": ns.name, "sync_status": job.status, "sync_error": job.error},
+        )
+    return ns, job
 
 
 # =========================
-# Vault change detection
+# Sync Vault (API Endpoints)
 # =========================
-def get_latest_vault_mtime():
-    if not VAULT_PATH.exists():
-        return None
-    return max(
-        (p.stat().st_mtime for p in VAULT_PATH.rglob("*") if p.is_file()),
-        default=None,
-    )
+@router.post("/sync", status_code=202)
+def sync_vault(req: SyncRequest = SyncRequest()):
+    """Start (or join) a background sync; poll GET /sync/{job_id} for progress"""
+    job = sync_jobs.submit(get_namespace(req.vault))
+    return job.progress()
+
+
+@router.get("/sync/{job_id}")
+def sync_status(job_id: str):
+    job = sync_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown sync job: {job_id}")
+    return job.progress()
 
 
-def vault_has_changed():
-    """Check if vault has changed since last sync"""
-    global last_vault_mtime
-    latest = get_latest_vault_mtime()
-    
-    if last_vault_mtime is None:
-        return True
-    
-    if latest is None:
-        return False
-    
-    return latest > last_vault_mtime
+@router.post("/sync/{job_id}/cancel")
+def sync_cancel(job_id: str):
+    job = sync_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown sync job: {job_id}")
+    return job.progress()
 
 
 # =========================
-# Sync Vault (Internal)
+# Ollama stats
 # =========================
-def _internal_sync():
-    """Internal sync function that returns sync info"""
-    global current_vault_data, last_vault_mtime
+@router.get("/ollama/stats")
+def ollama_stats():
+    """Load vs. eval timings of recent Ollama calls, per model"""
+    return ollama_client.stats_summary()
 
-    print("🔄 SYNCING VAULT...")  # Terminal feedback
-    
-    current_vault_data = scan_vault()
-    last_vault_mtime = get_latest_vault_mtime()
-    indexed_at = time.time()
 
-    sync_info = {
-        "vault_path": str(current_vault_data["vault_path"]),
-        "file_count": current_vault_data["file_count"],
-        "empty_files": current_vault_data["empty_files"],
-        "indexed_files": current_vault_data["indexed_files"],
-        "last_indexed": indexed_at
+# =========================
+# Metrics
+# =========================
+@router.get("/metrics")
+def get_metrics():
+    """Latency per outcome; refusals are broken out by the stage that refused"""
+    return {
+        "latency": metrics.latency_summary(),
+        "cascade_thresholds": cascade_thresholds,
+        "memory_queue": memory_worker.pending(),
+        "live_snapshots": live_snapshots(),
+        "runtime": runtime.settings,
+        "admission": admission.state(),
+        "sufficiency": sufficiency_scorer.cache_stats(),
     }
-    
-    print(f"✅ VAULT SYNCED: {sync_info['indexed_files']} files indexed")  # Terminal feedback
-    
-    return sync_info
 
 
 # =========================
-# Sync Vault (API Endpoint)
+# Profiles
 # =========================
-@router.post("/sync")
-def sync_vault():
-    """Manual sync endpoint"""
-    return _internal_sync()
+@router.get("/profiles")
+def list_profiles():
+    """Profiles captured with the X-Profile header, newest first"""
+    return profiling.list_profiles()
+
+
+@router.get("/profiles/{profile_id}/{kind}")
+def download_profile(profile_id: str, kind: str):
+    """kind: flamegraph (folded stacks) or trace (Chrome trace JSON)"""
+    if kind not in profiling.ARTIFACTS or not re.fullmatch(r"[0-9a-f]{12}", profile_id):
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    path = profiling.artifact_path(profile_id, kind)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return FileResponse(path, filename=path.name)
 
 
 # =========================
 # Ask (MAIN)
 # =========================
 @router.post("/ask")
-def ask(req: AskRequest):
-    global current_vault_data
+def ask(req: AskRequest, x_profile: Optional[str] = Header(None)):
+    ns = get_namespace(req.vault)
 
+    # Bounded wait for a pipeline slot; past that, tell the client when to retry
     try:
-        # 0. Sync and track if it happened
-        sync_info = None
-        if current_vault_data is None or vault_has_changed():
-            sync_info = _internal_sync()
+        ticket = admission.admit()
+    except Overloaded as e:
+        print(f"🚦 REJECTED ({e.reason}), retry after {e.retry_after}s")
+        raise HTTPException(
+            status_code=429,
+            detail={"error": "overloaded", "reason": e.reason, "retry_after": e.retry_after},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    degrade = ticket.degrade
+    if degrade:
+        print(f"🚦 DEGRADED (tier {ticket.tier}): {degrade}")
+
+    trace = PipelineTrace()
+    started = trace.t0
+    sync_info = None
+    sync_job = None
+    snap = None
+    sources = None
+
+    profile_error = None
+    if PROFILING_ENABLED and x_profile == "1":
+        try:
+            trace.profile = profiling.ProfileSession().start()
+        except profiling.ProfilerBusy as e:
+            profile_error = str(e)
+
+    def finish(response_data: dict, outcome: str) -> dict:
+        """Attach sync info + latency and record it under `outcome`"""
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        metrics.record_latency(outcome, latency_ms)
+
+        metadata = response_data.setdefault("metadata", {})
+        metadata["latency_ms"] = latency_ms
+        metadata["pipeline"] = trace.report()
+        metadata["admission"] = ticket.report()
+        if snap is not None:
+            metadata["index_version"] = snap.version
+        if sources:
+            metadata["sources"] = sources
+        if outcome.startswith("refusal:"):
+            metadata["refusal_stage"] = outcome.split(":", 1)[1]
+
+        if sync_info:
+            response_data["sync_performed"] = sync_info
+        if sync_job:
+            response_data["sync_job"] = sync_job
+
+        if trace.profile is not None:
+            metadata["profile"] = trace.profile.finish()
+            trace.profile = None
+        elif profile_error:
+            metadata["profile"] = {"error": profile_error}
+        return response_data
+
+    try:
+        # 0. First use has nothing to serve, so wait for the initial sync
+        if ns.snapshot is None:
+            ns, job = wait_for_first_sync(ns)
+            sync_info = job.result
+
+        # Hold one snapshot for the whole request; a sync publishing a new
+        # one mid-request can't mix old chunks with a new index
+        snap = ns.snapshot
 
         question = req.question.strip()
         
         print(f"\n📝 QUESTION: {question}")
+
+        # Speculative: change detection and retrieval don't depend on intent,
+        # so run them alongside classification and drop them if unneeded
+        changed_future = trace.submit("vault_check", ns.has_changed)
+        retrieval_future = trace.submit("retrieval", retrieve_candidates, question, snap)
         
         # 1. Intent Classification
-        intent = classify_intent(question)
+        intent = trace.run("intent", classify_intent, question)
         print(f"🎯 INTENT: {intent}")
+
+        # Changed vault: re-sync in the background, answer from the current index
+        if changed_future.result():
+            sync_job = sync_jobs.submit(ns).progress()
         
         # Prevent continuation without context
         if intent == "continuation":
             previous_q = context_manager.get_previous_question()
             if not previous_q:
-                return {"answer": "I don't have that information in my vault yet."}
+                trace.discard("retrieval", retrieval_future)
+                return finish(
+                    {"answer": "I don't have that information in my vault yet."},
+                    "refusal:no_context",
+                )
             print(f"🔗 PREVIOUS Q: {previous_q}")
         
         # Clear session for new factual questions (will add to history after answer)
@@ -274,70 +509,124 @@ def ask(req: AskRequest):
 
         # 2. Casual Chat
         if intent == "casual":
-            res = ollama.generate(
-                model="qwen2.5:7b",
-                prompt=f"""You are a friendly conversational assistant.
-Keep it casual and short.
-
-User:
-{question}
-
-Response:
-""",
-                options={"temperature": 0.7, "num_predict": 80},
+            trace.discard("retrieval", retrieval_future)
+            built = build_casual_prompt(question)
+            res = trace.run("generation", ollama_client.generate,
+                model=GENERATION_MODEL,
+                prompt=built["prompt"],
+                options={"temperature": 0.7, "num_predict": min(80, degrade.get("num_predict", 80))},
             )
-            response_data = {"answer": res["response"].strip()}
-            if sync_info:
-                response_data["sync_performed"] = sync_info
-            return response_data
-
-        # 3. RETRIEVAL - Use full question or previous question
-        chunks = retrieve_for_question(question, intent, current_vault_data)
-        print(f"📦 CHUNKS RETRIEVED: {len(chunks)}")
+            return finish(
+                {
+                    "answer": res["response"].strip(),
+                    "metadata": {
+                        "intent": intent,
+                        "generation": generation_report(built, ollama_client.response_stats(res)),
+                    },
+                },
+                "casual",
+            )
+
+        # 3. RETRIEVAL - speculative candidates, reranked only for continuation
+        results = retrieval_future.result()
+        trace.speculation["retrieval"] = "used"
+        chunks, top_similarity = trace.run(
+            "rank", rank_candidates, question, intent, results, snap.tokens,
+            rerank=not degrade.get("skip_rerank", False),
+        )
+        print(f"📦 CHUNKS RETRIEVED: {len(chunks)} (top similarity {top_similarity:.3f})")
         
         if not chunks:
-            response_data = {"answer": "I don't have that information in my vault yet."}
-            if sync_info:
-                response_data["sync_performed"] = sync_info
-            return response_data
+            return finish(
+                {"answer": "I don't have that information in my vault yet."},
+                "refusal:retrieval",
+            )
+
+        # 🔒 CHEAP REFUSAL - nothing in the vault is semantically close enough
+        if top_similarity < cascade_thresholds["similarity_floor"]:
+            print("❌ BELOW SIMILARITY FLOOR - REFUSING BEFORE GROUNDING")
+            return finish(
+                {
+                    "answer": "I don't have that information in my vault yet.",
+                    "metadata": {"intent": intent, "top_similarity": top_similarity},
+                },
+                "refusal:similarity_floor",
+            )
 
-        # 4. ML-BASED GROUNDING
-        allowed = ml_ground_sentences(question, chunks)
-        print(f"✅ SENTENCES GROUNDED: {len(allowed)}")
+        # 4. ML-BASED GROUNDING (stops early once enough confident sentences)
+        # While later batches are scored, sufficiency runs speculatively on
+        # the current top sentences; it's reused if they end up final.
+        speculative = {}
+
+        def speculate_sufficiency(top_sentences):
+            if len(top_sentences) < 6:
+                return
+            running = speculative.get("future")
+            if running is not None and not running.done():
+                return
+            speculative["sentences"] = top_sentences
+            speculative["future"] = trace.submit(
+                "sufficiency_speculative", sufficiency_scorer.score,
+                question=question, sentences=top_sentences, intent=intent, tokens=snap.tokens,
+            )
+
+        grounding_chunks = chunks[:degrade.get("grounding_chunks", len(chunks))]
+        sources = snap.sources(chunk_ids(results, grounding_chunks))
+
+        scored, sentences_scored = trace.run(
+            "grounding", score_grounding,
+            question, grounding_chunks,
+            margin=cascade_thresholds["grounding_margin"],
+            on_batch=speculate_sufficiency,
+            tokens=snap.tokens,
+        )
+        allowed = [sentence for _, sentence in scored[:6]]
+        print(f"✅ SENTENCES GROUNDED: {len(allowed)} ({sentences_scored} scored)")
 
         # 🔒 HARD REFUSAL - no grounded sentences
         if not allowed:
             print("❌ NO GROUNDED SENTENCES - REFUSING")
-            response_data = {"answer": "I don't have that information in my vault yet."}
-            if sync_info:
-                response_data["sync_performed"] = sync_info
-            return response_data
+            return finish(
+                {
+                    "answer": "I don't have that information in my vault yet.",
+                    "metadata": {"intent": intent, "sentences_scored": sentences_scored},
+                },
+                "refusal:grounding",
+            )
 
 
         # =========================
         # Model 4: SUFFICIENCY CHECK (HARD GATE)
         # =========================
-        suff_score = sufficiency_scorer.score(
-            question=question,
-            sentences=allowed,
-            intent=intent
-        )
+        if speculative.get("sentences") == allowed:
+            suff_score = speculative["future"].result()
+            trace.speculation["sufficiency"] = "hit"
+        else:
+            if speculative:
+                trace.speculation["sufficiency"] = "miss"
+            suff_score = trace.run(
+                "sufficiency", sufficiency_scorer.score,
+                question=question,
+                sentences=allowed,
+                intent=intent,
+                tokens=snap.tokens,
+            )
 
         print(f"🧪 SUFFICIENCY SCORE: {suff_score:.4f}")
 
         if suff_score < SUFFICIENCY_THRESHOLD:
             print("🚫 INSUFFICIENT EVIDENCE — REFUSING")
-            response_data = {
-                "answer": "I don't have enough information in my vault to answer that confidently.",
-                "metadata": {
-                    "intent": intent,
-                    "sentences_grounded": len(allowed),
-                    "sufficiency_score": suff_score
-                }
-            }
-            if sync_info:
-                response_data["sync_performed"] = sync_info
-            return response_data
+            return finish(
+                {
+                    "answer": "I don't have enough information in my vault to answer that confidently.",
+                    "metadata": {
+                        "intent": intent,
+                        "sentences_grounded": len(allowed),
+                        "sufficiency_score": suff_score
+                    }
+                },
+                "refusal:sufficiency",
+            )
 
 
         # ⬇️ ONLY reaches here if grounding + sufficiency passed
@@ -345,52 +634,24 @@ Response:
         for i, s in enumerate(allowed, 1):
             print(f"  {i}. {s}")
 
-        allowed_text = "\n".join(f"- {s}" for s in allowed)
-
 
         # 5. ANSWER GENERATION
         # Build context for continuation
         context_instruction = ""
         if intent == "continuation":
-            previous_q = context_manager.get_previous_question()
-            if previous_q:
-                prev_lower = previous_q.lower()
-                if prev_lower.startswith(("why", "what happens", "why is")):
-                    context_instruction = (
-                        "CONTEXT: This is a WHY follow-up.\n"
-                        "Explain CONSEQUENCES, IMPACTS, or RISKS.\n"
-                        "Do NOT restate the original fact.\n"
-                    )
-                elif prev_lower.startswith("how"):
-                    context_instruction = (
-                        "CONTEXT: This is a HOW follow-up.\n"
-                        "Explain the MECHANISM or PROCESS.\n"
-                    )
+            context_instruction = continuation_instruction(context_manager.get_previous_question())
 
         
-        response = ollama.generate(
-            model="qwen2.5:7b",
-            prompt=f"""You are answering a question using ONLY the provided sentences.
-
-RULES:
-- Use ONLY the allowed sentences below
-- You MAY rephrase and COMBINE them
-- If the question asks "why", "why is that an issue", or "what happens if":
-  → EXPLAIN CONSEQUENCES or IMPACTS implied by the sentences
-  → Do NOT simply restate the sentences
-- Do NOT add external facts
-- Keep the answer concise and explanatory
-
-{context_instruction}
-
-ALLOWED SENTENCES:
-{allowed_text}
-
-QUESTION:
-{question}
-
-ANSWER:""",
-            options={"temperature": 0.0, "top_p": 0.1, "num_predict": 150},
+        # Static rules first so Ollama can reuse the cached prefix
+        built = build_answer_prompt(question, allowed, context_instruction)
+        if built["sentences_dropped"]:
+            print(f"✂️ SENTENCES OVER TOKEN BUDGET: {built['sentences_dropped']}")
+
+        response = trace.run(
+            "generation", ollama_client.generate,
+            model=GENERATION_MODEL,
+            prompt=built["prompt"],
+            options={"temperature": 0.0, "top_p": 0.1, "num_predict": min(150, degrade.get("num_predict", 150))},
         )
 
         answer = response["response"].strip()
@@ -398,25 +659,40 @@ ANSWER:""",
 
         # 6. Store Q&A in conversation history
         if answer != "I don't have that information in my vault yet.":
+            # topic = the factual question that opened this thread
+            topic = question if intent == "factual" else context_manager.get_previous_question()
             if intent == "factual":
                 context_manager.add_turn(question, answer)
 
+            # long-term facts are extracted off the response path
+            if MEMORY_EXTRACTION_ENABLED:
+                memory_worker.submit_exchange(question, answer, session=req.session, topic=topic)
+
         # 7. Build response with sync info
-        response_data = {
-            "answer": answer,
-            "metadata": {
-                "chunks_retrieved": len(chunks),
-                "sentences_grounded": len(allowed),
-                "intent": intent
-            }
-        }
-        
-        # Add sync info if sync was performed
-        if sync_info:
-            response_data["sync_performed"] = sync_info
+        return finish(
+            {
+                "answer": answer,
+                "metadata": {
+                    "chunks_retrieved": len(chunks),
+                    "sentences_grounded": len(allowed),
+                    "sentences_scored": sentences_scored,
+                    "sufficiency_score": suff_score,
+                    "intent": intent,
+                    "generation": generation_report(built, ollama_client.response_stats(response)),
+                }
+            },
+            "answer",
+        )
 
-        return response_data
+    except HTTPException:
+        raise
 
     except Exception as e:
         print("ERROR:", e)
-        return {"answer": "My brain just lagged. Say that again?"}
\ No newline at end of file
+        return {"answer": "My brain just lagged. Say that again?"}
+
+    finally:
+        ticket.release()
+        # an exception skipped finish(); still release the profiler
+        if trace.profile is not None:
+            trace.profile.finish()
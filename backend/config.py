@@ -1,4 +1,160 @@
+import os
 from pathlib import Path
 
 VAULT_PATH = Path.home() / "vault"
 SUPPORTED_EXTENSIONS = [".txt", ".md", ".pdf"]
+
+# =========================
+# Vault namespaces
+# =========================
+DEFAULT_VAULT = "default"              # served from VAULT_PATH
+VAULTS_ROOT = Path.home() / "vaults"   # named vaults: ~/vaults/<name>
+INDEX_ROOT = Path.home() / ".vault_index"  # per-vault index, manifest and cache
+VAULT_MEMORY_BUDGET_MB = 1024          # loaded namespaces are evicted past this
+
+# =========================
+# Vault scanning
+# =========================
+SCAN_WORKERS = min(8, os.cpu_count() or 1)  # <= 1 reads files in-process
+SCAN_MAX_IN_FLIGHT_FILES = 64
+SCAN_MAX_IN_FLIGHT_MB = 256
+
+# =========================
+# Ollama runtime
+# =========================
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://127.0.0.1:11434")
+GENERATION_MODEL = "qwen2.5:7b"
+EMBEDDING_MODEL = "bge-large:latest"
+EXTRACTION_MODEL = "mistral:7b-instruct"
+
+# -1 keeps a model resident until Ollama restarts; models not listed use
+# Ollama's default keep-alive
+OLLAMA_KEEP_ALIVE = {
+    GENERATION_MODEL: -1,
+    EMBEDDING_MODEL: -1,
+}
+OLLAMA_TIMEOUTS = {      # seconds, per call kind
+    "generate": 120,
+    "embed": 30,
+    "warmup": 300,
+}
+OLLAMA_POOL_SIZE = 16    # pooled keep-alive HTTP connections
+# Fixed context size per model: changing num_ctx between calls forces a
+# reload and drops the prompt cache, so every call (warm-up included) uses this
+OLLAMA_NUM_CTX = {
+    GENERATION_MODEL: 4096,
+}
+OLLAMA_WARMUP_ON_STARTUP = True
+
+# =========================
+# Embeddings (embedders.py)
+# =========================
+EMBEDDING_BACKEND = "ollama"  # "ollama" (EMBEDDING_MODEL over HTTP) or "local" (in-process)
+EMBEDDING_BATCH_SIZE = 32     # texts per embedding call when building an index
+# HuggingFace export of the same model, e.g. BAAI/bge-large-en-v1.5
+LOCAL_EMBEDDING_MODEL_DIR = Path(__file__).parent / "models" / "embedding_model"
+LOCAL_EMBEDDING_RUNTIME = "torch"  # "torch", or "onnx" for model.onnx in the same directory
+LOCAL_EMBEDDING_MAX_LENGTH = 512   # tokens; bge's context, as in Ollama
+
+# =========================
+# Near-duplicate chunks (vault/dedup.py)
+# =========================
+DEDUP_ENABLED = True
+DEDUP_THRESHOLD = 0.8     # estimated Jaccard over word shingles
+DEDUP_NUM_PERM = 128      # MinHash signature length
+DEDUP_BANDS = 16          # LSH bands (8 rows each)
+DEDUP_SHINGLE_WORDS = 5
+
+# =========================
+# Pre-tokenized vault text
+# =========================
+# All cross-encoders share this MiniLM WordPiece vocab
+TOKEN_STORE_TOKENIZER = Path(__file__).parent / "models" / "grounding_models" / "grounding_model"
+
+# =========================
+# Model training
+# =========================
+TRAINING_CACHE_DIR = Path(__file__).parent / "models" / "training" / "cache"  # tokenized datasets
+
+# =========================
+# /ask cascade
+# =========================
+# assistant/calibrate.py writes calibrated values here
+CASCADE_THRESHOLDS_PATH = Path(__file__).parent / "assistant" / "cascade_thresholds.json"
+CASCADE_SIMILARITY_FLOOR = 0.0  # refuse before grounding below this; 0 = off until calibrated
+GROUNDING_MARGIN = 0.25         # stop grounding once top_k sentences reach min_score + margin
+GROUNDING_BATCH_SIZE = 16
+SUFFICIENCY_CACHE_SIZE = 2048  # cached scores per (question, intent, evidence set)
+SUFFICIENCY_MAX_WINDOWS = 4    # 512-token evidence windows scored per check
+
+# =========================
+# Prompt assembly
+# =========================
+PROMPT_TOKEN_BUDGET = 1536  # max tokens of grounded sentences in the answer prompt
+CHARS_PER_TOKEN = 3.5       # conservative estimate for English text
+
+# =========================
+# Hybrid retrieval (vault/ingest.py)
+# =========================
+# What a FAISS hit contributes to the fused score (x SEMANTIC_WEIGHT):
+# "hit" = 1.0 for every hit, the original ranking (MIN_SCORE then only cuts
+# keyword-only chunks); "cosine" = the hit's cosine similarity, so hits
+# below MIN_SCORE / SEMANTIC_WEIGHT ~= 0.29 with no keyword overlap are cut.
+# Compare with `python -m evaluation.run --semantic-score hit cosine`.
+HYBRID_SEMANTIC_SCORE = "hit"
+
+# =========================
+# Runtime threads (runtime.py; None = sized from the core count)
+# =========================
+RUNTIME_CORES = None           # cores to plan for; None = cores available to the process
+PIPELINE_WORKERS = None        # threads for speculative /ask stages
+REQUEST_THREADS = None         # FastAPI threads running sync endpoints; None = admitted + queued /ask + headroom
+REQUEST_THREADS_HEADROOM = 8   # threads kept for /metrics, /sync status and batch streams
+TORCH_INTRA_OP_THREADS = None  # per forward pass
+TORCH_INTER_OP_THREADS = 1     # inference never runs independent ops in parallel
+FAISS_OMP_THREADS = None       # per search
+TOKENIZERS_PARALLELISM = False # request threads already run in parallel
+
+# =========================
+# Admission control (/ask)
+# =========================
+ADMISSION_MAX_CONCURRENT = 4        # /ask requests running the pipeline at once
+ADMISSION_MAX_QUEUE = 8             # more wait for a slot (each holds a request thread); the rest get 429
+ADMISSION_QUEUE_TIMEOUT = 15.0      # seconds a request waits for a slot before 429
+ADMISSION_LATENCY_TARGET_MS = 8000  # recent p95 at this latency counts as load 1.0
+ADMISSION_BATCH_SLOTS = 2           # slots /ask/batch groups may hold (they yield to waiting /ask)
+# Load = max((running + waiting) / max concurrent, p95 / target). Tiers are
+# cumulative: every tier at or below the current load applies.
+DEGRADATION_TIERS = [
+    {"load": 0.75, "skip_rerank": True},       # continuation keeps FAISS order
+    {"load": 1.0, "grounding_chunks": 3},      # ground sentences from fewer chunks
+    {"load": 1.5, "num_predict": 80},          # shorter answers
+]
+
+# =========================
+# Batch /ask
+# =========================
+BATCH_ASK_SIZE = 32          # questions per batched intent/retrieval/grounding pass
+BATCH_GROUNDING_PAIRS = 128  # (question, sentence) pairs per grounding forward pass
+BATCH_GENERATION_WORKERS = 2 # concurrent batch generations (own pool, not the /ask workers)
+
+# =========================
+# Profiling
+# =========================
+PROFILING_ENABLED = False        # honour the X-Profile request header
+PROFILE_DIR = Path(__file__).parent / "profiles"
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between CPU stack samples
+PROFILE_KEEP = 20                # newest profiles kept on disk
+
+# =========================
+# Long-term memory
+# =========================
+MEMORY_DB_PATH = Path(__file__).parent / "memory" / "memory.db"
+MEMORY_RETENTION_DAYS = 30
+MEMORY_MAX_FACTS_PER_SESSION = 200
+MEMORY_RETENTION_INTERVAL = 600  # seconds between retention passes
+MEMORY_QUEUE_SIZE = 256          # pending exchanges before new ones are dropped
+# Extraction runs EXTRACTION_MODEL on the same Ollama server as generation
+# (competing with it and possibly evicting it), and no prompt reads the facts
+# yet, so it is off by default
+MEMORY_EXTRACTION_ENABLED = False
@@ -0,0 +1,137 @@
+"""
+Embedding backends for the vector store.
+"ollama" sends text to the Ollama server over HTTP. "local" runs the same
+bge model in-process from a HuggingFace export on disk (torch, or ONNX
+Runtime if model.onnx is present), so query embeddings skip the JSON round
+trip and don't queue behind generation on the Ollama server. Both return
+float32 NumPy arrays; the local backend hands over the model's output
+buffer without converting through Python lists.
+
+`identity` names the model behind the vectors. Indexes and embedding
+caches record it, so vectors from different backends are never mixed.
+"""
+import threading
+
+import numpy as np
+
+import ollama_client
+from config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_MODEL,
+    EMBEDDING_BATCH_SIZE,
+    LOCAL_EMBEDDING_MODEL_DIR,
+    LOCAL_EMBEDDING_RUNTIME,
+    LOCAL_EMBEDDING_MAX_LENGTH,
+)
+
+
+class OllamaEmbedder:
+    name = "ollama"
+
+    def __init__(self, model: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        self.identity = f"ollama:{model}"
+
+    def embed(self, text: str) -> np.ndarray:
+        response = ollama_client.embeddings(self.model, text)
+        return np.asarray(response["embedding"], dtype="float32")
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        response = ollama_client.embed_batch(self.model, texts)
+        return np.asarray(response["embeddings"], dtype="float32")
+
+
+class LocalEmbedder:
+    """
+    bge in-process: [CLS] pooling + L2 normalization, the same pooling the
+    Ollama bge models use. Texts are truncated at max_length tokens.
+    """
+    name = "local"
+
+    def __init__(
+        self,
+        model_dir=LOCAL_EMBEDDING_MODEL_DIR,
+        runtime: str = LOCAL_EMBEDDING_RUNTIME,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_length: int = LOCAL_EMBEDDING_MAX_LENGTH,
+    ):
+        import runtime as thread_runtime  # thread settings, before the model loads
+        from transformers import AutoTokenizer
+
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.runtime = runtime
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir), local_files_only=True)
+
+        if runtime == "onnx":
+            import onnxruntime
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = thread_runtime.settings["torch_intra_op_threads"]
+            self.session = onnxruntime.InferenceSession(
+                str(model_dir / "model.onnx"), options, providers=["CPUExecutionProvider"]
+            )
+            self.input_names = {i.name for i in self.session.get_inputs()}
+        else:
+            import torch
+            from transformers import AutoModel
+
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            self.model = AutoModel.from_pretrained(str(model_dir), local_files_only=True).to(self.device)
+            self.model.eval()
+
+        self.identity = f"local:{model_dir.name}"
+        print(f"🧲 LOCAL EMBEDDER: {model_dir.name} ({runtime})")
+
+    def _forward(self, texts: list[str]) -> np.ndarray:
+        """[CLS] vectors for one batch, shape (n, dim)"""
+        if self.runtime == "onnx":
+            enc = self.tokenizer(
+                texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+            )
+            feed = {k: v.astype(np.int64) for k, v in enc.items() if k in self.input_names}
+            hidden = self.session.run(None, feed)[0]
+            return hidden[:, 0]
+
+        import torch
+
+        enc = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="pt"
+        ).to(self.device)
+        with torch.inference_mode():
+            hidden = self.model(**enc).last_hidden_state[:, 0]
+        # on CPU .numpy() shares the tensor's buffer
+        return hidden.float().cpu().numpy()
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        parts = [
+            self._forward(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        vectors = np.ascontiguousarray(parts[0] if len(parts) == 1 else np.concatenate(parts), dtype="float32")
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_batch([text])[0]
+
+
+BACKENDS = {
+    "ollama": OllamaEmbedder,
+    "local": LocalEmbedder,
+}
+
+_embedders = {}
+_lock = threading.Lock()
+
+
+def get_embedder(backend: str = EMBEDDING_BACKEND):
+    """Shared embedder per backend, created on first use"""
+    with _lock:
+        embedder = _embedders.get(backend)
+        if embedder is None:
+            embedder = _embedders[backend] = BACKENDS[backend]()
+        return embedder
@@ -0,0 +1,305 @@
+"""
+Retrieval quality + latency evaluation over a fixture vault.
+
+Questions are JSONL: {"question": str, "gold": [sentence, ...]}; an empty
+`gold` list marks a question the vault can't answer. A retrieved chunk or
+grounded sentence counts as gold if it contains a gold sentence.
+
+For every configuration (index type x chunk size x query batch x grounding
+batch x rerank x hybrid semantic score) this reports:
+- recall@k and MRR of the first gold chunk in retrieval order
+- grounding precision / recall of the kept sentences at min_score=0.52
+- refusal accuracy of the full cascade (floor, grounding, sufficiency)
+- build time and per-question stage latency
+with deltas against the first configuration (or a saved --baseline run).
+
+Run from backend/:
+    python -m evaluation.run --index Flat HNSW32 --chunk-sizes 600 40 --json eval.json
+"""
+import argparse
+import itertools
+import json
+import math
+import time
+from pathlib import Path
+
+import faiss
+
+from config import HYBRID_SEMANTIC_SCORE
+
+FIXTURES = Path(__file__).parent / "fixtures"
+KS = (1, 3, 5, 10)
+RETRIEVAL_LIMIT = 10
+GROUNDING_MIN_SCORE = 0.52
+GROUNDING_TOP_K = 6
+
+
+# =========================
+# Labels
+# =========================
+def load_questions(path: Path) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def contains_gold(text: str, gold: list[str]) -> bool:
+    text = normalize(text)
+    return any(normalize(g) in text for g in gold)
+
+
+# =========================
+# Index variants
+# =========================
+def reindex(index, spec: str):
+    """Rebuild a flat index as faiss.index_factory(spec); {nlist} = sqrt(n)"""
+    vectors = index.reconstruct_n(0, index.ntotal)
+    spec = spec.replace("{nlist}", str(max(1, int(math.sqrt(index.ntotal)))))
+    new = faiss.index_factory(index.d, spec, faiss.METRIC_L2)
+    if not new.is_trained:
+        new.train(vectors)
+    new.add(vectors)
+    return new
+
+
+def build_store(vault: Path, chunk_size: int, index_spec: str, cache: dict):
+    from vault.ingest import scan_vault
+    from vault.token_store import TokenStore
+    from vault.vector_store import VectorStore
+
+    store = VectorStore()
+    store.embedding_cache = cache.get(chunk_size, {})
+
+    start = time.perf_counter()
+    scan_vault(vault, store, chunk_size=chunk_size)
+    if index_spec != "Flat" and store.index is not None:
+        store.index = reindex(store.index, index_spec)
+    tokens = TokenStore.build(store.chunks)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    cache[chunk_size] = store.embedding_cache
+    return store, tokens, build_ms
+
+
+# =========================
+# One configuration
+# =========================
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+def evaluate(
+    store, tokens, questions: list[dict], query_batch: int, grounding_batch: int, rerank: bool,
+    semantic_score: str = "hit",
+) -> dict:
+    from vault.ingest import retrieve_relevant_chunks, retrieve_relevant_chunks_batch
+    from assistant.router import (
+        rerank_chunks,
+        score_grounding,
+        sufficiency_scorer,
+        cascade_thresholds,
+        SUFFICIENCY_THRESHOLD,
+    )
+
+    timings = {"retrieval": [], "rerank": [], "grounding": [], "sufficiency": [], "total": []}
+    hits = {k: 0 for k in KS}
+    reciprocal_ranks = []
+    grounded_total = grounded_gold = gold_total = gold_found = 0
+    refusals_correct = 0
+
+    # Retrieval, in groups of query_batch (per-question time is amortized)
+    retrieved = []
+    for i in range(0, len(questions), query_batch):
+        group = [q["question"] for q in questions[i:i + query_batch]]
+        start = time.perf_counter()
+        if query_batch == 1:
+            results = [retrieve_relevant_chunks(group[0], store, RETRIEVAL_LIMIT, semantic_score)]
+        else:
+            results = retrieve_relevant_chunks_batch(group, store, RETRIEVAL_LIMIT, semantic_score)
+        per_question = (time.perf_counter() - start) * 1000 / len(group)
+        for r in results:
+            retrieved.append(r)
+            timings["retrieval"].append(per_question)
+
+    for item, results, retrieval_ms in zip(questions, retrieved, timings["retrieval"]):
+        question, gold = item["question"], item["gold"]
+        chunks = [r["chunk"] for r in results]
+        top_similarity = max((r["semantic"] for r in results), default=0.0)
+        elapsed = retrieval_ms
+
+        if rerank and chunks:
+            start = time.perf_counter()
+            chunks = rerank_chunks(question, chunks, top_k=len(chunks), tokens=tokens)
+            ms = (time.perf_counter() - start) * 1000
+            timings["rerank"].append(ms)
+            elapsed += ms
+
+        # Retrieval quality: rank of the first gold chunk
+        if gold:
+            rank = next((i + 1 for i, c in enumerate(chunks) if contains_gold(c, gold)), None)
+            for k in KS:
+                hits[k] += int(rank is not None and rank <= k)
+            reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+        # Grounding on the top 5 chunks, as /ask does
+        grounded = []
+        if chunks and top_similarity >= cascade_thresholds["similarity_floor"]:
+            start = time.perf_counter()
+            scored, _ = score_grounding(
+                question, chunks[:5],
+                top_k=GROUNDING_TOP_K,
+                min_score=GROUNDING_MIN_SCORE,
+                margin=cascade_thresholds["grounding_margin"],
+                batch_size=grounding_batch,
+                tokens=tokens,
+            )
+            ms = (time.perf_counter() - start) * 1000
+            timings["grounding"].append(ms)
+            elapsed += ms
+            grounded = [s for _, s in scored[:GROUNDING_TOP_K]]
+
+        if gold:
+            grounded_total += len(grounded)
+            grounded_gold += sum(contains_gold(s, gold) for s in grounded)
+            gold_total += len(gold)
+            gold_found += sum(any(contains_gold(s, [g]) for s in grounded) for g in gold)
+
+        # Refusal decision of the full cascade
+        refused = not grounded
+        if grounded:
+            start = time.perf_counter()
+            suff = sufficiency_scorer.score(
+                question=question, sentences=grounded, intent="factual", tokens=tokens, use_cache=False
+            )
+            ms = (time.perf_counter() - start) * 1000
+            timings["sufficiency"].append(ms)
+            elapsed += ms
+            refused = suff < SUFFICIENCY_THRESHOLD
+        refusals_correct += int(refused == (not gold))
+        timings["total"].append(elapsed)
+
+    answerable = sum(1 for q in questions if q["gold"])
+    quality = {f"recall@{k}": round(hits[k] / answerable, 4) if answerable else None for k in KS}
+    quality.update({
+        "mrr": round(sum(reciprocal_ranks) / len(reciprocal_ranks), 4) if reciprocal_ranks else None,
+        "grounding_precision": round(grounded_gold / grounded_total, 4) if grounded_total else None,
+        "grounding_recall": round(gold_found / gold_total, 4) if gold_total else None,
+        "refusal_accuracy": round(refusals_correct / len(questions), 4),
+    })
+    latency = {
+        stage: {"p50_ms": round(percentile(v, 0.50), 2), "p95_ms": round(percentile(v, 0.95), 2)}
+        for stage, v in timings.items() if v
+    }
+    return {"quality": quality, "latency": latency}
+
+
+# =========================
+# Report
+# =========================
+def config_key(c: dict) -> str:
+    # runs saved before the option existed fused cosine scores
+    return (
+        f"{c['index']}|chunk={c['chunk_size']}|qb={c['query_batch']}|gb={c['grounding_batch']}"
+        f"|rerank={c['rerank']}|sem={c.get('semantic_score', 'cosine')}"
+    )
+
+
+def deltas(result: dict, base: dict) -> dict:
+    out = {}
+    for name, value in result["quality"].items():
+        ref = base["quality"].get(name)
+        if value is not None and ref is not None:
+            out[name] = round(value - ref, 4)
+    for stage, value in result["latency"].items():
+        ref = base["latency"].get(stage)
+        if ref:
+            out[f"{stage}_p50_ms"] = round(value["p50_ms"] - ref["p50_ms"], 2)
+    return out
+
+
+def print_table(results: list[dict]):
+    cols = ["recall@1", "recall@5", "mrr", "grounding_precision", "grounding_recall", "refusal_accuracy"]
+    short = ["R@1", "R@5", "MRR", "G-prec", "G-rec", "refuse"]
+    print(f"\n{'config':<62} " + " ".join(f"{s:>7}" for s in short) + f" {'build ms':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for r in results:
+        q, total = r["quality"], r["latency"].get("total", {})
+        values = " ".join(f"{q[c]:>7.3f}" if q[c] is not None else f"{'-':>7}" for c in cols)
+        print(
+            f"{config_key(r['config']):<62} {values} {r['build_ms']:>9.0f} "
+            f"{total.get('p50_ms', 0):>8.1f} {total.get('p95_ms', 0):>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality + latency across configurations")
+    parser.add_argument("--vault", type=Path, default=FIXTURES / "vault")
+    parser.add_argument("--questions", type=Path, default=FIXTURES / "questions.jsonl")
+    parser.add_argument("--index", nargs="+", default=["Flat"],
+                        help="faiss index_factory specs, e.g. Flat HNSW32 IVF{nlist},Flat")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[600])
+    parser.add_argument("--query-batch", type=int, nargs="+", default=[1])
+    parser.add_argument("--grounding-batch", type=int, nargs="+", default=[16])
+    parser.add_argument("--rerank", choices=["off", "on", "both"], default="off")
+    parser.add_argument("--semantic-score", nargs="+", choices=["hit", "cosine"], default=[HYBRID_SEMANTIC_SCORE],
+                        help="what a FAISS hit adds to the hybrid score (config HYBRID_SEMANTIC_SCORE)")
+    parser.add_argument("--stub-embeddings", action="store_true",
+                        help="hashed bag-of-words embeddings instead of Ollama")
+    parser.add_argument("--baseline", type=Path, help="earlier --json report to diff against")
+    parser.add_argument("--json", type=Path, help="write the full report here")
+    args = parser.parse_args()
+
+    if args.stub_embeddings:
+        from loadtest import stub_ollama
+        stub_ollama.install(stub_ollama.StubOllamaClient(generate_latency=0.0, embed_latency=0.0))
+
+    questions = load_questions(args.questions)
+    rerank_modes = {"off": [False], "on": [True], "both": [False, True]}[args.rerank]
+
+    results = []
+    embedding_cache = {}
+    for index_spec, chunk_size in itertools.product(args.index, args.chunk_sizes):
+        store, tokens, build_ms = build_store(args.vault, chunk_size, index_spec, embedding_cache)
+        print(f"🏗️ {index_spec} chunk={chunk_size}: {len(store.chunks)} chunks in {build_ms:.0f} ms")
+
+        for qb, gb, rerank, sem in itertools.product(
+            args.query_batch, args.grounding_batch, rerank_modes, args.semantic_score
+        ):
+            cfg = {
+                "index": index_spec,
+                "chunk_size": chunk_size,
+                "query_batch": qb,
+                "grounding_batch": gb,
+                "rerank": rerank,
+                "semantic_score": sem,
+            }
+            result = evaluate(store, tokens, questions, qb, gb, rerank, sem)
+            result.update({"config": cfg, "build_ms": round(build_ms, 1), "chunks": len(store.chunks)})
+            results.append(result)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = {config_key(r["config"]): r for r in json.load(f)["results"]}
+    for r in results:
+        base = baseline.get(config_key(r["config"])) if args.baseline else results[0]
+        if base is not None:
+            r["delta"] = deltas(r, base)
+
+    print_table(results)
+    print(f"\nΔ vs {'baseline ' + str(args.baseline) if args.baseline else 'first configuration'}:")
+    for r in results:
+        if "delta" in r:
+            print(f"  {config_key(r['config'])}: {r['delta']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"questions": len(questions), "results": results}, f, indent=2)
+        print(f"✅ Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Data-race detectors installed around shared state during a load test.
+Each check records a violation instead of raising, so the run completes
+and reports how often a request saw inconsistent state.
+"""
+import threading
+import traceback
+
+import faiss
+import numpy as np
+
+from loadtest.stub_ollama import stub_embed
+from vault.vector_store import VectorStore
+
+violations = []
+_lock = threading.Lock()
+
+
+def record(kind: str, detail: str):
+    with _lock:
+        violations.append({
+            "kind": kind,
+            "detail": detail,
+            "thread": threading.current_thread().name,
+            "stack": "".join(traceback.format_stack(limit=6)[:-1]),
+        })
+
+
+def _check_store(store: VectorStore, results: list[dict]):
+    chunks = store.chunks
+    index = store.index
+    if index is not None and index.ntotal != len(chunks):
+        record("half_built_store", f"index has {index.ntotal} vectors, chunks has {len(chunks)}")
+    if store.keyword_index.n_chunks != len(chunks):
+        record("keyword_index_mismatch", f"keyword index {store.keyword_index.n_chunks} vs chunks {len(chunks)}")
+
+    # the stub embedding is a pure function of text, so each hit's stored
+    # vector must match its chunk text or the ID mapped to the wrong chunk
+    for r in results:
+        expected = stub_embed(r["chunk"]).reshape(1, -1)
+        faiss.normalize_L2(expected)
+        stored = index.reconstruct(r["id"])
+        if not np.allclose(stored, expected[0], atol=1e-4):
+            record("id_text_mismatch", f"chunk id {r['id']} vector does not match its text")
+
+
+def install():
+    original_search = VectorStore.search
+
+    def checked_search(self, query: str, k: int = 3):
+        results = original_search(self, query, k)
+        try:
+            _check_store(self, results)
+        except Exception as e:
+            record("check_error", repr(e))
+        return results
+
+    VectorStore.search = checked_search
+
+
+def summary() -> dict:
+    with _lock:
+        by_kind = {}
+        for v in violations:
+            by_kind[v["kind"]] = by_kind.get(v["kind"], 0) + 1
+        return {"total": len(violations), "by_kind": by_kind, "examples": violations[:3]}
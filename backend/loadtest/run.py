@@ -0,0 +1,225 @@
+"""
+In-process load and concurrency stress test for the FastAPI app.
+
+Runs the real app (real intent/grounding/reference/sufficiency models)
+against a stub Ollama, on a throwaway vault that is edited while requests
+are in flight. Each concurrency level drives a mixed factual / continuation
+/ casual workload and reports throughput, tail latency, error rate and how
+many requests admission control rejected or degraded.
+Race detectors flag requests that saw inconsistent shared state.
+
+Run from backend/:
+    python -m loadtest.run --levels 1 2 4 8 16 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import config
+
+LOADTEST_VAULT = "loadtest"
+LAG_ANSWER = "My brain just lagged. Say that again?"
+
+TOPICS = [
+    ("caching", "Cache entries are invalidated when the underlying data changes."),
+    ("encryption", "Encryption at rest protects stored data if a disk is stolen."),
+    ("replication", "Replication keeps a copy of every write on a second node."),
+    ("indexing", "An index speeds up lookups at the cost of slower writes."),
+    ("backups", "Nightly backups are kept for thirty days before deletion."),
+    ("sharding", "Sharding splits a table across servers by a partition key."),
+]
+CASUAL = ["hey there", "thanks!", "how's it going?", "lol ok", "good morning"]
+CONTINUATIONS = ["Why is that important?", "How does it work?", "Can you elaborate on that?"]
+
+
+# =========================
+# Setup (before the app is imported)
+# =========================
+def prepare_environment(root: Path):
+    """Point every on-disk location at `root` so the run touches nothing real"""
+    config.VAULTS_ROOT = root / "vaults"
+    config.INDEX_ROOT = root / "index"
+    config.MEMORY_DB_PATH = root / "memory.db"
+    config.MEMORY_EXTRACTION_ENABLED = False
+    config.OLLAMA_WARMUP_ON_STARTUP = False
+
+    vault = config.VAULTS_ROOT / LOADTEST_VAULT
+    vault.mkdir(parents=True)
+    for name, fact in TOPICS:
+        write_note(vault, name, fact, revision=0)
+    return vault
+
+
+def write_note(vault: Path, name: str, fact: str, revision: int):
+    filler = " ".join(f"{name} note line {i} revision {revision}." for i in range(40))
+    (vault / f"{name}.md").write_text(f"# {name}\n\n{fact} {filler}\n", encoding="utf-8")
+
+
+# =========================
+# Workload
+# =========================
+def next_request() -> dict:
+    roll = random.random()
+    if roll < 0.5:
+        name, _ = random.choice(TOPICS)
+        question = f"What does the vault say about {name}?"
+    elif roll < 0.75:
+        question = random.choice(CONTINUATIONS)
+    else:
+        question = random.choice(CASUAL)
+    return {"question": question, "vault": LOADTEST_VAULT}
+
+
+async def client_loop(client, deadline: float, samples: list):
+    while time.perf_counter() < deadline:
+        body = next_request()
+        start = time.perf_counter()
+        try:
+            res = await client.post("/ask", json=body)
+            latency = time.perf_counter() - start
+            if res.status_code == 429:
+                # shed by admission control: back off as told, like a real client
+                samples.append({"latency": latency, "error": False, "outcome": "rejected", "tier": None})
+                retry_after = float(res.headers.get("Retry-After", 1))
+                await asyncio.sleep(min(retry_after, max(deadline - time.perf_counter(), 0)))
+                continue
+            data = res.json()
+            error = res.status_code != 200 or data.get("answer") == LAG_ANSWER
+            metadata = data.get("metadata", {})
+            outcome = metadata.get("refusal_stage") or metadata.get("intent")
+            tier = metadata.get("admission", {}).get("tier")
+        except Exception:
+            latency = time.perf_counter() - start
+            error = True
+            outcome = "exception"
+            tier = None
+        samples.append({"latency": latency, "error": error, "outcome": outcome, "tier": tier})
+
+
+async def vault_editor(client, vault: Path, deadline: float, interval: float, stats: dict):
+    """Rewrites notes (and sometimes forces /sync) while queries are running"""
+    revision = 1
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(interval)
+        name, fact = random.choice(TOPICS)
+        write_note(vault, name, fact, revision)
+        revision += 1
+        stats["edits"] += 1
+        if random.random() < 0.3:
+            res = await client.post("/sync", json={"vault": LOADTEST_VAULT})
+            stats["sync_jobs"].add(res.json().get("job_id"))
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+async def run_level(app, vault: Path, concurrency: int, duration: float, edit_interval: float) -> dict:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    samples = []
+    editor_stats = {"edits": 0, "sync_jobs": set()}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(
+            vault_editor(client, vault, deadline, edit_interval, editor_stats),
+            *(client_loop(client, deadline, samples) for _ in range(concurrency)),
+        )
+        wall = time.perf_counter() - start
+
+    served = [s for s in samples if s["outcome"] != "rejected"]
+    latencies = [s["latency"] * 1000 for s in served]
+    errors = sum(s["error"] for s in samples)
+    outcomes = {}
+    for s in samples:
+        outcomes[s["outcome"]] = outcomes.get(s["outcome"], 0) + 1
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "throughput_rps": round(len(served) / wall, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 1),
+        "p95_ms": round(percentile(latencies, 0.95), 1),
+        "p99_ms": round(percentile(latencies, 0.99), 1),
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "rejected_rate": round((len(samples) - len(served)) / len(samples), 4) if samples else 0.0,
+        "degraded": sum(1 for s in served if s["tier"]),
+        "vault_edits": editor_stats["edits"],
+        "forced_sync_jobs": len(editor_stats["sync_jobs"] - {None}),
+        "outcomes": outcomes,
+    }
+
+
+def find_saturation(levels: list[dict]):
+    """First level where doubling concurrency gains < 10% throughput"""
+    for prev, cur in zip(levels, levels[1:]):
+        if cur["throughput_rps"] < prev["throughput_rps"] * 1.10:
+            return prev["concurrency"]
+    return None
+
+
+# =========================
+# Main
+# =========================
+def main():
+    parser = argparse.ArgumentParser(description="In-process /ask load test against a stub Ollama")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    parser.add_argument("--edit-interval", type=float, default=2.0, help="seconds between vault edits")
+    parser.add_argument("--generate-latency", type=float, default=0.2)
+    parser.add_argument("--embed-latency", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    root = Path(tempfile.mkdtemp(prefix="loadtest_"))
+    vault = prepare_environment(root)
+
+    from loadtest import stub_ollama, race_checks
+    stub_ollama.install(stub_ollama.StubOllamaClient(args.generate_latency, args.embed_latency))
+    race_checks.install()
+
+    from main import app  # loads the models
+
+    levels = []
+    print(f"{'conc':>5} {'reqs':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6} {'429%':>6} {'degr':>5}")
+    for concurrency in args.levels:
+        result = asyncio.run(run_level(app, vault, concurrency, args.duration, args.edit_interval))
+        levels.append(result)
+        print(
+            f"{result['concurrency']:>5} {result['requests']:>6} {result['throughput_rps']:>8} "
+            f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+            f"{result['error_rate'] * 100:>5.1f}% {result['rejected_rate'] * 100:>5.1f}% {result['degraded']:>5}"
+        )
+
+    report = {
+        "levels": levels,
+        "saturates_at_concurrency": find_saturation(levels),
+        "races": race_checks.summary(),
+    }
+
+    print(f"\n📈 Throughput saturates at concurrency: {report['saturates_at_concurrency']}")
+    races = report["races"]
+    if races["total"]:
+        print(f"❌ RACES DETECTED: {races['total']} {races['by_kind']}")
+        for v in races["examples"]:
+            print(f"  - [{v['kind']}] {v['detail']} ({v['thread']})")
+    else:
+        print("✅ No data races detected")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
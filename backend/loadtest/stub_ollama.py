@@ -0,0 +1,62 @@
+"""
+Stub Ollama client for load tests.
+Embeddings are hashed bag-of-words vectors, so similar text gets similar
+vectors and any text's vector can be recomputed to verify an index.
+Generation just sleeps for a configurable latency.
+"""
+import hashlib
+import random
+import re
+import time
+
+import numpy as np
+
+DIM = 1024
+
+
+def stub_embed(text: str) -> np.ndarray:
+    vec = np.zeros(DIM, dtype="float32")
+    for word in re.findall(r"[a-z0-9]+", text.lower()):
+        h = int.from_bytes(hashlib.md5(word.encode()).digest()[:4], "little")
+        vec[h % DIM] += 1.0
+    if not vec.any():
+        vec[0] = 1.0
+    return vec
+
+
+class StubOllamaClient:
+    def __init__(self, generate_latency: float = 0.2, embed_latency: float = 0.005, jitter: float = 0.3):
+        self.generate_latency = generate_latency
+        self.embed_latency = embed_latency
+        self.jitter = jitter
+
+    def _sleep(self, base: float):
+        time.sleep(base * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def embeddings(self, model: str, prompt: str, **kwargs):
+        self._sleep(self.embed_latency)
+        return {"embedding": stub_embed(prompt).tolist()}
+
+    def embed(self, model: str, input: list[str], **kwargs):
+        self._sleep(self.embed_latency)
+        return {"embeddings": [stub_embed(text).tolist() for text in input]}
+
+    def generate(self, model: str, prompt: str, options: dict = None, **kwargs):
+        start = time.perf_counter()
+        self._sleep(self.generate_latency)
+        elapsed_ns = int((time.perf_counter() - start) * 1e9)
+        return {
+            "response": "Stub answer based on the allowed sentences.",
+            "total_duration": elapsed_ns,
+            "load_duration": 0,
+            "prompt_eval_count": len(prompt) // 4,
+            "prompt_eval_duration": elapsed_ns // 4,
+            "eval_count": 12,
+            "eval_duration": elapsed_ns - elapsed_ns // 4,
+        }
+
+
+def install(client: StubOllamaClient):
+    """Route every ollama_client call to `client`"""
+    import ollama_client
+    ollama_client.get_client = lambda kind="generate": client
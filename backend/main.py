@@ -1,7 +1,35 @@
+import threading
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+import embedders
+import ollama_client
+import runtime
+from assistant.admission import admission
+from memory.store import start_retention
+from config import OLLAMA_WARMUP_ON_STARTUP, EMBEDDING_BACKEND, REQUEST_THREADS_HEADROOM
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Sync endpoints run on anyio's thread pool (40 threads by default)
+    threads = runtime.settings["request_threads"]
+    anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+    admission.fit_threads(threads - REQUEST_THREADS_HEADROOM)
+    start_retention()
+
+    # Preload pinned models in the background so startup isn't blocked
+    if OLLAMA_WARMUP_ON_STARTUP:
+        threading.Thread(target=ollama_client.warm_up, daemon=True).start()
+    if EMBEDDING_BACKEND != "ollama":
+        threading.Thread(target=embedders.get_embedder, daemon=True).start()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 # 🔥 DEV-ONLY CORS: allow everything local
 app.add_middleware(
@@ -14,3 +42,6 @@ app.add_middleware(
 
 from assistant.router import router as assistant_router
 app.include_router(assistant_router)
+
+from assistant.batch import router as batch_router
+app.include_router(batch_router)
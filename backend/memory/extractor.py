@@ -1,5 +1,9 @@
 # memory/extractor.py
-import ollama
+import json
+import re
+
+import ollama_client
+from config import EXTRACTION_MODEL
 
 def extract_context_facts(question: str, answer: str) -> list[str]:
     prompt = f"""
@@ -18,13 +22,18 @@ ASSISTANT:
 {answer}
 """
 
-    res = ollama.generate(
-        model="mistral:7b-instruct",
+    res = ollama_client.generate(
+        model=EXTRACTION_MODEL,
         prompt=prompt,
         options={"temperature": 0.0, "num_predict": 100},
     )
 
+    # parse the first JSON array in the reply; never eval model output
+    match = re.search(r"\[.*\]", res["response"], re.DOTALL)
+    if not match:
+        return []
     try:
-        return eval(res["response"])  # safe enough for local
-    except:
+        facts = json.loads(match.group(0))
+    except json.JSONDecodeError:
         return []
+    return [f for f in facts if isinstance(f, str)][:3]
@@ -1,12 +1,10 @@
-import json
-from pathlib import Path
-
-MEMORY_PATH = Path(__file__).parent / "memory.json"
+# memory/memory.py
+# Profile memory now lives in the SQLite store (memory/store.py); these keep
+# the original load/save interface.
+from memory.store import get_memory_store
 
 def load_memory():
-    with open(MEMORY_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_memory_store().latest_profile()
 
 def save_memory(memory: dict):
-    with open(MEMORY_PATH, "w", encoding="utf-8") as f:
-        json.dump(memory, f, indent=2)
\ No newline at end of file
+    get_memory_store().save_profile(memory)
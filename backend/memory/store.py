@@ -0,0 +1,171 @@
+# memory/store.py
+"""
+SQLite-backed long-term memory.
+Every write is an INSERT into one append-only `memory_events` table; reads
+use indexes on (session, created), (topic, created) and (kind, key, id).
+Retention trims old facts and superseded profile rows, at startup and
+every MEMORY_RETENTION_INTERVAL (start_retention). The database is opened,
+and created, on first use, so a server that never touches memory has no
+memory.db.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from config import (
+    MEMORY_DB_PATH,
+    MEMORY_RETENTION_DAYS,
+    MEMORY_RETENTION_INTERVAL,
+    MEMORY_MAX_FACTS_PER_SESSION,
+)
+
+LEGACY_JSON_PATH = Path(__file__).parent / "memory.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory_events (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind    TEXT NOT NULL,          -- 'profile' | 'fact'
+    key     TEXT,
+    value   TEXT NOT NULL,          -- JSON
+    session TEXT,
+    topic   TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_session ON memory_events (session, created);
+CREATE INDEX IF NOT EXISTS idx_events_topic ON memory_events (topic, created);
+CREATE INDEX IF NOT EXISTS idx_events_kind_key ON memory_events (kind, key, id);
+"""
+
+
+class MemoryStore:
+    def __init__(self, path: Path = MEMORY_DB_PATH):
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+        self._migrate_json()
+
+    def _migrate_json(self):
+        """One-time import of the old memory.json profile"""
+        if self.latest_profile() or not LEGACY_JSON_PATH.exists():
+            return
+        with open(LEGACY_JSON_PATH, "r", encoding="utf-8") as f:
+            self.save_profile(json.load(f))
+
+    # -------------------------
+    # writes (append-only)
+    # -------------------------
+    def _append(self, rows: list[tuple]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO memory_events (kind, key, value, session, topic, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def save_profile(self, profile: dict):
+        """Append only the keys whose value changed"""
+        current = self.latest_profile()
+        now = time.time()
+        rows = [
+            ("profile", key, json.dumps(value), None, None, now)
+            for key, value in profile.items()
+            if key not in current or current[key] != value
+        ]
+        if rows:
+            self._append(rows)
+
+    def append_facts(self, facts: list[str], session: str = None, topic: str = None):
+        now = time.time()
+        self._append([("fact", None, json.dumps(f), session, topic, now) for f in facts])
+
+    # -------------------------
+    # reads
+    # -------------------------
+    def latest_profile(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value FROM memory_events WHERE id IN ("
+                "  SELECT MAX(id) FROM memory_events WHERE kind = 'profile' GROUP BY key"
+                ")"
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def facts(self, session: str = None, topic: str = None, limit: int = 20) -> list[str]:
+        """Most recent facts first, filtered by session and/or topic"""
+        query = "SELECT value FROM memory_events WHERE kind = 'fact'"
+        params = []
+        if session is not None:
+            query += " AND session = ?"
+            params.append(session)
+        if topic is not None:
+            query += " AND topic = ?"
+            params.append(topic)
+        query += " ORDER BY created DESC, id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [json.loads(value) for (value,) in rows]
+
+    # -------------------------
+    # retention
+    # -------------------------
+    def enforce_retention(self):
+        cutoff = time.time() - MEMORY_RETENTION_DAYS * 86400
+        with self._lock:
+            # facts past the retention window
+            self._conn.execute(
+                "DELETE FROM memory_events WHERE kind = 'fact' AND created < ?", (cutoff,)
+            )
+            # facts beyond the per-session cap, oldest first
+            self._conn.execute(
+                "DELETE FROM memory_events WHERE kind = 'fact' AND id IN ("
+                "  SELECT id FROM ("
+                "    SELECT id, ROW_NUMBER() OVER (PARTITION BY session ORDER BY created DESC, id DESC) AS rn"
+                "    FROM memory_events WHERE kind = 'fact'"
+                "  ) WHERE rn > ?"
+                ")",
+                (MEMORY_MAX_FACTS_PER_SESSION,),
+            )
+            # superseded profile values
+            self._conn.execute(
+                "DELETE FROM memory_events WHERE kind = 'profile' AND id NOT IN ("
+                "  SELECT MAX(id) FROM memory_events WHERE kind = 'profile' GROUP BY key"
+                ")"
+            )
+            self._conn.commit()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_memory_store() -> MemoryStore:
+    """Shared store, opened on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MemoryStore()
+        return _store
+
+
+def start_retention():
+    """Enforce retention now and every MEMORY_RETENTION_INTERVAL, whether or not extraction runs"""
+    threading.Thread(target=_retention_loop, daemon=True, name="memory-retention").start()
+
+
+def _retention_loop():
+    while True:
+        try:
+            # nothing to trim until something has written memory
+            if MEMORY_DB_PATH.exists():
+                get_memory_store().enforce_retention()
+        except Exception as e:
+            print("MEMORY RETENTION ERROR:", e)
+        time.sleep(MEMORY_RETENTION_INTERVAL)
@@ -0,0 +1,55 @@
+# memory/worker.py
+"""
+Background fact extraction.
+/ask enqueues finished exchanges; a single daemon thread runs the extractor
+model and appends facts, so extraction never sits on the response path.
+"""
+import queue
+import threading
+
+from config import MEMORY_QUEUE_SIZE
+from memory.context import update_context
+from memory.extractor import extract_context_facts
+from memory.store import get_memory_store
+
+_queue = queue.Queue(maxsize=MEMORY_QUEUE_SIZE)
+_started = False
+_start_lock = threading.Lock()
+
+
+def submit_exchange(question: str, answer: str, session: str = None, topic: str = None) -> bool:
+    """Non-blocking; drops the exchange if the queue is full"""
+    _ensure_started()
+    try:
+        _queue.put_nowait((question, answer, session, topic))
+        return True
+    except queue.Full:
+        print("⚠️ MEMORY QUEUE FULL - DROPPING EXCHANGE")
+        return False
+
+
+def pending() -> int:
+    return _queue.qsize()
+
+
+def _ensure_started():
+    global _started
+    with _start_lock:
+        if not _started:
+            threading.Thread(target=_run, daemon=True, name="memory-worker").start()
+            _started = True
+
+
+def _run():
+    # retention runs on its own timer (memory.store.start_retention)
+    while True:
+        question, answer, session, topic = _queue.get()
+        try:
+            facts = extract_context_facts(question, answer)
+            if facts:
+                get_memory_store().append_facts(facts, session=session, topic=topic)
+                update_context(facts)
+        except Exception as e:
+            print("MEMORY WORKER ERROR:", e)
+        finally:
+            _queue.task_done()
@@ -0,0 +1,42 @@
+"""
+In-process request metrics.
+Latencies are kept per outcome (answer, casual, refusal:<stage>) so refusals
+can be tracked separately from full answers.
+"""
+import threading
+from collections import defaultdict, deque
+
+WINDOW = 1000  # recent samples kept per outcome
+
+_latencies = defaultdict(lambda: deque(maxlen=WINDOW))
+_counts = defaultdict(int)
+_lock = threading.Lock()
+
+
+def record_latency(outcome: str, ms: float):
+    with _lock:
+        _latencies[outcome].append(ms)
+        _counts[outcome] += 1
+
+
+def _percentile(values: list, q: float) -> float:
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def latency_summary() -> dict:
+    with _lock:
+        snapshot = {k: sorted(v) for k, v in _latencies.items()}
+        counts = dict(_counts)
+
+    summary = {}
+    for outcome, values in snapshot.items():
+        if not values:
+            continue
+        summary[outcome] = {
+            "count": counts[outcome],
+            "mean_ms": round(sum(values) / len(values), 1),
+            "p50_ms": round(_percentile(values, 0.50), 1),
+            "p95_ms": round(_percentile(values, 0.95), 1),
+            "p99_ms": round(_percentile(values, 0.99), 1),
+        }
+    return summary
@@ -2,6 +2,8 @@ import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from pathlib import Path
 
+from models.token_pairs import tokenizer_fingerprint, encode_question, pair_batch
+
 class GroundingScorer:
     def __init__(self, model_dir: str, threshold: float = 0.5):
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -22,6 +24,7 @@ class GroundingScorer:
 
         self.model.to(self.device)
         self.model.eval()
+        self.fingerprint = tokenizer_fingerprint(self.tokenizer)
 
     def score(self, question: str, sentence: str) -> float:
         inputs = self.tokenizer(
@@ -42,6 +45,44 @@ class GroundingScorer:
         # label=1 is "allowed"
         return probs[0, 1].item()
 
+    def score_batch(self, question: str, sentences: list[str], tokens=None) -> list[float]:
+        """Score many sentences against one question in a single forward pass"""
+        return self.score_pairs([question] * len(sentences), sentences, tokens)
+
+    def score_pairs(self, questions: list[str], sentences: list[str], tokens=None) -> list[float]:
+        """
+        Score (questions[i], sentences[i]) pairs in a single forward pass.
+        With a vault TokenStore, sentence IDs come from ingestion and only
+        the questions are tokenized.
+        """
+        if not sentences:
+            return []
+
+        cached = None
+        if tokens is not None and tokens.fingerprint == self.fingerprint:
+            cached = tokens.lookup_sentences(sentences)
+
+        if cached is not None:
+            question_ids = [encode_question(self.tokenizer, q) for q in questions]
+            inputs = pair_batch(self.tokenizer, question_ids, cached, max_length=128)
+        else:
+            inputs = self.tokenizer(
+                questions,
+                sentences,
+                return_tensors="pt",
+                truncation=True,
+                padding=True,
+                max_length=128
+            )
+
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits
+            probs = torch.softmax(logits, dim=-1)
+
+        return probs[:, 1].tolist()
+
     def filter_sentences(self, question, sentences, top_k=5):
         scored = []
         for s in sentences:
@@ -1,79 +1,22 @@
-import json
-import torch
-from torch.utils.data import Dataset
-from transformers import (
-    AutoTokenizer,
-    AutoModelForSequenceClassification,
-    Trainer,
-    TrainingArguments
-)
+"""
+Retrain the intent classifier. Kept as the familiar entry point; the loop,
+cached tokenization and precision handling live in models/training.
 
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-DATA_PATH = "backend/models/intent_models/intent_data.jsonl"
-OUTPUT_DIR = "backend/models/intent_models/intent_model"
+Run from backend/:
+    python -m models.intent_models.train_intent
+"""
+import sys
 
-DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+from models.training import train
 
+DATA_PATH = "models/intent_models/intent_data.jsonl"
+OUTPUT_DIR = "models/intent_models/intent_model/final"
 
-class IntentDataset(Dataset):
-    def __init__(self, path, tokenizer):
-        self.samples = []
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                obj = json.loads(line)
-                self.samples.append(obj)
-        self.tokenizer = tokenizer
 
-    def __len__(self):
-        return len(self.samples)
-
-    def __getitem__(self, idx):
-        item = self.samples[idx]
-        enc = self.tokenizer(
-            item["text"],
-            truncation=True,
-            padding="max_length",
-            max_length=64,
-            return_tensors="pt",
-        )
-        return {
-            "input_ids": enc["input_ids"].squeeze(),
-            "attention_mask": enc["attention_mask"].squeeze(),
-            "labels": torch.tensor(item["label"], dtype=torch.long),
-        }
-
-
-def main():
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    model = AutoModelForSequenceClassification.from_pretrained(
-        MODEL_NAME,
-        num_labels=3
-    ).to(DEVICE)
-
-    dataset = IntentDataset(DATA_PATH, tokenizer)
-
-    args = TrainingArguments(
-        output_dir=OUTPUT_DIR,
-        per_device_train_batch_size=32,
-        num_train_epochs=6,
-        learning_rate=2e-5,
-        fp16=True,
-        logging_steps=20,
-        save_strategy="epoch",
-        report_to="none"
-    )
-
-    trainer = Trainer(
-        model=model,
-        args=args,
-        train_dataset=dataset,
-        tokenizer=tokenizer
-    )
-
-    trainer.train()
-
-    model.save_pretrained(f"{OUTPUT_DIR}/final")
-    tokenizer.save_pretrained(f"{OUTPUT_DIR}/final")
+def main(argv: list[str] = None):
+    """`argv` holds extra training options (--epochs, --precision, ...); defaults to the command line"""
+    extra = sys.argv[1:] if argv is None else argv
+    train.main(["intent", DATA_PATH, "--out", OUTPUT_DIR, *extra])
 
 
 if __name__ == "__main__":
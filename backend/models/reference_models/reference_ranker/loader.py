@@ -3,6 +3,8 @@ from torch import nn
 from transformers import AutoTokenizer, AutoModel
 from pathlib import Path
 
+from models.token_pairs import tokenizer_fingerprint, encode_question, pair_batch
+
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
 class Ranker(nn.Module):
@@ -38,16 +40,29 @@ class ReferenceRanker:
         )
         self.model.to(DEVICE)
         self.model.eval()
+        self.fingerprint = tokenizer_fingerprint(self.tokenizer)
+
+    def score(self, query: str, context: str, tokens=None) -> float:
+        context_ids = None
+        if tokens is not None and tokens.fingerprint == self.fingerprint:
+            context_ids = tokens.chunk_ids(context)
 
-    def score(self, query: str, context: str) -> float:
-        inputs = self.tokenizer(
-            query,
-            context,
-            return_tensors="pt",
-            truncation=True,
-            padding="max_length",
-            max_length=128
-        ).to(DEVICE)
+        if context_ids is not None:
+            # chunk IDs from ingestion; only the query is tokenized
+            pair = pair_batch(
+                self.tokenizer, [encode_question(self.tokenizer, query)], [context_ids],
+                max_length=128, pad_to_max=True,
+            )
+            inputs = {k: v.to(DEVICE) for k, v in pair.items()}
+        else:
+            inputs = self.tokenizer(
+                query,
+                context,
+                return_tensors="pt",
+                truncation=True,
+                padding="max_length",
+                max_length=128
+            ).to(DEVICE)
 
         with torch.no_grad():
             return self.model(
@@ -0,0 +1,65 @@
+"""
+Token-aware evidence packing for the sufficiency model.
+The model sees "Question: .. Intent: .. Evidence: 1. .. 2. .." in at most
+512 tokens. Sentences are deduplicated, then kept best-first in a single
+window when they fit. When they don't, the rest go into further windows
+(same header, renumbered from 1) instead of being cut off; the scorer
+runs all windows in one batch.
+"""
+import hashlib
+import json
+
+
+def normalize(sentence: str) -> str:
+    return " ".join(sentence.lower().split())
+
+
+def dedupe(sentences: list[str]) -> list[str]:
+    """Drop repeats and sentences contained in an earlier one; keeps order"""
+    kept, seen = [], []
+    for sentence in sentences:
+        norm = normalize(sentence)
+        if not norm or any(norm in other for other in seen):
+            continue
+        kept.append(sentence)
+        seen.append(norm)
+    return kept
+
+
+def cache_key(question: str, sentences: list[str], intent: str) -> tuple:
+    """Scores are cached per (question, intent, ordered evidence list)"""
+    evidence = hashlib.sha1(json.dumps(sentences).encode("utf-8")).hexdigest()
+    return question, intent, evidence
+
+
+def pack(header: list, sentences: list, number_ids, budget: int, max_windows: int):
+    """
+    Fill windows of header + numbered sentences, in order, up to `budget`
+    tokens each; `number_ids(n)` gives the IDs of "{n}.". Returns (windows
+    as lists of sentence indices, count of sentences left out past
+    max_windows). A sentence too long for any window gets one of its own
+    and is truncated there.
+    """
+    windows, current, used = [], [], len(header)
+    for i, sentence_ids in enumerate(sentences):
+        cost = len(number_ids(len(current) + 1)) + len(sentence_ids)
+        if current and used + cost > budget:
+            windows.append(current)
+            current, used = [], len(header)
+            cost = len(number_ids(1)) + len(sentence_ids)
+        current.append(i)
+        used += cost
+    if current:
+        windows.append(current)
+
+    dropped = sum(len(w) for w in windows[max_windows:])
+    return windows[:max_windows], dropped
+
+
+def window_ids(header: list, sentences: list, number_ids, window: list[int]) -> list:
+    """Token IDs of one window, numbered from 1"""
+    ids = list(header)
+    for n, i in enumerate(window, 1):
+        ids.extend(number_ids(n))
+        ids.extend(sentences[i])
+    return ids
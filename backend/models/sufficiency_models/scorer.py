@@ -1,11 +1,39 @@
 # backend/models/sufficiency_models/scorer.py
 
+import threading
+from collections import OrderedDict
+
 import torch
 from transformers import AutoTokenizer
 from .model import SufficiencyModel
+from .evidence import cache_key, dedupe, pack, window_ids
+from models.token_pairs import tokenizer_fingerprint, encode_batch, encode_question, single_batch
+
+MAX_LENGTH = 512
+
+
+def format_input(question: str, sentences: list[str], intent: str) -> str:
+    """The text the sufficiency model was trained on"""
+    lines = [
+        f"Question: {question}",
+        f"Intent: {intent}",
+        "Evidence:"
+    ]
+    for i, s in enumerate(sentences, 1):
+        lines.append(f"{i}. {s}")
+    return "\n".join(lines)
+
 
 class SufficiencyScorer:
-    def __init__(self, model_path: str, base_model: str, device=None):
+    """
+    Evidence is deduplicated and packed into 512-token windows (see
+    evidence.py); overflow windows are scored in the same forward pass and
+    the best window counts, since evidence that suffices on its own still
+    suffices alongside more. Scores are cached per (question, intent,
+    evidence set).
+    """
+
+    def __init__(self, model_path: str, base_model: str, device=None, cache_size: int = 2048, max_windows: int = 4):
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
 
         self.tokenizer = AutoTokenizer.from_pretrained(
@@ -19,29 +47,111 @@ class SufficiencyScorer:
         )
         self.model.to(self.device)
         self.model.eval()
+        self.fingerprint = tokenizer_fingerprint(self.tokenizer)
+
+        self.max_windows = max_windows
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # (question, intent, evidence hash) -> score
+        self._cache_lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "duplicates_removed": 0, "overflow_windows": 0, "sentences_dropped": 0}
 
     def _format_input(self, question: str, sentences: list[str], intent: str) -> str:
-        lines = [
-            f"Question: {question}",
-            f"Intent: {intent}",
-            "Evidence:"
-        ]
-        for i, s in enumerate(sentences, 1):
-            lines.append(f"{i}. {s}")
-        return "\n".join(lines)
+        return format_input(question, sentences, intent)
+
+    # -------------------------
+    # packing
+    # -------------------------
+    def _sentence_ids(self, sentences: list[str], tokens) -> list:
+        """Ingested IDs where available; the rest are tokenized here"""
+        if tokens is not None and tokens.fingerprint == self.fingerprint:
+            ids = [tokens.sentence_ids(s) for s in sentences]
+        else:
+            ids = [None] * len(sentences)
+        missing = [i for i, x in enumerate(ids) if x is None]
+        if missing:
+            for i, x in zip(missing, encode_batch(self.tokenizer, [sentences[i] for i in missing])):
+                ids[i] = x
+        return [x.tolist() if hasattr(x, "tolist") else list(x) for x in ids]
+
+    def _number_ids(self, n: int) -> tuple:
+        return encode_question(self.tokenizer, f"{n}.")
+
+    def _windows(self, question: str, sentences: list[str], intent: str, tokens) -> list[list]:
+        """
+        Token IDs of each window for one item. Pieces join on whitespace,
+        so WordPiece gives the same IDs as tokenizing _format_input's text.
+        """
+        header = encode_question(self.tokenizer, f"Question: {question}\nIntent: {intent}\nEvidence:")
+        sentence_ids = self._sentence_ids(sentences, tokens)
+        windows, dropped = pack(header, sentence_ids, self._number_ids, MAX_LENGTH - 2, self.max_windows)
+        windows = windows or [[]]  # no evidence: the header alone, as before
+
+        with self._cache_lock:
+            self.stats["overflow_windows"] += len(windows) - 1
+            self.stats["sentences_dropped"] += dropped
+        return [window_ids(header, sentence_ids, self._number_ids, w) for w in windows]
+
+    # -------------------------
+    # cache
+    # -------------------------
+    def _cached(self, key):
+        with self._cache_lock:
+            score = self._cache.get(key)
+            if score is None:
+                self.stats["misses"] += 1
+                return None
+            self._cache.move_to_end(key)
+            self.stats["hits"] += 1
+            return score
+
+    def _store(self, key, score: float):
+        with self._cache_lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def cache_stats(self) -> dict:
+        with self._cache_lock:
+            return {"entries": len(self._cache), **self.stats}
+
+    # -------------------------
+    # scoring
+    # -------------------------
+    def score(self, question: str, sentences: list[str], intent: str, tokens=None, use_cache: bool = True) -> float:
+        return self.score_batch([(question, sentences, intent)], tokens, use_cache)[0]
 
     @torch.inference_mode()
-    def score(self, question: str, sentences: list[str], intent: str) -> float:
-        text = self._format_input(question, sentences, intent)
-
-        enc = self.tokenizer(
-            text,
-            truncation=True,
-            padding=True,
-            max_length=512,
-            return_tensors="pt"
-        )
+    def score_batch(self, items: list[tuple[str, list[str], str]], tokens=None, use_cache: bool = True) -> list[float]:
+        """
+        score() for many (question, sentences, intent) items: every window
+        of every uncached item goes through one forward pass. use_cache=False
+        always runs the model (benchmarks).
+        """
+        if not items:
+            return []
+
+        scores = [None] * len(items)
+        rows, owners, keys = [], [], {}
+        for n, (question, sentences, intent) in enumerate(items):
+            unique = dedupe(sentences)
+            with self._cache_lock:
+                self.stats["duplicates_removed"] += len(sentences) - len(unique)
+            key = cache_key(question, unique, intent)
+            scores[n] = self._cached(key) if use_cache else None
+            if scores[n] is None:
+                keys[n] = key
+                for ids in self._windows(question, unique, intent, tokens):
+                    rows.append(ids)
+                    owners.append(n)
+
+        if rows:
+            enc = single_batch(self.tokenizer, rows, max_length=MAX_LENGTH)
+            enc = {k: v.to(self.device) for k, v in enc.items()}
+            window_scores = self.model(**enc).reshape(-1).tolist()
+            for n, s in zip(owners, window_scores):
+                scores[n] = max(scores[n] if scores[n] is not None else 0.0, float(s))
+            for n, key in keys.items():
+                self._store(key, scores[n])
 
-        enc = {k: v.to(self.device) for k, v in enc.items()}
-        score = self.model(**enc).item()
-        return float(score)
+        return scores
@@ -0,0 +1,104 @@
+"""
+Build BERT input tensors from token IDs tokenized ahead of time.
+Vault sentences and chunks are tokenized once at ingestion (see
+vault/token_store.py); the scorers only tokenize the question, then
+assemble [CLS] q [SEP] passage [SEP] pairs from the cached IDs. WordPiece
+never merges across whitespace or punctuation, so this yields the same
+IDs as tokenizing the pair as a whole.
+"""
+import hashlib
+import json
+from functools import lru_cache
+
+import torch
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Identifies vocab + normalization; cached IDs are only valid for a matching tokenizer"""
+    spec = json.loads(tokenizer.backend_tokenizer.to_str())
+    relevant = {k: spec.get(k) for k in ("normalizer", "pre_tokenizer", "model")}
+    return hashlib.md5(json.dumps(relevant, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def encode_batch(tokenizer, texts: list[str]) -> list[list[int]]:
+    """Token IDs without special tokens or truncation"""
+    return tokenizer(texts, add_special_tokens=False, truncation=False)["input_ids"]
+
+
+@lru_cache(maxsize=4096)
+def _encode_cached(tokenizer, text: str) -> tuple:
+    return tuple(tokenizer(text, add_special_tokens=False, truncation=False)["input_ids"])
+
+
+def encode_question(tokenizer, text: str) -> tuple:
+    """Questions repeat across grounding batches of one request, so they're memoized"""
+    return _encode_cached(tokenizer, text)
+
+
+def _as_list(ids) -> list:
+    return ids.tolist() if hasattr(ids, "tolist") else list(ids)
+
+
+def _longest_first(n1: int, n2: int, budget: int):
+    """
+    Lengths kept by truncation="longest_first"; a port of LongestFirst in
+    HF tokenizers (utils/truncation.rs). The shorter sequence is kept whole
+    if it fits in half the budget; otherwise each gets half, and the longer
+    one takes the odd token.
+    """
+    if n1 + n2 <= budget:
+        return n1, n2
+    swap = n1 > n2
+    if swap:
+        n1, n2 = n2, n1
+    n2 = max(n1, budget - n1)
+    if n1 + n2 > budget:
+        n1 = budget // 2
+        n2 = n1 + budget % 2
+    return (n2, n1) if swap else (n1, n2)
+
+
+def pair_batch(tokenizer, first: list, second: list, max_length: int, pad_to_max: bool = False) -> dict:
+    """
+    Tensors for (first[i], second[i]) ID pairs, truncated longest-first to
+    max_length and padded to the longest row (or max_length).
+    """
+    cls_id, sep_id, pad_id = tokenizer.cls_token_id, tokenizer.sep_token_id, tokenizer.pad_token_id
+    budget = max_length - 3
+
+    rows = []
+    for a, b in zip(first, second):
+        n1, n2 = _longest_first(len(a), len(b), budget)
+        rows.append((_as_list(a[:n1]), _as_list(b[:n2])))
+
+    width = max_length if pad_to_max else max(len(a) + len(b) + 3 for a, b in rows)
+    input_ids = torch.full((len(rows), width), pad_id, dtype=torch.long)
+    token_type_ids = torch.zeros((len(rows), width), dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+
+    for i, (a, b) in enumerate(rows):
+        ids = [cls_id, *a, sep_id, *b, sep_id]
+        input_ids[i, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+        token_type_ids[i, len(a) + 2:len(ids)] = 1
+        attention_mask[i, :len(ids)] = 1
+
+    return {"input_ids": input_ids, "token_type_ids": token_type_ids, "attention_mask": attention_mask}
+
+
+def single_batch(tokenizer, sequences: list, max_length: int) -> dict:
+    """Tensors for single sequences: [CLS] ids [SEP], truncated to max_length"""
+    cls_id, sep_id, pad_id = tokenizer.cls_token_id, tokenizer.sep_token_id, tokenizer.pad_token_id
+    rows = [[cls_id, *_as_list(seq[:max_length - 2]), sep_id] for seq in sequences]
+
+    width = max(len(r) for r in rows)
+    input_ids = torch.full((len(rows), width), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+    for i, ids in enumerate(rows):
+        input_ids[i, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[i, :len(ids)] = 1
+
+    return {
+        "input_ids": input_ids,
+        "token_type_ids": torch.zeros_like(input_ids),
+        "attention_mask": attention_mask,
+    }
@@ -0,0 +1,186 @@
+"""
+Cached, length-bucketed training data for the four model heads.
+A JSONL file is tokenized once per (task, tokenizer, max_length) and cached
+as flat NumPy arrays; later runs and every epoch read token IDs straight
+from the cache. Batches are drawn from buckets of similar length and
+padded only to the longest sample in the batch.
+
+Input formats (one JSON object per line):
+    intent       {"text": str, "label": int}
+    grounding    {"question": str, "sentence": str, "label": 0|1}
+    reference    {"query": str, "positive": str, "negative": str}
+    sufficiency  {"question": str, "sentences": [str], "intent": str, "score": float}
+"""
+import hashlib
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset, Sampler
+
+from models.token_pairs import tokenizer_fingerprint
+from models.sufficiency_models.scorer import format_input
+
+# task -> (input fields, max_length, label field, label dtype)
+TASKS = {
+    "intent": {"fields": [("text",)], "max_length": 64, "label": "label", "dtype": np.int64},
+    "grounding": {"fields": [("question", "sentence")], "max_length": 128, "label": "label", "dtype": np.int64},
+    "reference": {"fields": [("query", "positive"), ("query", "negative")], "max_length": 128, "label": None, "dtype": None},
+    "sufficiency": {"fields": [("evidence",)], "max_length": 512, "label": "score", "dtype": np.float32},
+}
+
+
+def read_jsonl(path: Path) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _texts(task: str, row: dict) -> dict:
+    if task == "sufficiency":
+        return {"evidence": format_input(row["question"], row["sentences"], row["intent"])}
+    return row
+
+
+# =========================
+# Cache
+# =========================
+def cache_key(task: str, path: Path, tokenizer, max_length: int) -> str:
+    h = hashlib.md5()
+    h.update(Path(path).read_bytes())
+    h.update(f"{task}|{max_length}|{tokenizer_fingerprint(tokenizer)}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _encode(tokenizer, first: list[str], second: list[str], max_length: int):
+    enc = tokenizer(
+        first,
+        second,
+        truncation=True,
+        max_length=max_length,
+        return_token_type_ids=True,
+    )
+    return enc["input_ids"], enc["token_type_ids"]
+
+
+def _pack(rows: list[list[int]]):
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows], out=offsets[1:])
+    flat = np.fromiter((t for r in rows for t in r), dtype=np.int32, count=int(offsets[-1]))
+    return flat, offsets
+
+
+def build_cache(task: str, path: Path, tokenizer, cache_dir: Path, max_length: int = None) -> Path:
+    """Tokenize `path` once; returns the cached .npz (reused if inputs are unchanged)"""
+    spec = TASKS[task]
+    max_length = max_length or spec["max_length"]
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    out = cache_dir / f"{task}-{cache_key(task, path, tokenizer, max_length)}.npz"
+    if out.exists():
+        return out
+
+    rows = [_texts(task, r) for r in read_jsonl(path)]
+    arrays = {}
+    for i, fields in enumerate(spec["fields"]):
+        first = [r[fields[0]] for r in rows]
+        second = [r[fields[1]] for r in rows] if len(fields) == 2 else None
+        ids, types = _encode(tokenizer, first, second, max_length)
+        arrays[f"ids{i}"], arrays[f"offsets{i}"] = _pack(ids)
+        arrays[f"types{i}"], _ = _pack(types)
+    if spec["label"] is not None:
+        arrays["labels"] = np.array([r[spec["label"]] for r in rows], dtype=spec["dtype"])
+
+    np.savez(out, **arrays)
+    print(f"💾 CACHED {len(rows)} {task} samples -> {out.name}")
+    return out
+
+
+# =========================
+# Dataset + batching
+# =========================
+class CachedDataset(Dataset):
+    """Unpadded token IDs from a build_cache() file"""
+
+    def __init__(self, task: str, cache_path: Path):
+        self.task = task
+        data = np.load(cache_path)
+        self.n_inputs = len(TASKS[task]["fields"])
+        self.ids = [data[f"ids{i}"] for i in range(self.n_inputs)]
+        self.types = [data[f"types{i}"] for i in range(self.n_inputs)]
+        self.offsets = [data[f"offsets{i}"] for i in range(self.n_inputs)]
+        self.labels = data["labels"] if "labels" in data else None
+        self.lengths = np.max([np.diff(o) for o in self.offsets], axis=0)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def __getitem__(self, idx):
+        item = {}
+        for i in range(self.n_inputs):
+            start, end = self.offsets[i][idx], self.offsets[i][idx + 1]
+            item[f"input_ids{i}"] = self.ids[i][start:end]
+            item[f"token_type_ids{i}"] = self.types[i][start:end]
+        if self.labels is not None:
+            item["labels"] = self.labels[idx]
+        return item
+
+
+class LengthBucketSampler(Sampler):
+    """
+    Yields batches of indices with similar lengths: shuffle, cut into pools
+    of `pool_batches` batches, sort each pool by length, batch it, then
+    shuffle the batch order.
+    """
+
+    def __init__(self, lengths, batch_size: int, pool_batches: int = 50, seed: int = 0):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.pool = batch_size * pool_batches
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __iter__(self):
+        rng = random.Random(self.seed + self.epoch)
+        order = list(range(len(self.lengths)))
+        rng.shuffle(order)
+
+        batches = []
+        for i in range(0, len(order), self.pool):
+            pool = sorted(order[i:i + self.pool], key=lambda j: self.lengths[j])
+            batches.extend(pool[k:k + self.batch_size] for k in range(0, len(pool), self.batch_size))
+        rng.shuffle(batches)
+        return iter(batches)
+
+    def __len__(self):
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+
+def make_collate(pad_id: int):
+    """Pads each input only to the longest sample of the batch"""
+
+    def collate(items: list[dict]) -> dict:
+        batch = {}
+        n_inputs = sum(1 for k in items[0] if k.startswith("input_ids"))
+        for i in range(n_inputs):
+            width = max(len(it[f"input_ids{i}"]) for it in items)
+            ids = torch.full((len(items), width), pad_id, dtype=torch.long)
+            types = torch.zeros((len(items), width), dtype=torch.long)
+            mask = torch.zeros((len(items), width), dtype=torch.long)
+            for row, it in enumerate(items):
+                n = len(it[f"input_ids{i}"])
+                ids[row, :n] = torch.from_numpy(it[f"input_ids{i}"].astype(np.int64))
+                types[row, :n] = torch.from_numpy(it[f"token_type_ids{i}"].astype(np.int64))
+                mask[row, :n] = 1
+            suffix = "" if n_inputs == 1 else str(i)
+            batch[f"input_ids{suffix}"] = ids
+            batch[f"token_type_ids{suffix}"] = types
+            batch[f"attention_mask{suffix}"] = mask
+        if "labels" in items[0]:
+            batch["labels"] = torch.tensor(np.array([it["labels"] for it in items]))
+        return batch
+
+    return collate
@@ -0,0 +1,214 @@
+"""
+Retrain any of the four heads on the cached data pipeline.
+Precision follows the device unless overridden: bf16 autocast on GPUs
+that support it, fp16 + loss scaling on older GPUs, fp32 on CPU.
+Each epoch reports samples/sec, tokens/sec and how much of the batch
+was padding.
+
+Run from backend/:
+    python -m models.training.train intent models/intent_models/intent_data.jsonl
+    python -m models.training.train reference models/reference_models/reference_pairs_1000.json
+"""
+import argparse
+import contextlib
+import json
+import time
+from pathlib import Path
+
+import torch
+from torch import nn
+from torch.utils.data import DataLoader
+from transformers import AutoModel, AutoModelForSequenceClassification, AutoTokenizer
+
+from config import TRAINING_CACHE_DIR
+from models.training.data import TASKS, build_cache, CachedDataset, LengthBucketSampler, make_collate
+
+BASE_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Where each head's loader expects its files (relative to backend/)
+OUTPUT_DIRS = {
+    "intent": "models/intent_models/intent_model/final",
+    "grounding": "models/grounding_models/grounding_model",
+    "reference": "models/reference_models/reference_ranker",
+    "sufficiency": "models/sufficiency_models",
+}
+DEFAULTS = {  # epochs, batch size, learning rate
+    "intent": (6, 32, 2e-5),
+    "grounding": (3, 32, 2e-5),
+    "reference": (3, 32, 2e-5),
+    "sufficiency": (3, 16, 2e-5),
+}
+
+
+# =========================
+# Precision
+# =========================
+def pick_precision(device: str, requested: str = "auto") -> str:
+    if requested != "auto":
+        return requested
+    if device != "cuda":
+        return "fp32"
+    return "bf16" if torch.cuda.is_bf16_supported() else "fp16"
+
+
+def autocast(device: str, precision: str):
+    if precision == "fp32":
+        return contextlib.nullcontext()
+    dtype = torch.bfloat16 if precision == "bf16" else torch.float16
+    return torch.autocast(device_type=device, dtype=dtype)
+
+
+# =========================
+# Heads
+# =========================
+class Head:
+    """Model + loss for one task; save() writes what the runtime loader reads"""
+
+    def __init__(self, task: str, tokenizer, device: str):
+        self.task = task
+        self.tokenizer = tokenizer
+        self.device = device
+
+        if task in ("intent", "grounding"):
+            self.model = AutoModelForSequenceClassification.from_pretrained(
+                BASE_MODEL, num_labels=3 if task == "intent" else 2
+            )
+        elif task == "reference":
+            from models.reference_models.reference_ranker.loader import Ranker
+            self.model = Ranker(AutoModel.from_pretrained(BASE_MODEL))
+        else:
+            from models.sufficiency_models.model import SufficiencyModel
+            self.model = SufficiencyModel(BASE_MODEL)
+        self.model.to(device)
+
+    def loss(self, batch: dict) -> torch.Tensor:
+        if self.task in ("intent", "grounding"):
+            return self.model(
+                input_ids=batch["input_ids"],
+                token_type_ids=batch["token_type_ids"],
+                attention_mask=batch["attention_mask"],
+                labels=batch["labels"],
+            ).loss
+
+        if self.task == "reference":
+            pos = self.model(input_ids=batch["input_ids0"], attention_mask=batch["attention_mask0"])
+            neg = self.model(input_ids=batch["input_ids1"], attention_mask=batch["attention_mask1"])
+            return nn.functional.margin_ranking_loss(
+                pos.float(), neg.float(), torch.ones_like(pos, dtype=torch.float), margin=1.0
+            )
+
+        pred = self.model(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"])
+        return nn.functional.mse_loss(pred.float(), batch["labels"].float())
+
+    def save(self, out_dir: Path):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        if self.task in ("intent", "grounding"):
+            self.model.save_pretrained(out_dir)
+            self.tokenizer.save_pretrained(out_dir)
+        elif self.task == "reference":
+            torch.save(self.model.state_dict(), out_dir / "model.pt")
+            # same layout as export_reference_model.py; ReferenceRanker
+            # rebuilds the encoder from BASE_MODEL and loads model.pt over it
+            self.tokenizer.save_pretrained(out_dir / "tokenizer")
+        else:
+            torch.save(self.model.state_dict(), out_dir / "model.pt")
+
+
+# =========================
+# Loop
+# =========================
+def train(head: Head, dataset: CachedDataset, epochs: int, batch_size: int, lr: float, precision: str) -> dict:
+    sampler = LengthBucketSampler(dataset.lengths, batch_size)
+    loader = DataLoader(
+        dataset,
+        batch_sampler=sampler,
+        collate_fn=make_collate(head.tokenizer.pad_token_id),
+    )
+    optimizer = torch.optim.AdamW(head.model.parameters(), lr=lr)
+    scaler = torch.amp.GradScaler("cuda", enabled=precision == "fp16")
+
+    history = []
+    head.model.train()
+    for epoch in range(epochs):
+        sampler.set_epoch(epoch)
+        samples = tokens = padded = 0
+        total_loss = 0.0
+        start = time.perf_counter()
+
+        for batch in loader:
+            batch = {k: v.to(head.device) for k, v in batch.items()}
+            with autocast(head.device, precision):
+                loss = head.loss(batch)
+
+            optimizer.zero_grad(set_to_none=True)
+            scaler.scale(loss).backward()
+            scaler.step(optimizer)
+            scaler.update()
+
+            masks = [v for k, v in batch.items() if k.startswith("attention_mask")]
+            samples += masks[0].shape[0]
+            tokens += sum(int(m.sum()) for m in masks)
+            padded += sum(m.numel() for m in masks)
+            total_loss += loss.item() * masks[0].shape[0]
+
+        if head.device == "cuda":
+            torch.cuda.synchronize()
+        elapsed = time.perf_counter() - start
+        stats = {
+            "epoch": epoch + 1,
+            "loss": round(total_loss / samples, 4),
+            "samples_per_sec": round(samples / elapsed, 1),
+            "tokens_per_sec": round(tokens / elapsed, 1),
+            "padding_pct": round((1 - tokens / padded) * 100, 1),
+            "seconds": round(elapsed, 1),
+        }
+        history.append(stats)
+        print(
+            f"📈 epoch {stats['epoch']}: loss {stats['loss']} | {stats['samples_per_sec']} samples/s | "
+            f"{stats['tokens_per_sec']} tokens/s | {stats['padding_pct']}% padding"
+        )
+
+    head.model.eval()
+    return {"epochs": history}
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Train a model head on cached, bucketed data")
+    parser.add_argument("task", choices=list(TASKS))
+    parser.add_argument("data", type=Path, help="training JSONL")
+    parser.add_argument("--out", type=Path, help="defaults to where the runtime loads this head from")
+    parser.add_argument("--epochs", type=int)
+    parser.add_argument("--batch-size", type=int)
+    parser.add_argument("--lr", type=float)
+    parser.add_argument("--max-length", type=int, help="defaults per task")
+    parser.add_argument("--precision", choices=["auto", "fp32", "fp16", "bf16"], default="auto")
+    args = parser.parse_args(argv)
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    precision = pick_precision(device, args.precision)
+    epochs, batch_size, lr = DEFAULTS[args.task]
+
+    tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL)
+    cache = build_cache(args.task, args.data, tokenizer, TRAINING_CACHE_DIR, args.max_length)
+    dataset = CachedDataset(args.task, cache)
+    print(f"🧠 {args.task}: {len(dataset)} samples on {device} ({precision})")
+
+    head = Head(args.task, tokenizer, device)
+    report = train(
+        head, dataset,
+        epochs=args.epochs or epochs,
+        batch_size=args.batch_size or batch_size,
+        lr=args.lr or lr,
+        precision=precision,
+    )
+
+    out = args.out or Path(OUTPUT_DIRS[args.task])
+    head.save(out)
+    report.update({"task": args.task, "device": device, "precision": precision, "samples": len(dataset)})
+    with open(TRAINING_CACHE_DIR / f"{args.task}-last-run.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Saved {args.task} head to {out}")
+
+
+if __name__ == "__main__":
+    main()
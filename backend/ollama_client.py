@@ -0,0 +1,166 @@
+"""
+Shared Ollama client layer.
+All generate/embedding calls go through one pooled HTTP transport, pin
+keep_alive for the resident models, apply a per-call-kind timeout and
+record Ollama's load vs. eval timings.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+
+import httpx
+import ollama
+
+from config import (
+    OLLAMA_HOST,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_TIMEOUTS,
+    OLLAMA_POOL_SIZE,
+    OLLAMA_NUM_CTX,
+    EMBEDDING_MODEL,
+    EMBEDDING_BACKEND,
+)
+
+STATS_WINDOW = 200  # recent calls kept per (model, kind)
+
+# One transport = one connection pool, shared by every timeout profile
+_transport = httpx.HTTPTransport(
+    limits=httpx.Limits(
+        max_connections=OLLAMA_POOL_SIZE,
+        max_keepalive_connections=OLLAMA_POOL_SIZE,
+    )
+)
+_clients = {}
+_clients_lock = threading.Lock()
+
+_stats = defaultdict(lambda: deque(maxlen=STATS_WINDOW))
+_stats_lock = threading.Lock()
+
+
+def get_client(kind: str = "generate") -> ollama.Client:
+    timeout = OLLAMA_TIMEOUTS.get(kind)
+    with _clients_lock:
+        client = _clients.get(timeout)
+        if client is None:
+            client = ollama.Client(host=OLLAMA_HOST, timeout=timeout, transport=_transport)
+            _clients[timeout] = client
+        return client
+
+
+def _field(res, name):
+    if isinstance(res, dict):
+        return res.get(name)
+    return getattr(res, name, None)
+
+
+def _ns_to_ms(value):
+    return round(value / 1e6, 2) if value else 0.0
+
+
+def response_stats(res, wall: float = 0.0) -> dict:
+    """Ollama's own timings for one call, in ms, plus token counts"""
+    return {
+        "wall_ms": round(wall * 1000, 2),
+        "total_ms": _ns_to_ms(_field(res, "total_duration")),
+        "load_ms": _ns_to_ms(_field(res, "load_duration")),
+        "prompt_eval_ms": _ns_to_ms(_field(res, "prompt_eval_duration")),
+        "eval_ms": _ns_to_ms(_field(res, "eval_duration")),
+        "prompt_eval_count": _field(res, "prompt_eval_count") or 0,
+        "eval_count": _field(res, "eval_count") or 0,
+    }
+
+
+def _record(model: str, kind: str, res, wall: float) -> dict:
+    entry = response_stats(res, wall)
+    with _stats_lock:
+        _stats[(model, kind)].append(entry)
+    return entry
+
+
+# =========================
+# Calls
+# =========================
+def generate(model: str, prompt: str, options: dict = None, kind: str = "generate", **kwargs):
+    if model in OLLAMA_NUM_CTX:
+        options = {**(options or {}), "num_ctx": OLLAMA_NUM_CTX[model]}
+
+    start = time.perf_counter()
+    res = get_client(kind).generate(
+        model=model,
+        prompt=prompt,
+        options=options,
+        keep_alive=OLLAMA_KEEP_ALIVE.get(model),
+        **kwargs,
+    )
+    _record(model, kind, res, time.perf_counter() - start)
+    return res
+
+
+def embeddings(model: str, prompt: str, kind: str = "embed"):
+    # /api/embeddings reports no timings, so only wall time is meaningful here
+    start = time.perf_counter()
+    res = get_client(kind).embeddings(
+        model=model,
+        prompt=prompt,
+        keep_alive=OLLAMA_KEEP_ALIVE.get(model),
+    )
+    _record(model, kind, res, time.perf_counter() - start)
+    return res
+
+
+def embed_batch(model: str, texts: list[str], kind: str = "embed"):
+    """Many inputs in one /api/embed call; returns {"embeddings": [...], ...}"""
+    start = time.perf_counter()
+    res = get_client(kind).embed(
+        model=model,
+        input=texts,
+        keep_alive=OLLAMA_KEEP_ALIVE.get(model),
+    )
+    _record(model, kind, res, time.perf_counter() - start)
+    return res
+
+
+def last_call_stats(model: str, kind: str = "generate") -> dict:
+    with _stats_lock:
+        calls = _stats.get((model, kind))
+        return dict(calls[-1]) if calls else {}
+
+
+# =========================
+# Warm-up
+# =========================
+def warm_up():
+    """Load the pinned models so the first real query doesn't pay for it"""
+    for model in OLLAMA_KEEP_ALIVE:
+        if model == EMBEDDING_MODEL and EMBEDDING_BACKEND != "ollama":
+            continue  # embeddings run in-process
+        try:
+            start = time.perf_counter()
+            if model == EMBEDDING_MODEL:
+                embeddings(model, "warm-up", kind="warmup")
+            else:
+                # an empty prompt only loads the model
+                generate(model, "", kind="warmup")
+            print(f"🔥 WARMED: {model} in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            print(f"⚠️ WARM-UP FAILED: {model}: {e}")
+
+
+# =========================
+# Stats
+# =========================
+def stats_summary() -> dict:
+    """Mean and p95 of load vs. eval timings over recent calls"""
+    with _stats_lock:
+        snapshot = {key: list(calls) for key, calls in _stats.items()}
+
+    summary = {}
+    for (model, kind), calls in snapshot.items():
+        row = {"calls": len(calls)}
+        for field in ("wall_ms", "load_ms", "prompt_eval_ms", "eval_ms"):
+            values = sorted(c[field] for c in calls)
+            row[f"{field}_mean"] = round(sum(values) / len(values), 2)
+            row[f"{field}_p95"] = values[min(int(len(values) * 0.95), len(values) - 1)]
+        row["cold_loads"] = sum(1 for c in calls if c["load_ms"] > 1000)
+        summary[f"{model}/{kind}"] = row
+    return summary
@@ -0,0 +1,91 @@
+"""
+CPU thread settings for in-process inference.
+torch, FAISS (OpenMP), HuggingFace tokenizers and the /ask executors all
+default to "use every core", so under concurrency they oversubscribe the
+machine. This module resolves one consistent budget from config and
+applies it once, before any model is loaded. Import it before torch/faiss
+do real work; `python -m assistant.bench_runtime` sweeps the settings.
+"""
+import os
+
+from config import (
+    RUNTIME_CORES,
+    TORCH_INTRA_OP_THREADS,
+    TORCH_INTER_OP_THREADS,
+    FAISS_OMP_THREADS,
+    TOKENIZERS_PARALLELISM,
+    PIPELINE_WORKERS,
+    REQUEST_THREADS,
+    REQUEST_THREADS_HEADROOM,
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+)
+
+
+def available_cores() -> int:
+    """Cores this process may run on (respects taskset / container cpusets)"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def resolve(cores: int = None) -> dict:
+    """
+    Fill in every setting left as None in config.
+    Concurrent stages each get a small slice of the cores instead of all of
+    them: workers * intra-op threads ~= cores.
+    """
+    cores = cores or RUNTIME_CORES or available_cores()
+
+    workers = PIPELINE_WORKERS or max(4, min(32, cores // 2))
+    torch_threads = TORCH_INTRA_OP_THREADS or max(1, cores // workers)
+
+    return {
+        "cores": cores,
+        "pipeline_workers": workers,
+        # every running and queued /ask holds a request thread; if they ran
+        # out, extra requests would block in anyio instead of getting a 429
+        "request_threads": REQUEST_THREADS or (
+            ADMISSION_MAX_CONCURRENT + ADMISSION_MAX_QUEUE + REQUEST_THREADS_HEADROOM
+        ),
+        "torch_intra_op_threads": torch_threads,
+        "torch_inter_op_threads": TORCH_INTER_OP_THREADS,
+        "faiss_omp_threads": FAISS_OMP_THREADS or torch_threads,
+        "tokenizers_parallelism": TOKENIZERS_PARALLELISM,
+    }
+
+
+def set_torch_threads(n: int):
+    import torch
+    torch.set_num_threads(n)
+
+
+def set_faiss_threads(n: int):
+    import faiss
+    faiss.omp_set_num_threads(n)
+
+
+def apply(settings: dict) -> dict:
+    # read by tokenizers when it first parallelizes, so set it up front
+    os.environ["TOKENIZERS_PARALLELISM"] = "true" if settings["tokenizers_parallelism"] else "false"
+
+    import torch
+    torch.set_num_threads(settings["torch_intra_op_threads"])
+    try:
+        torch.set_interop_threads(settings["torch_inter_op_threads"])
+    except RuntimeError:
+        # only allowed before the first inter-op task; keep what's running
+        settings["torch_inter_op_threads"] = torch.get_num_interop_threads()
+
+    set_faiss_threads(settings["faiss_omp_threads"])
+
+    print(
+        f"🧵 RUNTIME: {settings['cores']} cores, {settings['pipeline_workers']} pipeline workers, "
+        f"torch {settings['torch_intra_op_threads']}/{settings['torch_inter_op_threads']} threads, "
+        f"faiss {settings['faiss_omp_threads']} threads"
+    )
+    return settings
+
+
+# Applied on first import
+settings = apply(resolve())
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# modules import each other from backend/ (e.g. `from config import ...`)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
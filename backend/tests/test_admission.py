@@ -0,0 +1,247 @@
+import threading
+import time
+
+import pytest
+
+from assistant.admission import AdmissionController, Overloaded
+
+TIERS = [
+    {"load": 0.75, "skip_rerank": True},
+    {"load": 1.0, "grounding_chunks": 3},
+    {"load": 1.5, "num_predict": 80},
+]
+
+
+def controller(**kwargs) -> AdmissionController:
+    settings = dict(
+        max_concurrent=4, max_queue=2, queue_timeout=0.05,
+        latency_target_ms=1000, tiers=TIERS, batch_slots=1,
+    )
+    settings.update(kwargs)
+    return AdmissionController(**settings)
+
+
+def record(ctrl: AdmissionController, service_ms: float, batch: bool = False):
+    """Admit and release one request that took `service_ms`"""
+    ticket = ctrl.admit_batch(timeout=0) if batch else ctrl.admit()
+    ticket.started -= service_ms / 1000
+    ticket.release()
+
+
+def wait_until(predicate, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+# -------------------------
+# tiers
+# -------------------------
+def test_tier_settings_are_cumulative():
+    ctrl = controller()
+    assert ctrl.tier_settings(0) == {}
+    assert ctrl.tier_settings(1) == {"skip_rerank": True}
+    assert ctrl.tier_settings(3) == {"skip_rerank": True, "grounding_chunks": 3, "num_predict": 80}
+
+
+def test_queue_depth_raises_the_tier():
+    ctrl = controller()
+    tickets = [ctrl.admit() for _ in range(4)]
+    # load on arrival, this request included: 1/4, 2/4, 3/4, 4/4
+    assert [t.tier for t in tickets] == [0, 0, 1, 2]
+    assert tickets[3].degrade == {"skip_rerank": True, "grounding_chunks": 3}
+    assert ctrl.state()["admitted_per_tier"] == [2, 1, 1, 0]
+    for t in tickets:
+        t.release()
+    assert ctrl.state()["running"] == 0
+
+
+def test_slow_requests_raise_the_tier():
+    ctrl = controller()
+    record(ctrl, 2000)  # p95 at twice the latency target
+    with ctrl.admit() as ticket:
+        assert ticket.tier == 3
+        assert ticket.report()["degraded"]["num_predict"] == 80
+
+
+def test_release_is_idempotent():
+    ctrl = controller()
+    ticket = ctrl.admit()
+    ticket.release()
+    ticket.release()
+    assert ctrl.state()["running"] == 0
+
+
+# -------------------------
+# rejection (429 + Retry-After)
+# -------------------------
+def test_full_queue_rejects_at_once():
+    ctrl = controller(max_concurrent=1, max_queue=0)
+    with ctrl.admit():
+        start = time.perf_counter()
+        with pytest.raises(Overloaded) as exc:
+            ctrl.admit()
+        assert time.perf_counter() - start < 0.05
+    assert exc.value.reason == "queue_full"
+    assert exc.value.retry_after == 1  # no history: 1 request ahead at 1s each
+    assert ctrl.state()["rejected"]["queue_full"] == 1
+
+
+def test_retry_after_scales_with_work_ahead():
+    ctrl = controller(max_concurrent=2, max_queue=0, latency_target_ms=0)
+    record(ctrl, 4900)
+    held = [ctrl.admit(), ctrl.admit()]
+    with pytest.raises(Overloaded) as exc:
+        ctrl.admit()
+    # 2 running / 2 slots x ~4.9s mean service time, rounded up
+    assert exc.value.retry_after == 5
+    for t in held:
+        t.release()
+
+
+def test_queue_timeout_rejects():
+    ctrl = controller(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    with ctrl.admit():
+        with pytest.raises(Overloaded) as exc:
+            ctrl.admit()
+    assert exc.value.reason == "queue_timeout"
+    assert exc.value.retry_after >= 1
+    assert ctrl.state()["waiting"] == 0
+
+
+def test_waiting_request_gets_the_released_slot():
+    ctrl = controller(max_concurrent=1, max_queue=1, queue_timeout=2.0)
+    held = ctrl.admit()
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(ctrl.admit()))
+    waiter.start()
+    wait_until(lambda: ctrl.state()["waiting"] == 1)
+    held.release()
+    waiter.join(2.0)
+    assert len(admitted) == 1
+    assert admitted[0].waited_ms > 0
+    admitted[0].release()
+
+
+def test_fit_threads_caps_the_queue():
+    ctrl = controller(max_concurrent=4, max_queue=8)
+    ctrl.fit_threads(20)
+    assert ctrl.max_queue == 8
+    ctrl.fit_threads(10)
+    assert ctrl.max_queue == 6
+    ctrl.fit_threads(3)
+    assert ctrl.max_queue == 0
+
+
+# -------------------------
+# batch groups
+# -------------------------
+def test_batch_groups_yield_to_waiting_requests():
+    ctrl = controller(max_concurrent=1, max_queue=1, queue_timeout=2.0)
+    held = ctrl.admit()
+    order = []
+
+    def run(name, admit):
+        ticket = admit()
+        order.append(name)
+        ticket.release()
+
+    interactive = threading.Thread(target=run, args=("interactive", ctrl.admit))
+    interactive.start()
+    wait_until(lambda: ctrl.state()["waiting"] == 1)
+    batch = threading.Thread(target=run, args=("batch", lambda: ctrl.admit_batch(timeout=2.0)))
+    batch.start()
+    wait_until(lambda: ctrl.state()["waiting_batch"] == 1)
+
+    held.release()
+    interactive.join(2.0)
+    batch.join(2.0)
+    assert order == ["interactive", "batch"]
+
+
+def test_batch_slots_are_bounded():
+    ctrl = controller(batch_slots=1)
+    with ctrl.admit_batch(timeout=0):
+        with pytest.raises(Overloaded) as exc:
+            ctrl.admit_batch(timeout=0.01)
+        assert exc.value.reason == "batch_queue_timeout"
+        with ctrl.admit():  # interactive requests still get slots
+            pass
+
+
+def test_batch_run_times_do_not_count_as_latency():
+    ctrl = controller()
+    record(ctrl, 10000, batch=True)
+    assert ctrl.state()["p95_ms"] == 0.0
+    with ctrl.admit() as ticket:
+        assert ticket.tier == 0
+
+
+def test_batch_retry_after():
+    ctrl = controller(max_concurrent=1, max_queue=1, queue_timeout=2.0)
+    assert ctrl.batch_retry_after() is None
+
+    record(ctrl, 2000)  # load at the top tier
+    assert ctrl.batch_retry_after() >= 1
+
+
+# -------------------------
+# /ask
+# -------------------------
+def test_ask_returns_429_with_retry_after(monkeypatch):
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from assistant import router
+
+    ctrl = controller(max_concurrent=1, max_queue=0)
+    monkeypatch.setattr(router, "admission", ctrl)
+    monkeypatch.setattr(router, "get_namespace", lambda name: None)
+    app = FastAPI()
+    app.include_router(router.router)
+
+    with ctrl.admit():
+        response = TestClient(app).post("/ask", json={"question": "What is in my vault?"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_full_queue_returns_429_through_the_app(monkeypatch):
+    """Queued requests hold request threads; the next one must still get a 429, not block"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from fastapi.testclient import TestClient
+
+    import main
+    from assistant import router
+
+    ctrl = controller(max_concurrent=2, max_queue=3, queue_timeout=10.0)
+    monkeypatch.setattr(router, "admission", ctrl)
+    monkeypatch.setattr(main, "admission", ctrl)
+    monkeypatch.setattr(router, "get_namespace", lambda name: None)
+    body = {"question": "What is in my vault?"}
+
+    held = [ctrl.admit(), ctrl.admit()]
+    with TestClient(main.app) as client:
+        statuses = []
+        queued = [
+            threading.Thread(target=lambda: statuses.append(client.post("/ask", json=body).status_code))
+            for _ in range(3)
+        ]
+        for t in queued:
+            t.start()
+        wait_until(lambda: ctrl.state()["waiting"] == 3, timeout=10.0)
+
+        response = client.post("/ask", json=body)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert ctrl.state()["rejected"]["queue_full"] == 1
+
+        for ticket in held:
+            ticket.release()
+        for t in queued:
+            t.join(10.0)
+    assert len(statuses) == 3 and 429 not in statuses
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from vault.dedup import ChunkDeduper
+from vault.ingest import scan_vault, chunk_sources
+
+
+def text(seed: int, words: int = 200) -> str:
+    rng = np.random.default_rng(seed)
+    return " ".join(f"w{i}" for i in rng.integers(0, 5000, size=words))
+
+
+def edited(base: str, every: int) -> str:
+    """`base` with every `every`-th word replaced"""
+    words = base.split()
+    return " ".join("changed" if i % every == 0 else w for i, w in enumerate(words))
+
+
+def test_ids_follow_index_positions():
+    deduper = ChunkDeduper()
+    a, b, c = text(1), text(2), text(3)
+    assert deduper.add(a) == (0, True)
+    assert deduper.add(b) == (1, True)
+    assert deduper.add(a) == (0, False)
+    assert deduper.add(c) == (2, True)
+    assert deduper.add(b) == (1, False)
+
+
+def test_near_duplicates_join_the_first_chunk_of_their_group():
+    deduper = ChunkDeduper()
+    base = text(1)
+    assert deduper.add(base) == (0, True)
+    assert deduper.add(edited(base, 100)) == (0, False)   # 2 words of 200 changed
+    assert deduper.add(edited(base, 3)) == (1, True)      # a third rewritten
+
+
+def test_case_and_whitespace_do_not_matter():
+    deduper = ChunkDeduper()
+    base = text(4)
+    deduper.add(base)
+    assert deduper.add("  " + base.upper().replace(" ", "\n")) == (0, False)
+
+
+def test_report_counts_groups():
+    deduper = ChunkDeduper()
+    a, b = text(1), text(2)
+    for chunk in (a, a, a, b, text(3), b):
+        deduper.add(chunk)
+    assert deduper.report() == {
+        "chunks_read": 6,
+        "chunks_indexed": 3,
+        "duplicates_skipped": 3,
+        "groups_with_duplicates": 2,
+        "embedding_saved_pct": 50.0,
+    }
+
+
+def test_signature_is_deterministic():
+    assert np.array_equal(ChunkDeduper().signature(text(5)), ChunkDeduper().signature(text(5)))
+
+
+def test_num_perm_must_split_into_bands():
+    with pytest.raises(ValueError):
+        ChunkDeduper(num_perm=100, bands=16)
+
+
+def test_chunk_sources_lists_every_file_of_a_group():
+    files = [
+        {"path": "a.md", "chunk_ids": [0, 1]},
+        {"path": "b.md", "chunk_ids": [1]},
+        {"path": "c.md", "chunk_ids": [2, 2]},
+    ]
+    assert chunk_sources(files) == [["a.md"], ["a.md", "b.md"], ["c.md"]]
+
+
+def test_scan_vault_points_copies_at_one_representative(tmp_path):
+    shared = text(7, words=40)
+    (tmp_path / "a.md").write_text(shared, encoding="utf-8")
+    (tmp_path / "b.md").write_text(shared, encoding="utf-8")
+    (tmp_path / "c.md").write_text(text(8, words=40), encoding="utf-8")
+
+    vault_data = scan_vault(tmp_path)
+    ids = {f["name"]: f["chunk_ids"] for f in vault_data["files"]}
+    assert ids["a.md"] == ids["b.md"]
+    assert ids["c.md"] != ids["a.md"]
+    assert sorted(vault_data["chunk_sources"][ids["a.md"][0]]) == sorted(
+        str(tmp_path / name) for name in ("a.md", "b.md")
+    )
+    assert all("chunks" not in f for f in vault_data["files"])
+    assert vault_data["dedup"]["duplicates_skipped"] == 1
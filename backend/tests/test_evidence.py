@@ -0,0 +1,122 @@
+import pytest
+
+from models.sufficiency_models.evidence import cache_key, dedupe, normalize, pack, window_ids
+
+HEADER = [1, 2, 3, 4]  # "Question: .. Intent: .. Evidence:"
+
+
+def number_ids(n: int) -> list:
+    """'{n}.' as one token per digit plus the dot"""
+    return [200 + int(d) for d in str(n)] + [99]
+
+
+def sentence(length: int, start: int = 1000) -> list:
+    return list(range(start, start + length))
+
+
+# -------------------------
+# dedupe
+# -------------------------
+def test_dedupe_drops_repeats_and_contained_sentences():
+    sentences = [
+        "The cache is invalidated on write.",
+        "the cache is  invalidated on WRITE.",
+        "cache is invalidated",
+        "Replicas are promoted on failure.",
+        "   ",
+    ]
+    assert dedupe(sentences) == [sentences[0], sentences[3]]
+
+
+def test_dedupe_keeps_a_longer_sentence_after_a_shorter_one():
+    # only sentences contained in an *earlier* one are dropped
+    assert dedupe(["cache is invalidated", "The cache is invalidated on write."]) == [
+        "cache is invalidated", "The cache is invalidated on write."
+    ]
+
+
+def test_normalize():
+    assert normalize("  Two\n  Words ") == "two words"
+
+
+# -------------------------
+# pack
+# -------------------------
+def test_everything_fits_in_one_window():
+    sentences = [sentence(10), sentence(20), sentence(5)]
+    windows, dropped = pack(HEADER, sentences, number_ids, budget=100, max_windows=4)
+    assert windows == [[0, 1, 2]]
+    assert dropped == 0
+
+
+def test_overflow_starts_a_new_window_in_order():
+    # header 4 + "1." 2 + 40 = 46; "2." 2 + 40 would make 88 > 60
+    sentences = [sentence(40), sentence(40), sentence(10), sentence(30)]
+    windows, dropped = pack(HEADER, sentences, number_ids, budget=60, max_windows=4)
+    assert windows == [[0], [1, 2], [3]]
+    assert dropped == 0
+    for window in windows:
+        assert len(window_ids(HEADER, sentences, number_ids, window)) <= 60
+
+
+def test_budget_is_exact():
+    # 4 + (2 + 7) * 2 = 22 fits a budget of 22, not of 21
+    sentences = [sentence(7), sentence(7)]
+    assert pack(HEADER, sentences, number_ids, budget=22, max_windows=4)[0] == [[0, 1]]
+    assert pack(HEADER, sentences, number_ids, budget=21, max_windows=4)[0] == [[0], [1]]
+
+
+def test_number_width_counts_against_the_budget():
+    # "10." is one token longer than "9."
+    sentences = [sentence(1)] * 10
+    budget = len(HEADER) + 9 * 3 + 4  # exactly fits items 1..9 (3 tokens each) + "10." (3) + 1
+    windows, _ = pack(HEADER, sentences, number_ids, budget=budget, max_windows=4)
+    assert windows == [list(range(10))]
+    windows, _ = pack(HEADER, sentences, number_ids, budget=budget - 1, max_windows=4)
+    assert windows == [list(range(9)), [9]]
+
+
+def test_windows_past_max_are_dropped_and_counted():
+    sentences = [sentence(40) for _ in range(5)]
+    windows, dropped = pack(HEADER, sentences, number_ids, budget=60, max_windows=2)
+    assert windows == [[0], [1]]
+    assert dropped == 3
+
+
+def test_oversized_sentence_gets_its_own_window():
+    sentences = [sentence(5), sentence(500), sentence(5)]
+    windows, _ = pack(HEADER, sentences, number_ids, budget=60, max_windows=4)
+    assert windows == [[0], [1], [2]]
+
+
+def test_no_sentences():
+    assert pack(HEADER, [], number_ids, budget=60, max_windows=4) == ([], 0)
+
+
+def test_window_ids_renumber_from_one():
+    sentences = [sentence(3, 1000), sentence(3, 2000), sentence(3, 3000)]
+    assert window_ids(HEADER, sentences, number_ids, [1, 2]) == [
+        *HEADER, 201, 99, 2000, 2001, 2002, 202, 99, 3000, 3001, 3002,
+    ]
+
+
+# -------------------------
+# cache keys
+# -------------------------
+def test_cache_key_depends_on_question_intent_and_evidence():
+    base = cache_key("Why?", ["a.", "b."], "factual")
+    assert cache_key("Why?", ["a.", "b."], "factual") == base
+    assert cache_key("How?", ["a.", "b."], "factual") != base
+    assert cache_key("Why?", ["a.", "b."], "continuation") != base
+    assert cache_key("Why?", ["a."], "factual") != base
+
+
+def test_cache_key_is_order_sensitive():
+    # window packing (and so the score) depends on sentence order
+    assert cache_key("q", ["a.", "b."], "factual") != cache_key("q", ["b.", "a."], "factual")
+
+
+@pytest.mark.parametrize("split", [["a\nb"], ["a", "b"], ["a\n", "b"], ["a", "\nb"]])
+def test_cache_key_separates_sentence_boundaries(split):
+    others = [s for s in (["a\nb"], ["a", "b"], ["a\n", "b"], ["a", "\nb"]) if s != split]
+    assert all(cache_key("q", split, "factual") != cache_key("q", o, "factual") for o in others)
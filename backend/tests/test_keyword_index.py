@@ -0,0 +1,97 @@
+import zlib
+from collections import defaultdict
+
+import faiss
+import numpy as np
+import pytest
+
+from vault.ingest import retrieve_relevant_chunks, retrieve_relevant_chunks_batch, keyword_score, MIN_SCORE
+from vault.keyword_index import KeywordIndex
+from vault.vector_store import VectorStore
+
+DIM = 32
+VOCAB = [f"term{i}" for i in range(60)]
+
+
+class SeededStore(VectorStore):
+    """Random unit vectors for chunks; each query text always embeds the same way"""
+
+    def __init__(self, chunks: list[str]):
+        super().__init__()
+        vectors = np.random.default_rng(0).standard_normal((len(chunks), DIM)).astype("float32")
+        faiss.normalize_L2(vectors)
+        self.index = faiss.IndexFlatL2(DIM)
+        self.index.add(vectors)
+        self.chunks = chunks
+        self.keyword_index = KeywordIndex(chunks)
+
+    def embed(self, text: str) -> np.ndarray:
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        return rng.standard_normal(DIM).astype("float32")
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        return np.stack([self.embed(t) for t in texts])
+
+
+def legacy_scores(query: str, store: VectorStore, limit: int, semantic_score: str) -> dict:
+    """The dict + per-chunk keyword_score ranker KeywordIndex replaced"""
+    scored = defaultdict(float)
+    for r in store.search(query, k=limit * 3):
+        scored[r["chunk"]] += 0.7 * (1.0 if semantic_score == "hit" else r["score"])
+    for chunk in store.chunks:
+        ks = keyword_score(query, chunk)
+        if ks > 0:
+            scored[chunk] += 0.3 * ks
+    return scored
+
+
+@pytest.fixture(scope="module")
+def chunks():
+    rng = np.random.default_rng(1)
+    return [" ".join(rng.choice(VOCAB, size=12)) + "." for _ in range(200)]
+
+
+QUERIES = ["term1 term2 term3", "Term4, term50!", "term7 unknownword", "nothing matches", "TERM9 term9 term10"]
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_scores_match_keyword_score(chunks, query):
+    index = KeywordIndex(chunks)
+    expected = [keyword_score(query, chunk) for chunk in chunks]
+    np.testing.assert_allclose(index.scores(query), expected, rtol=1e-6)
+
+
+def test_empty_index_and_query():
+    assert KeywordIndex([]).scores("term1").shape == (0,)
+    assert not KeywordIndex(["term1 term2"]).scores("").any()
+
+
+@pytest.mark.parametrize("semantic_score", ["hit", "cosine"])
+@pytest.mark.parametrize("query", QUERIES)
+def test_hybrid_ranking_matches_legacy(chunks, query, semantic_score):
+    store = SeededStore(chunks)
+    limit = 5
+    legacy = legacy_scores(query, store, limit, semantic_score)
+    expected = sorted((s for s in legacy.values() if s >= MIN_SCORE), reverse=True)[:limit]
+
+    results = retrieve_relevant_chunks(query, store, limit, semantic_score)
+    assert [r["score"] for r in results] == pytest.approx(expected, rel=1e-5)
+    for r in results:
+        assert r["chunk"] == chunks[r["id"]]
+        assert r["score"] == pytest.approx(legacy[r["chunk"]], rel=1e-5)
+
+
+def test_hit_mode_reports_cosine_but_fuses_hits(chunks):
+    store = SeededStore(chunks)
+    query = "nothing matches"  # no keyword overlap: fused score is the semantic term alone
+    results = retrieve_relevant_chunks(query, store, 5, "hit")
+    assert results
+    for r in results:
+        assert r["score"] == pytest.approx(0.7)
+        assert r["semantic"] < 1.0
+
+
+def test_batch_matches_single(chunks):
+    store = SeededStore(chunks)
+    batch = retrieve_relevant_chunks_batch(QUERIES, store, limit=4)
+    assert batch == [retrieve_relevant_chunks(q, store, limit=4) for q in QUERIES]
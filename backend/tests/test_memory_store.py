@@ -0,0 +1,47 @@
+import json
+import time
+
+from memory import store as memory_store_module
+from memory.store import MemoryStore
+
+
+def test_importing_the_worker_does_not_open_the_store():
+    import memory.worker  # noqa: F401  (the router imports it at startup)
+
+    assert memory_store_module._store is None
+
+
+def test_retention_drops_old_facts_and_superseded_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory_store_module, "LEGACY_JSON_PATH", tmp_path / "memory.json")
+    store = MemoryStore(tmp_path / "memory.db")
+    store.save_profile({"name": "a"})
+    store.save_profile({"name": "b"})
+    store.append_facts(["recent"], session="s")
+    old = time.time() - 365 * 86400
+    store._append([("fact", None, json.dumps("stale"), "s", None, old)])
+
+    store.enforce_retention()
+
+    assert store.facts(session="s") == ["recent"]
+    assert store.latest_profile() == {"name": "b"}
+    (profile_rows,) = store._conn.execute(
+        "SELECT COUNT(*) FROM memory_events WHERE kind = 'profile'"
+    ).fetchone()
+    assert profile_rows == 1
+
+
+def test_retention_pass_skips_a_missing_database(tmp_path, monkeypatch):
+    missing = tmp_path / "memory.db"
+    monkeypatch.setattr(memory_store_module, "MEMORY_DB_PATH", missing)
+
+    def stop(_):
+        raise SystemExit  # end the loop after one pass
+
+    monkeypatch.setattr(memory_store_module.time, "sleep", stop)
+    try:
+        memory_store_module._retention_loop()
+    except SystemExit:
+        pass
+
+    assert not missing.exists()
+    assert memory_store_module._store is None
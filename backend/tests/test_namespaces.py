@@ -0,0 +1,62 @@
+from vault.namespaces import VaultNamespace, VaultRegistry
+from vault.snapshot import IndexSnapshot
+
+
+class EmptyStore:
+    chunks = []
+
+
+def snapshot(vault: str, version: int) -> IndexSnapshot:
+    return IndexSnapshot(vault=vault, version=version, store=EmptyStore(), vault_data={})
+
+
+def registry_with(ns: VaultNamespace) -> VaultRegistry:
+    registry = VaultRegistry()
+    registry._namespaces[ns.name] = ns
+    return registry
+
+
+def test_adopt_publishes_to_a_reloaded_instance(tmp_path):
+    evicted = VaultNamespace("notes", tmp_path)
+    live = VaultNamespace("notes", tmp_path)
+    registry = registry_with(live)
+
+    evicted.snapshot = snapshot("notes", 2)
+    registry.adopt(evicted)
+    assert live.snapshot is evicted.snapshot
+
+
+def test_adopt_keeps_a_newer_live_snapshot(tmp_path):
+    evicted = VaultNamespace("notes", tmp_path)
+    live = VaultNamespace("notes", tmp_path)
+    registry = registry_with(live)
+
+    live.snapshot = snapshot("notes", 3)
+    evicted.snapshot = snapshot("notes", 2)
+    registry.adopt(evicted)
+    assert live.snapshot.version == 3
+
+
+def test_adopt_ignores_failed_syncs_and_the_same_instance(tmp_path):
+    ns = VaultNamespace("notes", tmp_path)
+    registry = registry_with(ns)
+    registry.adopt(ns)
+    assert ns.snapshot is None
+
+    other = VaultNamespace("notes", tmp_path)
+    registry.adopt(other)  # synced nothing
+    assert ns.snapshot is None
+
+
+def test_evict_skips_a_vault_with_an_active_job(tmp_path):
+    registry = VaultRegistry(budget_mb=0)
+    syncing = VaultNamespace("syncing", tmp_path)
+    idle = VaultNamespace("idle", tmp_path)
+    for ns in (syncing, idle):
+        ns.snapshot = snapshot(ns.name, 1)
+        ns.memory_bytes = lambda: 1
+        registry._namespaces[ns.name] = ns
+    syncing.active_job = object()
+
+    registry.enforce_budget()
+    assert list(registry._namespaces) == ["syncing"]
@@ -0,0 +1,75 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from config import TOKEN_STORE_TOKENIZER
+from models.token_pairs import _longest_first, encode_batch, pair_batch
+
+LENGTHS = [0, 1, 2, 3, 5, 6, 7, 10, 13, 20]
+BUDGETS = [5, 6, 7, 10, 13]
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    if not TOKEN_STORE_TOKENIZER.exists():
+        pytest.skip("ingestion tokenizer not available")
+    return transformers.AutoTokenizer.from_pretrained(str(TOKEN_STORE_TOKENIZER), local_files_only=True)
+
+
+def words(n: int, start: int = 0) -> str:
+    # one WordPiece token per word
+    return " ".join(["the", "cat", "sat", "on", "a", "mat"][(start + i) % 6] for i in range(n))
+
+
+@pytest.mark.parametrize("budget", BUDGETS)
+def test_longest_first_matches_tokenizer(tokenizer, budget):
+    for n1 in LENGTHS:
+        for n2 in LENGTHS:
+            if n2 == 0:
+                continue
+            enc = tokenizer(
+                words(n1), words(n2, 3),
+                truncation="longest_first", max_length=budget + 3,
+                return_token_type_ids=True,
+            )
+            kept_first = enc["token_type_ids"].count(0) - 2
+            kept_second = enc["token_type_ids"].count(1) - 1
+            assert _longest_first(n1, n2, budget) == (kept_first, kept_second), (n1, n2, budget)
+
+
+def test_longest_first_gives_odd_token_to_longer_sequence():
+    assert _longest_first(10, 6, 7) == (4, 3)
+    assert _longest_first(6, 10, 7) == (3, 4)
+    assert _longest_first(8, 8, 7) == (3, 4)
+
+
+def test_longest_first_keeps_short_sequence_whole():
+    assert _longest_first(2, 50, 10) == (2, 8)
+    assert _longest_first(50, 2, 10) == (8, 2)
+    assert _longest_first(3, 4, 10) == (3, 4)
+
+
+@pytest.mark.parametrize("max_length", [8, 11, 16])
+def test_pair_batch_matches_tokenizer(tokenizer, max_length):
+    questions = [words(3), words(9, 1), words(12, 2)]
+    passages = [words(20, 4), words(2, 5), words(12)]
+    first = encode_batch(tokenizer, questions)
+    second = encode_batch(tokenizer, passages)
+
+    batch = pair_batch(tokenizer, first, second, max_length)
+    expected = tokenizer(
+        questions, passages,
+        truncation="longest_first", max_length=max_length,
+        padding=True, return_tensors="pt",
+    )
+    for key in ("input_ids", "token_type_ids", "attention_mask"):
+        assert torch.equal(batch[key], expected[key]), key
+
+
+def test_pair_batch_pads_to_max_length(tokenizer):
+    first = encode_batch(tokenizer, [words(2)])
+    second = encode_batch(tokenizer, [words(3)])
+    batch = pair_batch(tokenizer, first, second, 16, pad_to_max=True)
+    assert batch["input_ids"].shape == (1, 16)
+    assert int(batch["attention_mask"].sum()) == 2 + 3 + 3
@@ -0,0 +1,120 @@
+"""
+Micro-benchmark: query-embedding latency of each embedding backend.
+Times single-query embeds (what every /ask pays) and batched embeds (what
+/sync and /ask/batch pay), then checks that the backends agree: cosine
+similarity of their vectors for the same text, and whether the same chunks
+come out on top for each query.
+
+Run from backend/ (Ollama running, local model in LOCAL_EMBEDDING_MODEL_DIR):
+    python -m vault.bench_embeddings --backends ollama local --runs 50
+"""
+import argparse
+import time
+
+import numpy as np
+
+from embedders import BACKENDS
+
+QUERIES = [
+    "How does cache invalidation work?",
+    "What are the downsides of encryption at rest?",
+    "Why is that an issue?",
+    "How do I enable multi-factor authentication?",
+    "What happens if the primary database fails?",
+    "Which fungi form symbiotic relationships with plant roots?",
+    "Explain the difference between TCP and UDP.",
+    "When should I rotate API keys?",
+]
+PASSAGES = [
+    "Cache entries are invalidated when the underlying data changes, using versioned keys.",
+    "Encrypting data at rest adds CPU overhead and complicates key management and recovery.",
+    "Multi-factor authentication can be enabled per user in the security settings.",
+    "If the primary database fails, a replica is promoted after the health check times out.",
+    "Mycorrhizal fungi exchange nutrients with plant roots in return for sugars.",
+    "TCP guarantees ordered delivery with retransmission; UDP sends datagrams without either.",
+    "API keys should be rotated every 90 days and immediately after a suspected leak.",
+    "The term is discussed in modern literature.",
+]
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def time_queries(embedder, runs: int) -> list[float]:
+    times = []
+    for i in range(runs):
+        query = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        embedder.embed(query)
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def time_batch(embedder, batch: int, repeats: int = 3) -> float:
+    """Texts per second for one embed_batch call of `batch` texts"""
+    texts = [PASSAGES[i % len(PASSAGES)] + f" ({i})" for i in range(batch)]
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        embedder.embed_batch(texts)
+        best = min(best, time.perf_counter() - start)
+    return batch / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query-embedding latency per embedding backend")
+    parser.add_argument("--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--runs", type=int, default=50, help="single-query embeds per backend")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 128])
+    args = parser.parse_args()
+
+    embedders = {}
+    for name in args.backends:
+        start = time.perf_counter()
+        embedders[name] = BACKENDS[name]()
+        embedders[name].embed("warm-up")
+        print(f"🧲 {name}: {embedders[name].identity} ready in {time.perf_counter() - start:.1f}s")
+
+    print(f"\n{'backend':>8} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}  " + " ".join(
+        f"{f'b{b}/s':>8}" for b in args.batch_sizes
+    ))
+    for name, embedder in embedders.items():
+        times = time_queries(embedder, args.runs)
+        rates = [time_batch(embedder, b) for b in args.batch_sizes]
+        print(
+            f"{name:>8} {percentile(times, 0.50):>8.2f} {percentile(times, 0.95):>8.2f} "
+            f"{sum(times) / len(times):>8.2f}  " + " ".join(f"{r:>8.1f}" for r in rates)
+        )
+
+    if len(embedders) < 2:
+        return
+
+    # Agreement against the first backend
+    names = list(embedders)
+    ref = names[0]
+    ref_q = unit(embedders[ref].embed_batch(QUERIES))
+    ref_p = unit(embedders[ref].embed_batch(PASSAGES))
+    ref_top = np.argmax(ref_q @ ref_p.T, axis=1)
+    print()
+    for name in names[1:]:
+        q = unit(embedders[name].embed_batch(QUERIES))
+        p = unit(embedders[name].embed_batch(PASSAGES))
+        if q.shape[1] != ref_q.shape[1]:
+            print(f"❌ {name} vs {ref}: dimensions differ ({q.shape[1]} vs {ref_q.shape[1]})")
+            continue
+        cos = np.concatenate([np.sum(q * ref_q, axis=1), np.sum(p * ref_p, axis=1)])
+        same_top = np.mean(np.argmax(q @ p.T, axis=1) == ref_top)
+        print(
+            f"🔁 {name} vs {ref}: cosine mean {cos.mean():.4f}, min {cos.min():.4f}; "
+            f"same top passage for {same_top * 100:.0f}% of queries"
+        )
+
+
+if __name__ == "__main__":
+    main()
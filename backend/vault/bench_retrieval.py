@@ -0,0 +1,87 @@
+"""
+Micro-benchmark: per-query hybrid ranking cost vs. vault size.
+Compares the vectorized ranker in retrieve_relevant_chunks against the
+previous dict + per-chunk keyword_score loop on synthetic chunks. Query
+embedding is stubbed with random unit vectors, so only ranking is timed.
+
+Run from backend/:
+    python -m vault.bench_retrieval --sizes 1000 10000 50000
+"""
+import argparse
+import time
+from collections import defaultdict
+
+import faiss
+import numpy as np
+
+from vault.ingest import retrieve_relevant_chunks, keyword_score, MIN_SCORE
+from vault.keyword_index import KeywordIndex
+from vault.vector_store import VectorStore
+
+DIM = 1024
+VOCAB = [f"term{i}" for i in range(20000)]
+
+
+class RandomEmbeddingStore(VectorStore):
+    """VectorStore with deterministic random embeddings instead of Ollama"""
+
+    def __init__(self, chunks: list[str], rng: np.random.Generator):
+        super().__init__()
+        self.rng = rng
+        vectors = rng.standard_normal((len(chunks), DIM)).astype("float32")
+        faiss.normalize_L2(vectors)
+        self.index = faiss.IndexFlatL2(DIM)
+        self.index.add(vectors)
+        self.chunks = chunks
+        self.keyword_index = KeywordIndex(chunks)
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.rng.standard_normal(DIM).astype("float32")
+
+
+def legacy_retrieve(query: str, store: VectorStore, limit: int):
+    """The pre-vectorization ranker, kept here as the baseline"""
+    scored = defaultdict(float)
+    for r in store.search(query, k=limit * 3):
+        scored[r["chunk"]] += 0.7 * r["score"]
+    for chunk in store.chunks:
+        ks = keyword_score(query, chunk)
+        if ks > 0:
+            scored[chunk] += 0.3 * ks
+    ranked = sorted(scored.items(), key=lambda x: x[1], reverse=True)
+    return [t for t, s in ranked if s >= MIN_SCORE][:limit]
+
+
+def make_chunks(n: int, rng: np.random.Generator, words: int = 120) -> list[str]:
+    ids = rng.zipf(1.3, size=(n, words)) % len(VOCAB)
+    return [" ".join(VOCAB[i] for i in row) for row in ids]
+
+
+def time_per_query(fn, queries, store, limit) -> float:
+    start = time.perf_counter()
+    for q in queries:
+        fn(q, store, limit)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid ranking cost vs. vault size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 50000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>8} {'legacy ms/q':>12} {'vector ms/q':>12} {'speedup':>8}")
+
+    for n in args.sizes:
+        store = RandomEmbeddingStore(make_chunks(n, rng), rng)
+        queries = [" ".join(rng.choice(VOCAB[:2000], size=6)) for _ in range(args.queries)]
+
+        legacy = time_per_query(legacy_retrieve, queries, store, args.limit)
+        vector = time_per_query(retrieve_relevant_chunks, queries, store, args.limit)
+        print(f"{n:>8} {legacy:>12.2f} {vector:>12.2f} {legacy / vector:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
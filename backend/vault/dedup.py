@@ -0,0 +1,96 @@
+"""
+Near-duplicate chunk detection for ingestion.
+Each chunk gets a MinHash signature over word shingles; LSH banding finds
+earlier chunks that are likely near-duplicates, and the estimated Jaccard
+similarity decides. The first chunk of a group is its representative: only
+representatives are embedded and indexed, and every member keeps a pointer
+to its representative so source files are never lost.
+"""
+import zlib
+
+import numpy as np
+
+from config import DEDUP_THRESHOLD, DEDUP_NUM_PERM, DEDUP_BANDS, DEDUP_SHINGLE_WORDS
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class ChunkDeduper:
+    def __init__(
+        self,
+        threshold: float = DEDUP_THRESHOLD,
+        num_perm: int = DEDUP_NUM_PERM,
+        bands: int = DEDUP_BANDS,
+        shingle_words: int = DEDUP_SHINGLE_WORDS,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.shingle_words = shingle_words
+
+        # a < 2^31 and 32-bit shingle hashes keep a * h + b inside uint64
+        rng = np.random.default_rng(1)
+        self.a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+        self.buckets = [{} for _ in range(bands)]  # band -> {band hash: [rep id]}
+        self.signatures = []                       # rep id -> signature
+        self.group_sizes = []                      # rep id -> member count
+        self.chunks_seen = 0
+
+    def signature(self, text: str) -> np.ndarray:
+        words = text.lower().split()
+        n = self.shingle_words
+        shingles = {" ".join(words[i:i + n]) for i in range(max(len(words) - n + 1, 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        perms = (np.outer(hashes, self.a) + self.b) % _MERSENNE & _MAX_HASH
+        return perms.min(axis=0)
+
+    def _bands(self, sig: np.ndarray):
+        for band in range(self.bands):
+            yield band, sig[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, text: str):
+        """
+        Returns (representative id, is_new). New representatives get the
+        next id, matching their position in the index.
+        """
+        self.chunks_seen += 1
+        sig = self.signature(text)
+
+        candidates = set()
+        for band, key in self._bands(sig):
+            candidates.update(self.buckets[band].get(key, ()))
+
+        best, best_sim = None, self.threshold
+        for rep in candidates:
+            sim = float(np.mean(self.signatures[rep] == sig))
+            if sim >= best_sim:
+                best, best_sim = rep, sim
+        if best is not None:
+            self.group_sizes[best] += 1
+            return best, False
+
+        rep = len(self.signatures)
+        self.signatures.append(sig)
+        self.group_sizes.append(1)
+        for band, key in self._bands(sig):
+            self.buckets[band].setdefault(key, []).append(rep)
+        return rep, True
+
+    def report(self) -> dict:
+        indexed = len(self.signatures)
+        return {
+            "chunks_read": self.chunks_seen,
+            "chunks_indexed": indexed,
+            "duplicates_skipped": self.chunks_seen - indexed,
+            "groups_with_duplicates": sum(1 for n in self.group_sizes if n > 1),
+            "embedding_saved_pct": round(
+                (self.chunks_seen - indexed) / self.chunks_seen * 100, 1
+            ) if self.chunks_seen else 0.0,
+        }
@@ -0,0 +1,25 @@
+"""
+Atomic index file writes.
+Index files are written to a temporary file next to the target and moved
+into place with os.replace, so a crash or a concurrent load mid-save sees
+either the old file or the new one, never a truncated mix.
+"""
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def replace_atomically(path: Path):
+    """
+    Yield a temporary path to write to; it replaces `path` if the block
+    succeeds and is removed if it raises. The suffix is kept so writers
+    that add one (np.savez adds ".npz") write where expected.
+    """
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
@@ -1,7 +1,13 @@
 from pathlib import Path
 import re
+import time
 
-from config import VAULT_PATH
+import numpy as np
+
+from config import VAULT_PATH, DEDUP_ENABLED, HYBRID_SEMANTIC_SCORE
+from vault.dedup import ChunkDeduper
+from vault.keyword_index import tokenize
+from vault.scanner import ScanStats, scan_files, read_text_file, chunk_text
 from vault.vector_store import VectorStore
 
 
@@ -9,102 +15,123 @@ from vault.vector_store import VectorStore
 # helpers
 # --------------------
 
-def read_text_file(path: Path) -> str:
-    try:
-        return path.read_text(encoding="utf-8", errors="ignore")
-    except Exception as e:
-        return ""
-
-
-def chunk_text(text: str, chunk_size: int = 600):
-    words = text.split()
-    chunks = []
-
-    for i in range(0, len(words), chunk_size):
-        chunk = " ".join(words[i:i + chunk_size])
-        chunks.append(chunk)
-
-    return chunks
-
-
 def normalize(text: str) -> str:
     return re.sub(r"[^a-z0-9\s]", "", text.lower())
 
 
-# --------------------
-# global vector store
-# --------------------
-
-vector_store = VectorStore()
-
-
 # --------------------
 # vault scan
 # --------------------
 
-def scan_vault():
+class SyncCancelled(Exception):
+    pass
+
+
+def scan_vault(
+    vault_path: Path = VAULT_PATH,
+    store: VectorStore = None,
+    stats: ScanStats = None,
+    cancel=None,
+    chunk_size: int = 600,
+):
+    """
+    Scan one vault directory and build its chunks into `store`.
+    Reading/chunking runs in a process pool and streams straight into
+    embedding, so both stages overlap. Near-duplicate chunks are folded into
+    one indexed representative; each file's `chunk_ids` point at the
+    representatives of its chunks (chunk text lives only in `store`, so
+    file records read the same after a reload). `stats` can be polled for progress
+    while this runs; setting the `cancel` event aborts before `store` changes.
+    """
     files = []
-    all_chunks = []
+    stats = stats or ScanStats()
 
-    if not VAULT_PATH.exists():
+    if not vault_path.exists():
         return {
-            "vault_path": str(VAULT_PATH),
+            "vault_path": str(vault_path),
             "file_count": 0,
             "empty_files": 0,
             "indexed_files": 0,
             "files": [],
+            "chunk_sources": [],
+            "dedup": None,
+            "stages": stats.report(),
         }
 
-    for path in VAULT_PATH.rglob("*"):
-        if not path.is_file():
-            continue
-
-        if path.suffix.lower() not in [".txt", ".md", ".pdf"]:
-            continue
-
-        content = read_text_file(path)
-        has_content = bool(content.strip())
-
-        chunks = chunk_text(content) if has_content else []
-
-        files.append({
-            "name": path.name,
-            "path": str(path),
-            "extension": path.suffix.lower(),
-            "empty": not has_content,
-            "chunk_count": len(chunks),
-            "chunks": chunks,
-        })
-
-        all_chunks.extend(chunks)
+    deduper = ChunkDeduper() if DEDUP_ENABLED else None
+    next_id = 0
+
+    def chunk_stream():
+        nonlocal next_id
+        for record in scan_files(vault_path, stats, chunk_size):
+            files.append(record)
+            stats.add("chunks_read", items=record["chunk_count"])
+            record["chunk_ids"] = []
+            for chunk in record["chunks"]:
+                if cancel is not None and cancel.is_set():
+                    raise SyncCancelled()
+
+                if deduper is None:
+                    chunk_id, is_new = next_id, True
+                    next_id += 1
+                else:
+                    start = time.perf_counter()
+                    chunk_id, is_new = deduper.add(chunk)
+                    stats.add("dedup", seconds=time.perf_counter() - start)
+
+                record["chunk_ids"].append(chunk_id)
+                if is_new:
+                    yield chunk
+        if cancel is not None and cancel.is_set():
+            raise SyncCancelled()
 
     # build embeddings ONLY from real chunks
-    if all_chunks:
-        vector_store.build(all_chunks)
+    if store is not None:
+        store.build(chunk_stream(), stats)
+    else:
+        for _ in chunk_stream():
+            pass
+    for record in files:
+        del record["chunks"]
 
     empty_files = sum(1 for f in files if f["empty"])
     indexed_files = sum(1 for f in files if not f["empty"])
 
     return {
-        "vault_path": str(VAULT_PATH),
+        "vault_path": str(vault_path),
         "file_count": len(files),          # filesystem truth
         "empty_files": empty_files,         # UX truth
         "indexed_files": indexed_files,     # knowledge truth
         "files": files,
+        "chunk_sources": chunk_sources(files),
+        "dedup": deduper.report() if deduper is not None else None,
+        "stages": stats.report(),           # per-stage throughput
     }
 
 
-import re
-from collections import defaultdict
-
-MIN_SCORE = 0.2   # ← relevance threshold (important)
+def chunk_sources(files: list[dict]) -> list[list[str]]:
+    """Indexed chunk ID -> paths of every file containing it (or a near-duplicate)"""
+    sources = []
+    for f in files:
+        for chunk_id in f.get("chunk_ids", []):
+            while len(sources) <= chunk_id:
+                sources.append([])
+            if f["path"] not in sources[chunk_id]:
+                sources[chunk_id].append(f["path"])
+    return sources
 
 
-def tokenize(text: str) -> set[str]:
-    return set(re.findall(r"[a-zA-Z0-9]+", text.lower()))
+MIN_SCORE = 0.2   # ← relevance threshold on the fused score (see HYBRID_SEMANTIC_SCORE)
+SEMANTIC_WEIGHT = 0.7
+KEYWORD_WEIGHT = 0.3
 
 
 def keyword_score(query: str, text: str) -> float:
+    """
+    Reference implementation of one KeywordIndex score: share of query
+    terms in `text`. Retrieval no longer calls it; the tests and
+    bench_retrieval.py check KeywordIndex against it.
+    """
     q = tokenize(query)
     t = tokenize(text)
     if not q or not t:
@@ -112,57 +139,73 @@ def keyword_score(query: str, text: str) -> float:
     return len(q & t) / len(q)
 
 
-def extract_text(item):
-    if isinstance(item, str):
-        return item
-    if isinstance(item, dict):
-        return item.get("chunk") or item.get("text") or ""
-    return ""
+def retrieve_relevant_chunks(query: str, store: VectorStore, limit: int = 3, semantic_score: str = HYBRID_SEMANTIC_SCORE):
+    """
+    Hybrid retrieval scoped to one vault's store. Semantic and keyword
+    scores are dense arrays over the store's chunk IDs, fused and cut to
+    the top `limit` with argpartition instead of a full sort.
+    """
+    if not store.chunks:
+        return []
 
+    # -------------------------
+    # 1. Semantic search
+    # -------------------------
+    return _rank_hybrid(query, store, store.search(query, k=limit * 3), limit, semantic_score)
 
-def extract_score(item):
-    if isinstance(item, dict):
-        return float(item.get("score", 1.0))
-    return 1.0
 
+def retrieve_relevant_chunks_batch(queries: list[str], store: VectorStore, limit: int = 3, semantic_score: str = HYBRID_SEMANTIC_SCORE):
+    """retrieve_relevant_chunks for many queries, with one embedding call and one FAISS search"""
+    if not store.chunks:
+        return [[] for _ in queries]
 
-def retrieve_relevant_chunks(query: str, vault_data: dict, limit: int = 3):
-    scored = defaultdict(float)
+    hits = store.search_batch(queries, k=limit * 3)
+    return [_rank_hybrid(q, store, h, limit, semantic_score) for q, h in zip(queries, hits)]
 
-    # -------------------------
-    # 1. Semantic search
-    # -------------------------
-    semantic_results = vector_store.search(query, k=limit * 3)
 
-    for r in semantic_results:
-        text = extract_text(r)
-        if not text:
-            continue
-        scored[text] += 0.7 * extract_score(r)
+def _rank_hybrid(query: str, store: VectorStore, hits: list[dict], limit: int, semantic_score: str):
+    # cosine of every hit (reported as "semantic", the cascade's floor);
+    # what the fusion sees depends on semantic_score
+    semantic = np.zeros(len(store.chunks), dtype=np.float32)
+    hit = np.zeros(len(store.chunks), dtype=np.float32)
+    for r in hits:
+        semantic[r["id"]] = r["score"]
+        hit[r["id"]] = 1.0
 
     # -------------------------
-    # 2. Keyword overlap (FIXED)
+    # 2. Keyword overlap (sparse term x chunk matrix)
     # -------------------------
-    for file in vault_data.get("files", []):
-        for chunk in file.get("chunks", []):
-            if not isinstance(chunk, str):
-                continue
-
-            ks = keyword_score(query, chunk)
-            if ks > 0:
-                scored[chunk] += 0.3 * ks
+    keyword = store.keyword_index.scores(query)
 
     # -------------------------
-    # 3. Filter + rank
+    # 3. Fuse + filter + top-k
     # -------------------------
-    ranked = sorted(
-        scored.items(),
-        key=lambda x: x[1],
-        reverse=True,
-    )
-
-    return [
-        {"chunk": text, "score": score}
-        for text, score in ranked
-        if score >= MIN_SCORE
-    ][:limit]
+    fused = SEMANTIC_WEIGHT * (hit if semantic_score == "hit" else semantic) + KEYWORD_WEIGHT * keyword
+    candidates = np.flatnonzero(fused >= MIN_SCORE)
+
+    # over-select so duplicate chunk texts can be skipped below; ties at the
+    # cut are all kept so the order (score, then chunk ID) is deterministic
+    k = limit * 2
+    if k < len(candidates):
+        part = np.argpartition(-fused[candidates], k - 1)
+        kth = fused[candidates[part[k - 1]]]
+        candidates = candidates[fused[candidates] >= kth]
+    candidates = candidates[np.lexsort((candidates, -fused[candidates]))]
+
+    results = []
+    seen = set()
+    for chunk_id in candidates:
+        text = store.chunks[chunk_id]
+        if text in seen:
+            continue
+        seen.add(text)
+        results.append({
+            "id": int(chunk_id),
+            "chunk": text,
+            "score": float(fused[chunk_id]),
+            "semantic": float(semantic[chunk_id]),
+        })
+        if len(results) == limit:
+            break
+
+    return results
@@ -0,0 +1,46 @@
+"""
+Sparse keyword index over a store's chunk IDs.
+A binary term x chunk CSR matrix: summing the rows of the query's terms
+gives every chunk's overlap count in one pass.
+"""
+import re
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+def tokenize(text: str) -> set[str]:
+    return set(re.findall(r"[a-zA-Z0-9]+", text.lower()))
+
+
+class KeywordIndex:
+    def __init__(self, chunks: list[str]):
+        vocab = {}
+        rows = []
+        cols = []
+        for chunk_id, chunk in enumerate(chunks):
+            for term in tokenize(chunk):
+                rows.append(vocab.setdefault(term, len(vocab)))
+                cols.append(chunk_id)
+
+        self.vocab = vocab
+        self.n_chunks = len(chunks)
+        self.matrix = csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(vocab), len(chunks)),
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """Per-chunk share of query terms present: |q & t| / |q|"""
+        out = np.zeros(self.n_chunks, dtype=np.float32)
+        q = tokenize(query)
+        term_ids = [self.vocab[t] for t in q if t in self.vocab]
+        if not term_ids:
+            return out
+
+        overlap = np.asarray(self.matrix[term_ids].sum(axis=0)).ravel()
+        return overlap / len(q)
+
+    def memory_bytes(self) -> int:
+        m = self.matrix
+        return m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
@@ -0,0 +1,292 @@
+"""
+Named vault namespaces.
+Each namespace has its own vector index, manifest and embedding cache under
+INDEX_ROOT/<name>, served to readers as an immutable IndexSnapshot.
+Namespaces are loaded on demand and the least recently used ones are
+dropped from memory once VAULT_MEMORY_BUDGET_MB is exceeded, except
+while a sync job for them is queued or running.
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from config import (
+    DEFAULT_VAULT,
+    VAULT_PATH,
+    VAULTS_ROOT,
+    INDEX_ROOT,
+    VAULT_MEMORY_BUDGET_MB,
+)
+from vault.files import replace_atomically
+from vault.ingest import scan_vault, chunk_sources
+from vault.scanner import latest_mtime
+from vault.snapshot import IndexSnapshot
+from vault.token_store import TokenStore
+from vault.vector_store import VectorStore, INDEX_FORMAT
+
+VAULT_NAME_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class UnknownVaultError(Exception):
+    pass
+
+
+def resolve_vault_path(name: str) -> Path:
+    """Map a vault name to its directory; the default vault keeps VAULT_PATH"""
+    if name == DEFAULT_VAULT:
+        return VAULT_PATH
+
+    if not VAULT_NAME_RE.match(name):
+        raise UnknownVaultError(name)
+
+    path = VAULTS_ROOT / name
+    if not path.is_dir():
+        raise UnknownVaultError(name)
+    return path
+
+
+# --------------------
+# namespace
+# --------------------
+
+class VaultNamespace:
+    def __init__(self, name: str, vault_path: Path):
+        self.name = name
+        self.vault_path = vault_path
+        self.index_dir = INDEX_ROOT / name
+
+        # the only shared reference readers touch; replaced, never mutated
+        self.snapshot: IndexSnapshot = None
+
+        # one sync at a time per vault
+        self.sync_lock = threading.Lock()
+
+        # embeddings kept from an index that has to be rebuilt (see load)
+        self.seed_cache = {}
+
+        # sync job queued or running for this namespace (set by sync_jobs);
+        # the registry won't evict it until the job has published
+        self.active_job = None
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.index_dir / "manifest.json"
+
+    def load(self) -> bool:
+        """Restore index + manifest from disk, if this vault was synced before"""
+        if not self.manifest_path.exists():
+            return False
+
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        store = VectorStore()
+        identity = VectorStore.saved_identity(self.index_dir)
+        if identity not in (None, store.embedder.identity):
+            # vectors from another embedding model: the first sync re-embeds
+            print(f"⚠️ VAULT {self.name} WAS INDEXED WITH {identity}, NOT {store.embedder.identity}")
+            return False
+        if manifest.get("index_format", 1) != INDEX_FORMAT:
+            # older index layout: rebuild on first use, reusing its embeddings
+            print(f"⚠️ VAULT {self.name} HAS INDEX FORMAT {manifest.get('index_format', 1)}, REBUILDING")
+            store.load_embedding_cache(self.index_dir)
+            self.seed_cache = store.embedding_cache
+            return False
+        store.load(self.index_dir)
+
+        chunks = store.chunks
+        if not all("chunk_ids" in f for f in manifest["files"]):
+            # pre-dedup manifests: chunks.json is in file order, one entry per chunk
+            offset = 0
+            for file in manifest["files"]:
+                count = file["chunk_count"]
+                file["chunk_ids"] = list(range(offset, offset + count))
+                offset += count
+
+        tokens = TokenStore.load(self.index_dir, chunks)
+        if tokens is None or not tokens.is_current():
+            tokens = TokenStore.build(chunks, previous=tokens)
+            tokens.save(self.index_dir)
+
+        self.snapshot = IndexSnapshot(
+            vault=self.name,
+            version=manifest.get("version", 1),
+            store=store,
+            tokens=tokens,
+            vault_data={
+                "vault_path": manifest["vault_path"],
+                "file_count": manifest["file_count"],
+                "empty_files": manifest["empty_files"],
+                "indexed_files": manifest["indexed_files"],
+                "files": manifest["files"],
+                "chunk_sources": chunk_sources(manifest["files"]),
+                "dedup": manifest.get("dedup"),
+            },
+            last_mtime=manifest.get("last_mtime"),
+            last_indexed=manifest.get("last_indexed"),
+        )
+        return True
+
+    def save(self, snap: IndexSnapshot):
+        """Index files first, manifest last: a manifest always describes files already in place"""
+        snap.store.save(self.index_dir)
+        snap.tokens.save(self.index_dir)
+
+        vault_data = snap.vault_data
+        manifest = {
+            "name": self.name,
+            "version": snap.version,
+            "index_format": INDEX_FORMAT,
+            "vault_path": vault_data["vault_path"],
+            "file_count": vault_data["file_count"],
+            "empty_files": vault_data["empty_files"],
+            "indexed_files": vault_data["indexed_files"],
+            "last_mtime": snap.last_mtime,
+            "last_indexed": snap.last_indexed,
+            "dedup": vault_data.get("dedup"),
+            "files": vault_data["files"],
+        }
+        with replace_atomically(self.manifest_path) as tmp:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+
+    # -------------------------
+    # change detection
+    # -------------------------
+    def latest_mtime(self):
+        return latest_mtime(self.vault_path)
+
+    def has_changed(self) -> bool:
+        snap = self.snapshot
+        if snap is None or snap.last_mtime is None:
+            return True
+
+        latest = self.latest_mtime()
+        if latest is None:
+            return False
+
+        return latest > snap.last_mtime
+
+    # -------------------------
+    # sync
+    # -------------------------
+    def sync(self, stats=None, cancel=None) -> dict:
+        """
+        Build a new snapshot off to the side, then publish it with one
+        reference swap. Requests holding the previous snapshot keep using it.
+        """
+        with self.sync_lock:
+            previous = self.snapshot
+            store = VectorStore()
+            if previous is not None:
+                # build() replaces the cache dict, so sharing it is safe
+                store.embedding_cache = previous.store.embedding_cache
+            else:
+                store.embedding_cache, self.seed_cache = self.seed_cache, {}
+
+            mtime = self.latest_mtime()
+            vault_data = scan_vault(self.vault_path, store, stats, cancel)
+            tokens = TokenStore.build(store.chunks, previous=previous.tokens if previous else None)
+
+            snap = IndexSnapshot(
+                vault=self.name,
+                version=(previous.version + 1) if previous else 1,
+                store=store,
+                tokens=tokens,
+                vault_data=vault_data,
+                last_mtime=mtime,
+                last_indexed=time.time(),
+            )
+            self.save(snap)
+            self.snapshot = snap  # publish
+
+        return {
+            "vault": self.name,
+            "version": snap.version,
+            "vault_path": str(vault_data["vault_path"]),
+            "file_count": vault_data["file_count"],
+            "empty_files": vault_data["empty_files"],
+            "indexed_files": vault_data["indexed_files"],
+            "last_indexed": snap.last_indexed,
+            "dedup": vault_data.get("dedup"),
+            "stages": vault_data.get("stages", {}),
+        }
+
+    def memory_bytes(self) -> int:
+        snap = self.snapshot
+        return snap.memory_bytes() if snap is not None else 0
+
+
+# --------------------
+# registry
+# --------------------
+
+class VaultRegistry:
+    def __init__(self, budget_mb: int = VAULT_MEMORY_BUDGET_MB):
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self._namespaces = OrderedDict()  # LRU order, most recent last
+        self._lock = threading.Lock()
+
+    def get(self, name: str = DEFAULT_VAULT) -> VaultNamespace:
+        """Return a loaded namespace, loading it from disk on first use"""
+        with self._lock:
+            ns = self._namespaces.get(name)
+            if ns is not None:
+                self._namespaces.move_to_end(name)
+                return ns
+
+            ns = VaultNamespace(name, resolve_vault_path(name))
+            if ns.load():
+                print(f"📂 VAULT LOADED: {name}")
+            self._namespaces[name] = ns
+            self._evict(keep=name)
+            return ns
+
+    def adopt(self, ns: VaultNamespace):
+        """
+        After a sync of `ns`: if the registry has since dropped `ns` and
+        loaded the vault again, hand the new snapshot to the live instance
+        so it doesn't stay empty or stale.
+        """
+        with self._lock:
+            live = self._namespaces.get(ns.name)
+            snap = ns.snapshot
+            if live is None or live is ns or snap is None:
+                return
+            if live.snapshot is None or live.snapshot.version < snap.version:
+                live.snapshot = snap
+
+    def enforce_budget(self, keep: str = None):
+        """Call after a namespace grows (e.g. a sync) to re-apply the budget"""
+        with self._lock:
+            self._evict(keep=keep)
+
+    def _evict(self, keep: str = None):
+        total = sum(ns.memory_bytes() for ns in self._namespaces.values())
+
+        for name in list(self._namespaces):
+            if total <= self.budget_bytes:
+                break
+            ns = self._namespaces[name]
+            if name == keep or ns.active_job is not None or ns.sync_lock.locked():
+                # a running sync publishes to this instance; evicting it
+                # would drop the result and let a second instance load
+                continue
+
+            del self._namespaces[name]
+            total -= ns.memory_bytes()
+            print(f"🧹 VAULT EVICTED: {name}")
+
+    def loaded(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"vault": name, "memory_bytes": ns.memory_bytes()}
+                for name, ns in self._namespaces.items()
+            ]
+
+
+# Global instance
+vault_registry = VaultRegistry()
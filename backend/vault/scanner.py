@@ -0,0 +1,239 @@
+"""
+Parallel vault scanner.
+Walks the vault with os.scandir and fans read/decode/chunk work out to a
+process pool. Results are yielded in walk order as soon as they are ready, so
+the embedding stage can start before the walk finishes. In-flight work is
+bounded by file count and by total file size.
+
+The pool is created once and reused by every sync. Workers are spawned,
+not forked: the server process has torch, FAISS and Ollama client threads
+running, and forking a threaded process can deadlock the child.
+
+Kept free of faiss/ollama imports: pool workers import this module.
+"""
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from config import (
+    SUPPORTED_EXTENSIONS,
+    SCAN_WORKERS,
+    SCAN_MAX_IN_FLIGHT_FILES,
+    SCAN_MAX_IN_FLIGHT_MB,
+)
+
+
+# --------------------
+# helpers
+# --------------------
+
+def read_text_file(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8", errors="ignore")
+    except Exception as e:
+        return ""
+
+
+def chunk_text(text: str, chunk_size: int = 600):
+    words = text.split()
+    chunks = []
+
+    for i in range(0, len(words), chunk_size):
+        chunk = " ".join(words[i:i + chunk_size])
+        chunks.append(chunk)
+
+    return chunks
+
+
+def split_sentences(chunk: str) -> list[str]:
+    """Sentences of at least 10 characters, as the grounding stage sees them"""
+    parts = re.split(r'(?<=[.!?])\s+', chunk)
+    return [p.strip() for p in parts if len(p.strip()) >= 10]
+
+
+# --------------------
+# stage stats
+# --------------------
+
+class ScanStats:
+    """Per-stage item counts and busy time; rates are items / busy second"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.walk_complete = False
+
+    def add(self, stage: str, items: int = 1, seconds: float = 0.0, nbytes: int = 0):
+        s = self.stages.setdefault(stage, {"items": 0, "seconds": 0.0, "bytes": 0})
+        s["items"] += items
+        s["seconds"] += seconds
+        s["bytes"] += nbytes
+
+    def count(self, stage: str) -> int:
+        return self.stages.get(stage, {}).get("items", 0)
+
+    def report(self) -> dict:
+        out = {}
+        for stage, s in list(self.stages.items()):
+            out[stage] = {
+                "items": s["items"],
+                "seconds": round(s["seconds"], 3),
+                "items_per_sec": round(s["items"] / s["seconds"], 1) if s["seconds"] else None,
+                "mb_per_sec": round(s["bytes"] / s["seconds"] / 1e6, 2) if s["seconds"] and s["bytes"] else None,
+            }
+        out["wall_seconds"] = round(time.perf_counter() - self.started, 3)
+        return out
+
+
+# --------------------
+# walk
+# --------------------
+
+def walk_files(root: Path, extensions=None, stats: ScanStats = None):
+    """Yield (path, os.stat_result) for every file under root, depth-first"""
+    stack = [str(root)]
+
+    while stack:
+        start = time.perf_counter()
+        entries = []
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            if extensions and os.path.splitext(entry.name)[1].lower() not in extensions:
+                                continue
+                            entries.append((Path(entry.path), entry.stat()))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+        if stats is not None:
+            stats.add("walk", items=len(entries), seconds=time.perf_counter() - start)
+
+        # sorted per directory so chunk order is stable across syncs
+        entries.sort(key=lambda e: e[0].name)
+        yield from entries
+
+
+def latest_mtime(root: Path):
+    if not root.exists():
+        return None
+    return max((st.st_mtime for _, st in walk_files(root)), default=None)
+
+
+# --------------------
+# read + chunk
+# --------------------
+
+def read_and_chunk(path: Path, chunk_size: int = 600) -> dict:
+    """Pool worker: read, decode and chunk one file"""
+    start = time.perf_counter()
+
+    content = read_text_file(path)
+    has_content = bool(content.strip())
+    chunks = chunk_text(content, chunk_size) if has_content else []
+
+    return {
+        "name": path.name,
+        "path": str(path),
+        "extension": path.suffix.lower(),
+        "empty": not has_content,
+        "chunk_count": len(chunks),
+        "chunks": chunks,
+        "read_seconds": time.perf_counter() - start,
+        "bytes": len(content),
+    }
+
+
+def _record(result: dict, stats: ScanStats) -> dict:
+    if stats is not None:
+        stats.add("read_chunk", seconds=result.pop("read_seconds"), nbytes=result.pop("bytes"))
+    else:
+        result.pop("read_seconds")
+        result.pop("bytes")
+    return result
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared scan pool per worker count, created on first use"""
+    with _pool_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return pool
+
+
+def _discard_pool(workers: int, pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next sync starts a fresh one"""
+    with _pool_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def scan_files(
+    root: Path,
+    stats: ScanStats = None,
+    chunk_size: int = 600,
+    workers: int = SCAN_WORKERS,
+    max_in_flight: int = SCAN_MAX_IN_FLIGHT_FILES,
+    max_in_flight_mb: int = SCAN_MAX_IN_FLIGHT_MB,
+):
+    """Yield one file record per supported file, in walk order"""
+    files = walk_files(root, SUPPORTED_EXTENSIONS, stats)
+
+    if workers <= 1:
+        for path, _ in files:
+            yield _record(read_and_chunk(path, chunk_size), stats)
+        if stats is not None:
+            stats.walk_complete = True
+        return
+
+    max_bytes = max_in_flight_mb * 1024 * 1024
+    pending = deque()  # (future, size)
+    in_flight_bytes = 0
+
+    pool = get_pool(workers)
+    try:
+        for path, st in files:
+            # backpressure: drain the oldest result before exceeding either bound
+            while pending and (
+                len(pending) >= max_in_flight
+                or in_flight_bytes + st.st_size > max_bytes
+            ):
+                future, size = pending.popleft()
+                in_flight_bytes -= size
+                yield _record(future.result(), stats)
+
+            pending.append((pool.submit(read_and_chunk, path, chunk_size), st.st_size))
+            in_flight_bytes += st.st_size
+
+        if stats is not None:
+            stats.walk_complete = True
+
+        while pending:
+            future, _ = pending.popleft()
+            yield _record(future.result(), stats)
+    except BrokenProcessPool:
+        _discard_pool(workers, pool)
+        raise
+    finally:
+        # cancelled or failed scan: don't leave its reads queued on the shared pool
+        for future, _ in pending:
+            future.cancel()
@@ -0,0 +1,70 @@
+"""
+Immutable index snapshots.
+A snapshot bundles everything a query reads (FAISS index, chunk list,
+keyword index, vault manifest) under one version number. Syncs build a new
+snapshot off to the side and publish it with a single reference swap;
+readers take the reference once and use it for the whole request.
+Python frees an old snapshot once its last reader drops it.
+"""
+import threading
+import weakref
+from dataclasses import dataclass
+
+from vault.token_store import TokenStore
+from vault.vector_store import VectorStore
+
+_live = weakref.WeakValueDictionary()  # (vault, version) -> snapshot
+_live_lock = threading.Lock()
+
+
+@dataclass(frozen=True, eq=False)
+class IndexSnapshot:
+    vault: str
+    version: int
+    store: VectorStore      # never mutated once published
+    vault_data: dict
+    last_mtime: float = None
+    last_indexed: float = None
+    tokens: TokenStore = None  # pre-tokenized chunks/sentences for the scorers
+
+    def __post_init__(self):
+        with _live_lock:
+            _live[(self.vault, self.version)] = self
+        weakref.finalize(self, _freed, self.vault, self.version)
+
+    # read-only views of the store
+    @property
+    def index(self):
+        return self.store.index
+
+    @property
+    def chunks(self) -> list[str]:
+        return self.store.chunks
+
+    @property
+    def keyword_index(self):
+        return self.store.keyword_index
+
+    def sources(self, chunk_ids) -> list[str]:
+        """Paths of the files behind indexed chunks (near-duplicates included), first seen first"""
+        chunk_sources = self.vault_data.get("chunk_sources", [])
+        paths = []
+        for chunk_id in chunk_ids:
+            for path in chunk_sources[chunk_id] if chunk_id < len(chunk_sources) else ():
+                if path not in paths:
+                    paths.append(path)
+        return paths
+
+    def memory_bytes(self) -> int:
+        tokens = self.tokens.memory_bytes() if self.tokens is not None else 0
+        return self.store.memory_bytes() + tokens
+
+
+def _freed(vault: str, version: int):
+    print(f"🧹 SNAPSHOT FREED: {vault} v{version}")
+
+
+def live_snapshots() -> list[dict]:
+    """Snapshots still referenced by a namespace or an in-flight request"""
+    with _live_lock:
+        return [{"vault": v, "version": n} for v, n in sorted(_live.keys())]
@@ -0,0 +1,149 @@
+"""
+Background vault sync jobs.
+A sync runs on its own thread and reports progress through its ScanStats.
+Concurrent sync requests for the same vault coalesce into the running job,
+and queries keep using the previous index until the job publishes.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from vault.ingest import SyncCancelled
+from vault.namespaces import vault_registry, VaultNamespace
+from vault.scanner import ScanStats
+
+MAX_FINISHED_JOBS = 50
+
+
+class SyncJob:
+    def __init__(self, ns: VaultNamespace):
+        self.id = uuid.uuid4().hex[:12]
+        self.ns = ns
+        self.status = "queued"  # queued | running | done | failed | cancelled
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.stats = ScanStats()
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+        self.result = None
+        self.error = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done_event.wait(timeout)
+
+    def progress(self) -> dict:
+        stats = self.stats
+        files_found = stats.count("walk")
+        files_scanned = stats.count("read_chunk")
+        chunks_read = stats.count("chunks_read")
+        chunks_embedded = stats.count("embed") + stats.count("embed_cached")
+
+        # ETA from the observed embed rate; the chunk total is only an
+        # estimate (chunks per scanned file) until every file has been read
+        eta = None
+        if self.status == "running" and chunks_embedded and files_scanned:
+            elapsed = time.time() - self.started
+            est_chunks = chunks_read
+            if stats.walk_complete:
+                est_chunks = chunks_read / files_scanned * files_found
+            rate = chunks_embedded / elapsed
+            eta = round(max(est_chunks - chunks_embedded, 0) / rate, 1)
+
+        return {
+            "job_id": self.id,
+            "vault": self.ns.name,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "files_found": files_found,
+            "walk_complete": stats.walk_complete,
+            "files_scanned": files_scanned,
+            "chunks_read": chunks_read,
+            "chunks_embedded": chunks_embedded,
+            "eta_seconds": eta,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class SyncJobManager:
+    def __init__(self):
+        self._jobs = OrderedDict()  # id -> job, oldest first
+        self._active = {}           # vault name -> running job
+        self._lock = threading.Lock()
+
+    def submit(self, ns: VaultNamespace) -> SyncJob:
+        """Start a sync for `ns`, or return the one already running"""
+        with self._lock:
+            job = self._active.get(ns.name)
+            if job is not None and job.active:
+                return job
+
+            job = SyncJob(ns)
+            self._jobs[job.id] = job
+            self._active[ns.name] = job
+            ns.active_job = job
+            self._trim()
+
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> SyncJob:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> SyncJob:
+        job = self._jobs.get(job_id)
+        if job is not None and job.active:
+            job.cancel_event.set()
+        return job
+
+    def _run(self, job: SyncJob):
+        ns = job.ns
+        job.status = "running"
+        job.started = time.time()
+        print(f"🔄 SYNCING VAULT: {ns.name} (job {job.id})")  # Terminal feedback
+
+        try:
+            job.result = ns.sync(job.stats, job.cancel_event)
+            # jobs coalesce by vault name: publish to the instance now serving it
+            vault_registry.adopt(ns)
+            vault_registry.enforce_budget(keep=ns.name)
+            job.status = "done"
+            print(f"✅ VAULT SYNCED: {job.result['indexed_files']} files indexed")
+            dedup = job.result.get("dedup")
+            if dedup and dedup["duplicates_skipped"]:
+                print(f"   ♻️ dedup: {dedup['duplicates_skipped']} near-duplicate chunks not embedded ({dedup['embedding_saved_pct']}%)")
+            for stage, s in job.result["stages"].items():
+                if isinstance(s, dict):
+                    print(f"   ⏱️ {stage}: {s['items']} in {s['seconds']}s ({s['items_per_sec']}/s)")
+        except SyncCancelled:
+            job.status = "cancelled"
+            print(f"🛑 SYNC CANCELLED: {ns.name} (job {job.id})")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print("SYNC ERROR:", e)
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                if self._active.get(ns.name) is job:
+                    del self._active[ns.name]
+                if ns.active_job is job:
+                    ns.active_job = None
+            job.done_event.set()
+
+    def _trim(self):
+        finished = [jid for jid, j in self._jobs.items() if not j.active]
+        for jid in finished[:max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[jid]
+
+
+# Global instance
+sync_jobs = SyncJobManager()
@@ -0,0 +1,153 @@
+"""
+Token IDs of every chunk and sentence in a vault, computed at ingestion.
+The cross-encoders (grounding, reference, sufficiency) share the MiniLM
+WordPiece vocab, so vault text is tokenized once here instead of once per
+question that retrieves it. IDs are kept as flat int32 arrays with offsets
+and saved next to the FAISS index as tokens.npz.
+"""
+from pathlib import Path
+
+import numpy as np
+
+from config import TOKEN_STORE_TOKENIZER
+from vault.files import replace_atomically
+from vault.scanner import split_sentences
+
+_tokenizer = None
+
+
+def get_tokenizer():
+    """The ingestion tokenizer, loaded on first use"""
+    global _tokenizer
+    if _tokenizer is None:
+        from transformers import AutoTokenizer
+        _tokenizer = AutoTokenizer.from_pretrained(str(TOKEN_STORE_TOKENIZER), local_files_only=True)
+    return _tokenizer
+
+
+class _Packed:
+    """text -> token IDs, stored as one flat array plus offsets"""
+
+    def __init__(self, texts: list[str], ids: np.ndarray, offsets: np.ndarray):
+        self.ids = ids
+        self.offsets = offsets
+        self.index = {text: i for i, text in enumerate(texts)}
+
+    @classmethod
+    def pack(cls, texts: list[str], id_lists: list) -> "_Packed":
+        lengths = np.fromiter((len(x) for x in id_lists), dtype=np.int64, count=len(id_lists))
+        offsets = np.zeros(len(id_lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        flat = np.fromiter(
+            (t for ids in id_lists for t in ids), dtype=np.int32, count=int(offsets[-1])
+        )
+        return cls(texts, flat, offsets)
+
+    def get(self, text: str):
+        i = self.index.get(text)
+        if i is None:
+            return None
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.offsets.nbytes
+
+
+class TokenStore:
+    def __init__(self, fingerprint: str, chunks: _Packed, sentences: _Packed):
+        self.fingerprint = fingerprint
+        self.chunks = chunks
+        self.sentences = sentences
+
+    # -------------------------
+    # lookups
+    # -------------------------
+    def chunk_ids(self, chunk: str):
+        return self.chunks.get(chunk)
+
+    def sentence_ids(self, sentence: str):
+        return self.sentences.get(sentence)
+
+    def lookup_sentences(self, sentences: list[str]):
+        """IDs for every sentence, or None if any of them wasn't ingested"""
+        out = [self.sentences.get(s) for s in sentences]
+        return None if any(ids is None for ids in out) else out
+
+    def memory_bytes(self) -> int:
+        return self.chunks.nbytes() + self.sentences.nbytes()
+
+    def is_current(self) -> bool:
+        from models.token_pairs import tokenizer_fingerprint
+        return self.fingerprint == tokenizer_fingerprint(get_tokenizer())
+
+    # -------------------------
+    # build
+    # -------------------------
+    @classmethod
+    def build(cls, chunks: list[str], previous: "TokenStore" = None) -> "TokenStore":
+        """Tokenize chunks and their sentences; reuses `previous` for unchanged text"""
+        from models.token_pairs import tokenizer_fingerprint, encode_batch
+
+        tokenizer = get_tokenizer()
+        fingerprint = tokenizer_fingerprint(tokenizer)
+        if previous is not None and previous.fingerprint != fingerprint:
+            previous = None
+
+        sentences = list(dict.fromkeys(s for chunk in chunks for s in split_sentences(chunk)))
+
+        def tokenize(texts, lookup):
+            ids = [lookup(t) if previous is not None else None for t in texts]
+            missing = [i for i, x in enumerate(ids) if x is None]
+            if missing:
+                for i, x in zip(missing, encode_batch(tokenizer, [texts[i] for i in missing])):
+                    ids[i] = x
+            return ids
+
+        unique_chunks = list(dict.fromkeys(chunks))
+        chunk_ids = tokenize(unique_chunks, previous.chunk_ids if previous else None)
+        sentence_ids = tokenize(sentences, previous.sentence_ids if previous else None)
+
+        return cls(
+            fingerprint,
+            _Packed.pack(unique_chunks, chunk_ids),
+            _Packed.pack(sentences, sentence_ids),
+        )
+
+    # -------------------------
+    # persistence
+    # -------------------------
+    def save(self, directory: Path):
+        with replace_atomically(directory / "tokens.npz") as tmp:
+            np.savez(
+                tmp,
+                fingerprint=np.array(self.fingerprint),
+                chunk_ids=self.chunks.ids,
+                chunk_offsets=self.chunks.offsets,
+                sentence_ids=self.sentences.ids,
+                sentence_offsets=self.sentences.offsets,
+            )
+
+    @classmethod
+    def load(cls, directory: Path, chunks: list[str]):
+        """
+        Restore from tokens.npz; texts are re-derived from `chunks` in the
+        same order build() used. None if missing or stale.
+        """
+        path = directory / "tokens.npz"
+        if not path.exists():
+            return None
+
+        data = np.load(path)
+        unique_chunks = list(dict.fromkeys(chunks))
+        sentences = list(dict.fromkeys(s for chunk in chunks for s in split_sentences(chunk)))
+        if (
+            len(data["chunk_offsets"]) != len(unique_chunks) + 1
+            or len(data["sentence_offsets"]) != len(sentences) + 1
+        ):
+            return None
+
+        return cls(
+            str(data["fingerprint"]),
+            _Packed(unique_chunks, data["chunk_ids"], data["chunk_offsets"]),
+            _Packed(sentences, data["sentence_ids"], data["sentence_offsets"]),
+        )
@@ -1,45 +1,203 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+
 import faiss
-import ollama
+import numpy as np
+
+from config import EMBEDDING_MODEL
+from embedders import get_embedder
+from vault.files import replace_atomically
+from vault.keyword_index import KeywordIndex
+
+# what indexes saved before embedders.py were built with
+LEGACY_IDENTITY = f"ollama:{EMBEDDING_MODEL}"
+
+# Recorded in each vault manifest. Format 2 indexes hold unit vectors and
+# search scores are cosine similarity; format 1 indexes hold the raw
+# vectors and must be rebuilt (their embedding caches are still valid).
+INDEX_FORMAT = 2
+
+
+def chunk_key(chunk: str) -> str:
+    return hashlib.sha1(chunk.encode("utf-8")).hexdigest()
+
 
 class VectorStore:
-    def __init__(self, model_name="bge-large:latest"):
-        self.model_name = model_name
+    def __init__(self, embedder=None):
+        self.embedder = embedder or get_embedder()
         self.index = None
         self.chunks = []
+        self.keyword_index = KeywordIndex([])
+        # chunk hash -> embedding, so unchanged chunks are not re-embedded
+        self.embedding_cache = {}
 
-    def build(self, chunks: list[str]):
-        if not chunks:
-            return
+    def build(self, chunks, stats=None):
+        """
+        Embed and index `chunks`. Accepts any iterable, so a streaming scan
+        can feed chunks in while later files are still being read. Chunks
+        missing from the cache are embedded in batches of the embedder's
+        batch_size.
+        """
+        chunk_list = []
+        keys = []
+        cache = {}
+        pending = {}  # chunk hash -> chunk, embedded at the next flush
+
+        def flush():
+            start = time.perf_counter()
+            vectors = self.embed_batch(list(pending.values()))
+            if stats is not None:
+                stats.add("embed", items=len(pending), seconds=time.perf_counter() - start)
+            cache.update(zip(pending, vectors))
+            pending.clear()
 
-        embeddings = []
         for chunk in chunks:
-            response = ollama.embeddings(model=self.model_name, prompt=chunk)
-            embeddings.append(response['embedding'])
+            key = chunk_key(chunk)
+            chunk_list.append(chunk)
+            keys.append(key)
+            if key in pending:
+                continue
+            vec = cache.get(key)
+            if vec is None:
+                vec = self.embedding_cache.get(key)
+            if vec is None:
+                pending[key] = chunk
+                if len(pending) >= self.embedder.batch_size:
+                    flush()
+                continue
+            cache[key] = vec
+            if stats is not None:
+                stats.add("embed_cached")
+        if pending:
+            flush()
+        embeddings = [cache[key] for key in keys]
+
+        if not chunk_list:
+            self.index = None
+            self.chunks = []
+            self.keyword_index = KeywordIndex([])
+            self.embedding_cache = {}
+            return
 
-        import numpy as np
         embeddings = np.array(embeddings, dtype='float32')
+        # unit vectors: squared L2 distance then maps directly to cosine
+        faiss.normalize_L2(embeddings)
 
         dim = embeddings.shape[1]
         self.index = faiss.IndexFlatL2(dim)
         self.index.add(embeddings)
 
-        self.chunks = chunks
+        self.chunks = chunk_list
+        self.keyword_index = KeywordIndex(chunk_list)
+        self.embedding_cache = cache
+
+    def embed(self, text: str) -> np.ndarray:
+        return self.embedder.embed(text)
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        return self.embedder.embed_batch(texts)
 
     def search(self, query: str, k: int = 3):
         if self.index is None:
             return []
 
-        response = ollama.embeddings(model=self.model_name, prompt=query)
-        query_vec = [response['embedding']]
-        
-        import numpy as np
-        query_vec = np.array(query_vec, dtype='float32')
-        
-        distances, indices = self.index.search(query_vec, k)
+        query_vec = np.array([self.embed(query)], dtype='float32')
+        return self._search_vectors(query_vec, k)[0]
+
+    def search_batch(self, queries: list[str], k: int = 3) -> list[list[dict]]:
+        """One embedding call and one FAISS search for all queries"""
+        if self.index is None or not queries:
+            return [[] for _ in queries]
+
+        return self._search_vectors(self.embed_batch(queries), k)
+
+    def _search_vectors(self, query_vecs: np.ndarray, k: int) -> list[list[dict]]:
+        faiss.normalize_L2(query_vecs)
+        distances, indices = self.index.search(query_vecs, k)
+
+        batch = []
+        for row_dist, row_idx in zip(distances, indices):
+            results = []
+            for dist, idx in zip(row_dist, row_idx):
+                if 0 <= idx < len(self.chunks):
+                    results.append({
+                        "id": int(idx),
+                        "chunk": self.chunks[idx],
+                        "score": float(1.0 - dist / 2.0),  # cosine similarity
+                    })
+            batch.append(results)
+
+        return batch
+
+    # -------------------------
+    # persistence
+    # -------------------------
+    def save(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+
+        index_path = directory / "index.faiss"
+        if self.index is not None:
+            with replace_atomically(index_path) as tmp:
+                faiss.write_index(self.index, str(tmp))
+        elif index_path.exists():
+            index_path.unlink()
+
+        with replace_atomically(directory / "chunks.json") as tmp:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.chunks, f)
+
+        keys = list(self.embedding_cache)
+        vectors = (
+            np.stack([self.embedding_cache[k] for k in keys])
+            if keys else np.zeros((0, 0), dtype='float32')
+        )
+        with replace_atomically(directory / "embeddings.npz") as tmp:
+            np.savez(
+                tmp,
+                keys=np.array(keys),
+                vectors=vectors,
+                embedder=np.array(self.embedder.identity),
+            )
+
+    @staticmethod
+    def saved_identity(directory: Path):
+        """Embedder identity of the index saved in `directory` (None if nothing is saved)"""
+        cache_path = directory / "embeddings.npz"
+        if not cache_path.exists():
+            return None
+        data = np.load(cache_path)
+        return str(data["embedder"]) if "embedder" in data else LEGACY_IDENTITY
+
+    def load(self, directory: Path) -> bool:
+        index_path = directory / "index.faiss"
+        chunks_path = directory / "chunks.json"
+        if not index_path.exists() or not chunks_path.exists():
+            return False
+
+        self.index = faiss.read_index(str(index_path))
+        with open(chunks_path, "r", encoding="utf-8") as f:
+            self.chunks = json.load(f)
+        self.keyword_index = KeywordIndex(self.chunks)
+        self.load_embedding_cache(directory)
+        return True
 
-        results = []
-        for idx in indices[0]:
-            if idx < len(self.chunks):
-                results.append(self.chunks[idx])
+    def load_embedding_cache(self, directory: Path):
+        """Cached raw embeddings, if they came from this store's embedder"""
+        cache_path = directory / "embeddings.npz"
+        if cache_path.exists() and self.saved_identity(directory) == self.embedder.identity:
+            data = np.load(cache_path)
+            self.embedding_cache = {
+                str(k): v for k, v in zip(data["keys"], data["vectors"])
+            }
 
-        return results
\ No newline at end of file
+    def memory_bytes(self) -> int:
+        """Rough resident size: index vectors + cached embeddings + chunk text"""
+        total = sum(len(c) for c in self.chunks)
+        total += self.keyword_index.memory_bytes()
+        if self.index is not None:
+            total += self.index.ntotal * self.index.d * 4
+        for vec in self.embedding_cache.values():
+            total += vec.nbytes
+        return total
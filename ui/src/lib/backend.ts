@@ -9,8 +9,24 @@ async function post(endpoint: string, body: any) {
   return res.json();
 }
 
-export function syncVault() {
-  return post("/sync", {});
+async function get(endpoint: string) {
+  const res = await fetch(`${BACKEND_URL}${endpoint}`);
+  return res.json();
+}
+
+// Sync runs as a background job; poll until it finishes and return its result
+export async function syncVault(onProgress?: (job: any) => void) {
+  let job = await post("/sync", {});
+  while (job?.status === "queued" || job?.status === "running") {
+    onProgress?.(job);
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+    job = await get(`/sync/${job.job_id}`);
+  }
+  return job?.result ?? job;
+}
+
+export function cancelSync(jobId: string) {
+  return post(`/sync/${jobId}/cancel`, {});
 }
 
 export function sendMessage(message: string) {